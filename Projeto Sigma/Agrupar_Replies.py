@@ -3,49 +3,67 @@ import os
 import glob
 from datetime import datetime
 
+from sigma_core.caminhos import PASTA_JSON_RAW, PASTA_TXTS, ARQUIVO_INDICE_FONTES
+from sigma_core.indice import IndiceFontes
+from sigma_core.persistencia import salvar_json_atomico, carregar_json
+
 # --- CONFIGURAÇÕES ---
-PASTA_JSON_RAW = "Dados-Brutos"
-PASTA_SAIDA = "TXTs"
 NOME_ARQUIVO_FINAL = "Todas_Replies_Agrupadas.json"
+# O que já extraímos por hash (o hash de cada resposta vem do índice do minerador)
+ARQUIVO_CACHE_REPLIES = os.path.join(PASTA_TXTS, "cache_replies.json")
 
-def carregar_json(caminho):
+def ler_resposta_bruta(caminho):
     try:
         with open(caminho, 'r', encoding='utf-8') as f:
             return json.load(f)
     except Exception as e:
         return None
 
+def extrair_reply(dados):
+    if isinstance(dados, dict):
+        return dados.get("reply")
+    # Se for uma lista, tenta pegar do primeiro item se for dicionário
+    if isinstance(dados, list) and len(dados) > 0 and isinstance(dados[0], dict):
+        return dados[0].get("reply")
+    return None
+
 def main():
     # Garante que as pastas existem
     if not os.path.exists(PASTA_JSON_RAW):
         print(f"❌ Pasta '{PASTA_JSON_RAW}' não encontrada.")
         return
 
-    os.makedirs(PASTA_SAIDA, exist_ok=True)
+    os.makedirs(PASTA_TXTS, exist_ok=True)
 
     arquivos = glob.glob(os.path.join(PASTA_JSON_RAW, "*.json"))
     print(f"🚀 Iniciando agrupamento de {len(arquivos)} arquivos...")
 
+    indice = IndiceFontes(ARQUIVO_INDICE_FONTES)
+    cache_antigo = carregar_json(ARQUIVO_CACHE_REPLIES, {})
+    cache_novo = {}
+
     lista_final = []
     contador_sucesso = 0
     contador_vazio = 0
+    contador_reaproveitado = 0
 
     for caminho_arquivo in arquivos:
         nome_arquivo = os.path.basename(caminho_arquivo)
-        dados = carregar_json(caminho_arquivo)
 
-        if not dados:
-            continue
-
-        reply_encontrada = None
+        # Resposta com o mesmo hash da última vez: reaproveita sem abrir o JSON
+        hash_atual = indice.hash_confirmado(nome_arquivo, caminho_arquivo)
+        anterior = cache_antigo.get(nome_arquivo)
+        if hash_atual and anterior and anterior.get("hash") == hash_atual:
+            reply_encontrada = anterior.get("reply")
+            contador_reaproveitado += 1
+        else:
+            dados = ler_resposta_bruta(caminho_arquivo)
+            if not dados:
+                continue
+            reply_encontrada = extrair_reply(dados)
 
-        # Tenta encontrar o campo 'reply'
-        if isinstance(dados, dict):
-            reply_encontrada = dados.get("reply")
-        elif isinstance(dados, list) and len(dados) > 0:
-            # Se for uma lista, tenta pegar do primeiro item se for dicionário
-            if isinstance(dados[0], dict):
-                reply_encontrada = dados[0].get("reply")
+        if hash_atual:
+            cache_novo[nome_arquivo] = {"hash": hash_atual, "reply": reply_encontrada}
 
         if reply_encontrada:
             # Adiciona à lista final com a referência de onde veio
@@ -59,16 +77,18 @@ def main():
             contador_vazio += 1
 
     # Salva o arquivo consolidado
-    caminho_saida_completo = os.path.join(PASTA_SAIDA, NOME_ARQUIVO_FINAL)
+    caminho_saida_completo = os.path.join(PASTA_TXTS, NOME_ARQUIVO_FINAL)
     
     try:
         with open(caminho_saida_completo, 'w', encoding='utf-8') as f:
             json.dump(lista_final, f, indent=4, ensure_ascii=False)
+        salvar_json_atomico(ARQUIVO_CACHE_REPLIES, cache_novo)
         
         print(f"\n✅ Concluído!")
         print(f"📂 Arquivo salvo em: {caminho_saida_completo}")
         print(f"📝 Total de Replies encontradas: {contador_sucesso}")
         print(f"⚠️ Arquivos sem reply: {contador_vazio}")
+        print(f"♻️ Sem mudanças desde a última vez (não relidos): {contador_reaproveitado}")
 
     except Exception as e:
         print(f"❌ Erro ao salvar arquivo final: {e}")
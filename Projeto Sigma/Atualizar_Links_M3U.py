@@ -1,40 +1,61 @@
+import argparse
+import asyncio
+import hashlib
+import heapq
+import itertools
 import json
 import os
 import re
+import sys
 import time
 from datetime import datetime
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-# --- IMPORTAÇÃO DO MOTOR POTENTE ---
-try:
-    from curl_cffi import requests as cffi_requests
-except ImportError:
-    print("❌ ERRO REAL: Biblioteca 'curl_cffi' faltando.")
-    print("Detalhe: O Python não encontrou o módulo curl_cffi.")
-    exit()
-
-# --- IMPORTAÇÃO VISUAL (RICH) ---
-# Removido o try/except para mostrar o erro real se acontecer
-from rich.live import Live
-from rich.table import Table
-from rich.panel import Panel
-from rich.layout import Layout
-from rich.console import Console, Group # <--- Group agora vem daqui
-from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
-from rich import box
-from rich.text import Text
+from collections import defaultdict
+from urllib.parse import urlparse
+
+# --- MOTOR (ASSÍNCRONO) ---
+# curl_cffi só é conferido aqui; o import de verdade acontece na primeira sessão.
+# Rich só é importado quando há interface (no --headless nem é carregado).
+from sigma_core.dependencias import exigir
+exigir("curl_cffi")
+
+from sigma_core.caminhos import (ARQUIVO_FONTES, PASTA_JSON_RAW, PASTA_PARCERIAS, PASTA_TXTS,
+                                 ARQUIVO_LINKS_APKS, ARQUIVO_INDICE_FONTES)
+from sigma_core.conexoes import PoolSessoesAsync
+from sigma_core.persistencia import carregar_json, salvar_json_atomico, salvar_texto_atomico
+from sigma_core.diario import DiarioExecucao
+from sigma_core.extracao import REGEX_URL, nome_arquivo_fonte
+from sigma_core.parcerias import CLASSIFICADOR
+from sigma_core.gravador import GravadorDeduplicado
+from sigma_core.registro import RegistroEventos
+from sigma_core.indice import IndiceFontes
+from sigma_core.controle_fluxo import LimitadorHost, DisjuntorHost, eh_bloqueio, FECHADO
 
 # --- CONFIGURAÇÕES ---
-ARQUIVO_FONTES = "fontes.json"
-MAX_WORKERS = 10 
-
-# Pastas
-PASTA_JSON_RAW = "Dados-Brutos"
-PASTA_PARCERIAS = "Parcerias"
-PASTA_TXTS = "TXTs"
+MAX_CONEXOES = 50    # Orçamento global de requisições simultâneas
+MAX_POR_HOST = 4     # Limite por painel (não martela um único servidor)
+TIMEOUT_REQUISICAO = 20
+TAXA_INICIAL_HOST = 4.0   # req/s por painel no início; o AIMD ajusta durante a rodada
+FALHAS_PARA_ABRIR = 5     # falhas seguidas até o disjuntor isolar o painel
+TEMPO_DISJUNTOR = 120     # segundos até testar o painel de novo
+
+# Arquivos deste script (pastas comuns vêm de sigma_core.caminhos)
 ARQUIVO_LOG_ERROS = os.path.join(PASTA_TXTS, "erros_mineracao.txt")
-ARQUIVO_LINKS_APKS = os.path.join(PASTA_TXTS, "Links_APKs.txt")
+ARQUIVO_CACHE_METODOS = os.path.join(PASTA_TXTS, "cache_metodos.json")
+ARQUIVO_DIARIO = os.path.join(PASTA_TXTS, "diario_mineracao.jsonl")
+ARQUIVO_EVENTOS = os.path.join(PASTA_TXTS, "eventos_mineracao.jsonl")
+ARQUIVO_MINERACAO = os.path.join(PASTA_TXTS, "mineracao_fontes.json")  # Só o minerador lê (o índice fica enxuto)
+INTERVALO_CHECKPOINT = 15  # Segundos entre gravações do índice durante a rodada
+MARCA_OUTROS = "# --- Linhas de outros scripts (preservadas pelo minerador) ---"  # Divide cada Parcerias/*.txt
+
+# --- MODO AGENDADOR (--agendador) ---
+ANTECEDENCIA_RENOVACAO = 120    # Renova a fonte 2 min antes do expiresAt
+INTERVALO_MINIMO = 300          # Nunca renova a mesma fonte mais de 1x a cada 5 min
+INTERVALO_SEM_VALIDADE = 3600   # Fontes sem expiresAt: revisita a cada 1h
+INTERVALO_APOS_FALHA = 600      # Fonte que falhou: tenta de novo em 10 min
+ESPERA_PARCERIAS = 30           # Junta as renovações próximas numa reconstrução só de Parcerias/
+
+INTERVALO_MIN_REDESENHO = 0.1  # Coalesce rajadas de eventos: no máximo 10 redesenhos/s
 
 # --- CONTROLE DE THREADS E ESTADO VISUAL ---
 lock_arquivo = threading.Lock()
@@ -43,196 +64,450 @@ lock_ui = threading.Lock() # Protege o dicionário de status da UI
 
 # Estado Global para UI
 active_tasks = {} # Armazena o que cada thread está fazendo: { "NomeFonte": "Status..." }
+evento_ui = None  # asyncio.Event: algo mudou, o dashboard precisa redesenhar
+MODO_HEADLESS = False  # --headless: sem Rich, progresso em JSON lines no stdout
 stats = {
     "atualizados": 0,
     "cacheados": 0,
     "erros": 0,
     "total": 0,
-    "concluidos": 0
+    "concluidos": 0,
+    "viagens_economizadas": 0,  # Round trips poupados pelo cache de método
+    "reprovas": 0,              # Vezes que o método conhecido falhou e o outro foi testado
+    "bloqueios": 0,             # 429/403/HTML de bloqueio recebidos
+    "inalterados": 0            # Baixados, mas idênticos ao que já estava no disco
 }
 
-# --- LISTA DE APPS ---
-APPS_PARCERIA = {
-    "ASSIST": "Assist_Plus_Play_Sim", "PLAY SIM": "Assist_Plus_Play_Sim",
-    "LAZER": "Lazer_Play", "VIZZION": "Vizzion", "UNITV": "UniTV",
-    "UNI TV": "UniTV", "XCLOUD": "XCloud_TV", "P2P": "Codigos_P2P_Geral",
-    "SMARTERS": "IPTV_Smarters_DNS", "XCIPTV": "XCIPTV_Dados",
-    "SSIPTV": "SSIPTV_Playlist", "NETRANGE": "NetRange",
-    "CLOUDDY": "Clouddy_App", "IBO": "IBO_Player", "DUPLEX": "Duplex_Play",
-    "EAGLE": "Eagle_TV", "FLASH": "Flash_P2P", "TVE": "TV_Express",
-    "TV EXPRESS": "TV_Express", "MY FAMILY": "MyFamily_Cinema",
-    "MFC": "MyFamily_Cinema", "REDPLAY": "RedPlay", "BTV": "BTV_Codes",
-    "HTV": "HTV_Codes", "YOUCINE": "YouCine", "BLUE": "Blue_TV",
-    "UCAST": "UCast_App", "ALPHA": "Alpha_Master_App", "WAVE": "Wave_App",
-    "TITÃ": "Tita_App", "ATENA": "Atena_App", "ANDRÔMEDA": "Andromeda_App",
-    "SOLAR": "Solar_App", "FIRE": "Fire_App", "LUNAR": "Lunar_App",
-    "GALAXY": "Galaxy_App", "OLYMPUS": "Olympus_App", "SPEED": "Speed_App",
-    "SEVEN": "Seven_App", "SKY": "Sky_Alternative_App", "HADES": "Hades_App",
-    "VÊNUS": "Venus_App", "URANO": "Urano_App", "K9": "K9_Play",
-    "CINEMAX": "Cinemax_App", "GREEN": "Green_TV", "GTA": "GTA_Player"
-}
+# Índice lateral de Dados-Brutos (validade sem abrir o JSON). Carregado no main().
+indice_fontes = None
+
+# Resultado da última mineração por fonte ({"hash", "mineracao"}), fora do índice
+# compartilhado: downloader e Agrupar_Replies não carregam isso a cada rodada
+mineracoes = None
+
+# Diário da rodada (retomada após kill/crash) e status de cada fonte nesta rodada
+diario = None
+status_rodada = {}
+
+# Último método que funcionou por fonte: { api_url: {"metodo", "status", "latencia", "data"} }
+cache_metodos = {}
+
+# Semáforos por host (criados sob demanda dentro do loop de eventos)
+semaforos_host = defaultdict(lambda: asyncio.Semaphore(MAX_POR_HOST))
+
+# Taxa adaptativa + disjuntor por painel
+limitador = LimitadorHost(taxa_inicial=TAXA_INICIAL_HOST)
+disjuntor = DisjuntorHost(limite_falhas=FALHAS_PARA_ABRIR, tempo_aberto=TEMPO_DISJUNTOR)
+
+# Links_APKs.txt: thread gravadora única, sem linhas repetidas entre rodadas
+# Log de erros + eventos por fonte: fila para uma thread registradora (sem lock por linha)
+# As duas threads nascem no main() (importar o módulo não dispara nada); fechar_gravacao() encerra
+gravador = None
+registro = None
 
 # --- FUNÇÕES AUXILIARES ---
 
+def notificar_ui():
+    """Acorda o redesenho do dashboard (chamado sempre do loop de eventos)"""
+    if evento_ui is not None: evento_ui.set()
+
+def emitir_json(registro):
+    """Uma linha JSON por evento no stdout (modo --headless)"""
+    registro["ts"] = round(time.time(), 3)
+    sys.stdout.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
 def update_ui_status(nome, status):
     """Atualiza o status de uma tarefa na UI"""
+    if MODO_HEADLESS: return
     with lock_ui:
         if status is None:
             if nome in active_tasks:
                 del active_tasks[nome]
         else:
             active_tasks[nome] = status
-
-def limpar_nome_arquivo(nome):
-    try:
-        nome_ascii = nome.encode('ascii', 'ignore').decode('ascii')
-    except:
-        nome_ascii = "Nome_Desconhecido"
-    return re.sub(r'[<>:"/\\|?*]', '', nome_ascii).strip().replace(" ", "_")
+    notificar_ui()
 
 def registrar_erro_log(nome, url, erro):
     timestamp = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    msg = f"[{timestamp}] {nome} | {erro}\nLink: {url}\n{'-'*30}\n"
-    with lock_arquivo:
+    registro.texto(ARQUIVO_LOG_ERROS, f"[{timestamp}] {nome} | {erro}\nLink: {url}\n{'-'*30}\n")
+
+def extrair_host(url):
+    try: return urlparse(url).netloc.lower()
+    except: return ""
+
+def ordem_metodos(url):
+    """Método que funcionou da última vez primeiro; sem histórico, POST -> GET"""
+    conhecido = cache_metodos.get(url, {}).get("metodo")
+    if conhecido == "GET": return ["GET", "POST"]
+    return ["POST", "GET"]
+
+def resposta_aceita(metodo, status_code):
+    # Mesma regra de sempre: POST vale se < 400, GET só com 200
+    if metodo == "POST": return status_code < 400
+    return status_code == 200
+
+async def baixar_json_blindado(pool, url, caminho_salvar):
+    if not disjuntor.permitir(url):
+        return False, "Disjuntor aberto", None
+
+    session = pool.sessao(url)
+    ordem = ordem_metodos(url)
+    ultimo_erro = "Sem resposta"
+    bloqueado = False
+
+    for tentativa, metodo in enumerate(ordem):
+        if tentativa > 0:
+            # Painel caiu/abriu o disjuntor na primeira tentativa: não insiste
+            # (bloqueio não conta: o painel respondeu, só não gostou do método)
+            if disjuntor.estado(url) != FECHADO and not bloqueado: break
+            if url in cache_metodos:
+                with lock_stats: stats["reprovas"] += 1
+        await limitador.aguardar_async(url)
         try:
-            with open(ARQUIVO_LOG_ERROS, 'a', encoding='utf-8') as f:
-                f.write(msg)
-        except: pass
+            inicio = time.perf_counter()
+            resp = await session.request(metodo, url, impersonate="chrome120", timeout=TIMEOUT_REQUISICAO)
+            latencia = time.perf_counter() - inicio
+        except Exception as e:
+            disjuntor.falha(url)
+            ultimo_erro = str(e)[:20]
+            bloqueado = False
+            continue
+
+        if eh_bloqueio(resp.status_code, resp.content[:512]):
+            limitador.bloqueio(url)
+            disjuntor.falha(url)
+            with lock_stats: stats["bloqueios"] += 1
+            # Painel/WAF que barra POST (403 ou página HTML) ainda pode aceitar GET
+            ultimo_erro = f"Bloqueio (HTTP {resp.status_code})"
+            bloqueado = True
+            continue
+        bloqueado = False
+
+        if resp.status_code >= 500:
+            disjuntor.falha(url)
+        else:
+            # O painel respondeu (mesmo que 404/405 para este método): host vivo
+            disjuntor.sucesso(url)
+
+        if not resposta_aceita(metodo, resp.status_code):
+            ultimo_erro = f"HTTP {resp.status_code}"
+            continue
+
+        limitador.sucesso(url)
+
+        # Resposta idêntica à do disco: não regrava (mtime intacto) e avisa quem vem depois
+        nome_arq = os.path.basename(caminho_salvar)
+        digest = hashlib.sha1(resp.content).hexdigest()
+        inalterado = indice_fontes.hash_confirmado(nome_arq, caminho_salvar) == digest
+        if not inalterado:
+            with open(caminho_salvar, 'wb') as f: f.write(resp.content)
+        registrar_validade(nome_arq, resp.content)
+        registrar_conteudo(nome_arq, caminho_salvar, digest, inalterado)
+        cache_metodos[url] = {
+            "metodo": metodo,
+            "status": resp.status_code,
+            "latencia": round(latencia, 3),
+            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        # Sem o cache, um GET só sairia depois de um POST frustrado
+        if tentativa == 0 and metodo == "GET":
+            with lock_stats: stats["viagens_economizadas"] += 1
+        if inalterado:
+            return True, f"INALTERADO ({metodo})", resp.content
+        return True, f"OK ({metodo})", resp.content
+
+    return False, ultimo_erro, None
+
+def minerar_texto(texto_resposta, nome_exibicao):
+    """Parte pura da mineração: devolve (apks, {app: [linhas]}) sem tocar no disco"""
+    linhas = texto_resposta.split('\n')
+    urls = REGEX_URL.findall(texto_resposta)
+    apks = [u for u in urls if any(ext in u.lower() for ext in ['.apk', 'aftv.news', 'dl.ntdev', 'mediafire'])]
+    
+    # Remove duplicados preservando ordem
+    apks = list(dict.fromkeys(apks))
+
+    buffer_parcerias = {}
+    candidatas = [l for l in (linha.strip() for linha in linhas) if l and len(l) <= 300]
+    for indice, app_detectado in CLASSIFICADOR.classificar_linhas(candidatas).items():
+        buffer_parcerias.setdefault(app_detectado, []).append(f"[{nome_exibicao}] {candidatas[indice]}\n")
+
+    return apks, buffer_parcerias
+
+def gravar_apks(nome_exibicao, apks):
+    # Mesmo formato do downloader ("[Fonte] url"): linha autocontida, deduplicável
+    for l in apks:
+        gravador.gravar(ARQUIVO_LINKS_APKS, f"[{nome_exibicao}] {l}")
+
+def linhas_de_outros(caminho, mineradas):
+    """
+    Linhas de um Parcerias/*.txt que não saíram do minerador (o downloader
+    também grava ali): tudo abaixo de MARCA_OUTROS. Arquivo ainda sem a marca
+    (criado pelo downloader ou de antes dela): o que não está na mineração nova.
+    """
+    try:
+        with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+            linhas = [l.rstrip("\n") for l in f if l.strip()]
+    except OSError:
+        return []
+    if MARCA_OUTROS in linhas:
+        return linhas[linhas.index(MARCA_OUTROS) + 1:]
+    mineradas = {l.rstrip("\n") for l in mineradas}
+    return [l for l in linhas if l not in mineradas]
+
+def migrar_links_apks():
+    """
+    Links_APKs.txt de antes do formato por linha ("--- Fonte ---" seguido das
+    urls): converte uma vez para "[Fonte] url", sem repetidas. Sem isso a
+    primeira rodada reacrescentaria o histórico inteiro no formato novo.
+    """
+    try:
+        with open(ARQUIVO_LINKS_APKS, 'r', encoding='utf-8', errors='ignore') as f:
+            linhas = [l.strip() for l in f if l.strip()]
+    except OSError:
+        return
+    if not any(l.startswith("--- ") and l.endswith(" ---") for l in linhas): return
+
+    convertidas, fonte_atual = [], "Sem Nome"
+    for l in linhas:
+        if l.startswith("--- ") and l.endswith(" ---"):
+            fonte_atual = l[4:-4]
+        elif l.startswith("["):
+            convertidas.append(l)
+        else:
+            convertidas.append(f"[{fonte_atual}] {l}")
+    salvar_texto_atomico(ARQUIVO_LINKS_APKS, "".join(f"{l}\n" for l in dict.fromkeys(convertidas)))
+
+def reconstruir_parcerias(fontes):
+    """
+    Regera a parte do minerador em Parcerias/ a partir do resultado de mineração
+    guardado (fonte por fonte, na ordem do fontes.json). Fonte que falhou nesta
+    rodada entra com o último JSON bom que ficou no disco. As linhas gravadas por
+    outros scripts seguem abaixo de MARCA_OUTROS. Cada arquivo é trocado
+    atomicamente: um crash no meio da rodada nunca apaga o que já havia.
+    """
+    por_app = {}
+    for item in fontes:
+        nome = item.get('nome', 'Sem Nome')
+        nome_arq = nome_arquivo_fonte(nome)
+        caminho_json = os.path.join(PASTA_JSON_RAW, nome_arq)
+        if not os.path.exists(caminho_json): continue
+        resultado = minerar_fonte(nome, nome_arq, caminho_json)
+        if not resultado: continue
+        for app_nome, conteudos in resultado["parcerias"].items():
+            por_app.setdefault(app_nome, []).extend(conteudos)
 
-def baixar_json_blindado(url, caminho_salvar):
-    session = cffi_requests.Session()
+    with lock_arquivo:
+        apps = set(por_app) | {arq[:-4] for arq in os.listdir(PASTA_PARCERIAS) if arq.endswith(".txt")}
+        for app_nome in apps:
+            caminho = os.path.join(PASTA_PARCERIAS, f"{app_nome}.txt")
+            mineradas = por_app.get(app_nome, [])
+            outras = linhas_de_outros(caminho, mineradas)
+            if not mineradas and not outras:
+                try: os.remove(caminho)
+                except OSError: pass
+                continue
+            # A marca vai sempre: o que o downloader acrescentar depois cai abaixo dela
+            conteudo = "".join(mineradas) + MARCA_OUTROS + "\n" + "".join(l + "\n" for l in outras)
+            salvar_texto_atomico(caminho, conteudo)
+
+def registrar_conteudo(nome_arq, caminho_json, digest, inalterado):
+    """
+    Grava no índice o hash da resposta e se ela mudou. Agrupar_Replies e o
+    downloader comparam esse hash com o que já processaram e pulam o resto.
+    """
+    campos = {"hash": digest, "estado": "inalterado" if inalterado else "atualizado"}
+    if not inalterado:
+        st = os.stat(caminho_json)
+        campos.update(tamanho=st.st_size, mtime=st.st_mtime, alterado_em=time.time())
+    indice_fontes.atualizar(nome_arq, **campos)
+
+def minerar_fonte(nome, nome_arq, caminho_json, conteudo=None):
+    """
+    Minera a resposta que já está em memória (download recém-feito).
+    Vindo do cache, só relê o arquivo se ele mudou por fora; e só re-minera se
+    o hash do conteúdo for diferente do que foi minerado da última vez.
+    Devolve {"apks": [...], "parcerias": {app: [linhas]}} ou None se falhar.
+    """
     try:
-        resp = session.post(url, impersonate="chrome120", timeout=20)
-        if resp.status_code >= 400:
-             raise Exception(f"POST {resp.status_code}")
-        with open(caminho_salvar, 'wb') as f: f.write(resp.content)
-        return True, "OK (POST)"
+        registro = mineracoes.get(nome_arq) or {}
+        resultado = registro.get("mineracao")
+
+        if conteudo is None:
+            if (resultado is not None and registro.get("hash")
+                    and indice_fontes.hash_confirmado(nome_arq, caminho_json) == registro["hash"]):
+                return resultado
+            with open(caminho_json, 'rb') as f: conteudo = f.read()
+
+        digest = hashlib.sha1(conteudo).hexdigest()
+        if resultado is None or registro.get("hash") != digest:
+            apks, buffer_parcerias = minerar_texto(conteudo.decode('utf-8', 'ignore'), nome)
+            resultado = {"apks": apks, "parcerias": buffer_parcerias}
+            mineracoes.atualizar(nome_arq, hash=digest, mineracao=resultado)
+
+        if indice_fontes.hash_confirmado(nome_arq, caminho_json) != digest:
+            st = os.stat(caminho_json)
+            indice_fontes.atualizar(nome_arq, hash=digest, tamanho=st.st_size, mtime=st.st_mtime)
+        return resultado
     except Exception:
-        try:
-            resp = session.get(url, impersonate="chrome120", timeout=20)
-            if resp.status_code == 200:
-                with open(caminho_salvar, 'wb') as f: f.write(resp.content)
-                return True, "OK (GET)"
-            else: return False, f"HTTP {resp.status_code}"
-        except Exception as e: return False, str(e)[:20]
-
-def extrair_parcerias_e_downloads(texto_resposta, nome_exibicao):
-    try:
-        linhas = texto_resposta.split('\n')
-        urls = re.findall(r'(https?://[^\s<>"]+)', texto_resposta)
-        apks = [u for u in urls if any(ext in u.lower() for ext in ['.apk', 'aftv.news', 'dl.ntdev', 'mediafire'])]
-        
-        # Remove duplicados preservando ordem
-        apks = list(dict.fromkeys(apks))
-
-        if apks:
-            with lock_arquivo:
-                with open(ARQUIVO_LINKS_APKS, 'a', encoding='utf-8') as f:
-                    f.write(f"\n--- {nome_exibicao} ---\n")
-                    for l in apks: f.write(f"{l}\n")
-
-        buffer_parcerias = {}
-        for linha in linhas:
-            l = linha.strip()
-            if not l or len(l) > 300: continue
-            
-            app_detectado = None
-            l_upper = l.upper()
-            for k, v in APPS_PARCERIA.items():
-                if k in l_upper:
-                    app_detectado = v
-                    break
-            
-            if app_detectado and any(x in l_upper for x in ["CÓDIGO", "CODIGO", "USUÁRIO", "USER", "SENHA", "PASS", "PIN", "DNS", "URL"]):
-                if app_detectado not in buffer_parcerias: buffer_parcerias[app_detectado] = []
-                buffer_parcerias[app_detectado].append(f"[{nome_exibicao}] {l}\n")
-        
-        if buffer_parcerias:
-            with lock_arquivo:
-                for app_nome, conteudos in buffer_parcerias.items():
-                    with open(os.path.join(PASTA_PARCERIAS, f"{app_nome}.txt"), 'a', encoding='utf-8') as f:
-                        f.writelines(conteudos)
+        return None
 
-    except Exception: pass
+REGEX_EXPIRES_AT = re.compile(rb'"expiresAt"\s*:\s*"([^"]*)"')
 
-def verificar_validade_pelo_json(caminho_arquivo):
-    if not os.path.exists(caminho_arquivo): return False, "Inexistente"
+def interpretar_expires_at(expires_at):
+    """Converte o expiresAt do painel em timestamp. None se vazio/inválido."""
+    if not expires_at: return None
+    for formato in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+        try: return datetime.strptime(expires_at, formato).timestamp()
+        except: pass
+    return None
+
+def registrar_validade(nome_arq, conteudo):
+    """Extrai o expiresAt direto dos bytes da resposta e grava no índice"""
+    match = REGEX_EXPIRES_AT.search(conteudo)
+    expires_at = match.group(1).decode('utf-8', 'ignore') if match else None
+    indice_fontes.atualizar(
+        nome_arq,
+        expira=interpretar_expires_at(expires_at),
+        tem_validade=bool(expires_at),
+        atualizado_em=time.time()
+    )
+
+def migrar_para_indice(nome_arq, caminho_arquivo):
+    """Arquivo antigo ainda sem registro no índice: lê o JSON uma única vez"""
     try:
         with open(caminho_arquivo, 'r', encoding='utf-8', errors='ignore') as f:
             dados = json.load(f)
-        expires_at = dados.get("expiresAt")
-        if not expires_at: return False, "Sem validade"
-        
-        try: dt = datetime.strptime(expires_at, "%Y-%m-%d %H:%M:%S")
-        except: 
-            try: dt = datetime.strptime(expires_at, "%Y-%m-%dT%H:%M:%S")
-            except: return False, "Data Inválida"
-
-        if (dt - datetime.now()).total_seconds() > 60: return True, "Válido"
-        return False, "Vencido"
-    except: return False, "Erro JSON"
+        expires_at = dados.get("expiresAt") if isinstance(dados, dict) else None
+    except: return False
+    indice_fontes.atualizar(
+        nome_arq,
+        expira=interpretar_expires_at(expires_at),
+        tem_validade=bool(expires_at),
+        atualizado_em=os.path.getmtime(caminho_arquivo)
+    )
+    return True
 
-def processar_fonte(item, progress_task_id, progress_obj):
+def verificar_validade_pelo_json(caminho_arquivo):
+    """Mesmas regras de antes, mas consultando o índice em vez de parsear o JSON"""
+    if not os.path.exists(caminho_arquivo): return False, "Inexistente"
+    nome_arq = os.path.basename(caminho_arquivo)
+    registro = indice_fontes.get(nome_arq)
+    if registro is None:
+        if not migrar_para_indice(nome_arq, caminho_arquivo): return False, "Erro JSON"
+        registro = indice_fontes.get(nome_arq)
+
+    if not registro.get("tem_validade"): return False, "Sem validade"
+    expira = registro.get("expira")
+    if expira is None: return False, "Data Inválida"
+
+    if expira - time.time() > 60: return True, "Válido"
+    return False, "Vencido"
+
+def registrar_no_diario(nome, status, nome_arq=None):
+    status_rodada[nome] = status
+    if diario is None: return
+    registro = indice_fontes.get(nome_arq) if nome_arq else None
+    diario.registrar(nome=nome, status=status, hash=(registro or {}).get("hash"))
+
+async def processar_fonte(pool, sem_global, item, progress_task_id, progress_obj, forcar=False):
     nome = item.get('nome', 'Sem Nome')
     url = item.get('api_url')
     
     if not url: 
-        progress_obj.advance(progress_task_id)
-        return
+        with lock_stats: stats["concluidos"] += 1
+        if progress_obj: progress_obj.advance(progress_task_id)
+        if MODO_HEADLESS: emitir_json({"tipo": "fonte", "nome": nome, "status": "sem_url", "concluidos": stats["concluidos"], "total": stats["total"]})
+        registrar_no_diario(nome, "sem_url")
+        return False
 
     update_ui_status(nome, "[yellow]Verificando Cache...[/]")
+    inicio = time.perf_counter()
     
-    nome_arq = f"{limpar_nome_arquivo(nome)}.json"
+    nome_arq = nome_arquivo_fonte(nome)
     caminho_json = os.path.join(PASTA_JSON_RAW, nome_arq)
 
-    esta_valido, msg_validade = verificar_validade_pelo_json(caminho_json)
+    if forcar: esta_valido, msg_validade = False, "Renovação agendada"
+    else: esta_valido, msg_validade = verificar_validade_pelo_json(caminho_json)
     
     sucesso_leitura = False
+    conteudo = None  # Bytes da resposta, quando vier da API nesta rodada
     
     if esta_valido:
         update_ui_status(nome, "[green]Cache OK[/]")
-        time.sleep(0.3)
+        if not MODO_HEADLESS: await asyncio.sleep(0.3)
         with lock_stats: stats["cacheados"] += 1
         sucesso_leitura = True
+        resultado, msg = "cache", msg_validade
     else:
-        update_ui_status(nome, "[cyan]Baixando...[/]")
-        status, msg = baixar_json_blindado(url, caminho_json)
+        update_ui_status(nome, "[dim]Na fila do host...[/]")
+        # Primeiro a vaga do host, depois a global: quem espera um painel
+        # lotado não segura vaga que outro host poderia usar.
+        async with semaforos_host[extrair_host(url)]:
+            async with sem_global:
+                update_ui_status(nome, "[cyan]Baixando...[/]")
+                status, msg, conteudo = await baixar_json_blindado(pool, url, caminho_json)
         
-        if status:
+        if status and msg.startswith("INALTERADO"):
+            update_ui_status(nome, "[green]Sem mudanças[/]")
+            with lock_stats: stats["inalterados"] += 1
+            sucesso_leitura = True
+            resultado = "inalterado"
+        elif status:
             update_ui_status(nome, "[bold green]Atualizado![/]")
             with lock_stats: stats["atualizados"] += 1
             sucesso_leitura = True
+            resultado = "atualizado"
         else:
             update_ui_status(nome, f"[bold red]Falha: {msg}[/]")
             registrar_erro_log(nome, url, msg)
             with lock_stats: stats["erros"] += 1
-            time.sleep(1)
+            resultado = "erro"
+            if not MODO_HEADLESS: await asyncio.sleep(1)
 
     if sucesso_leitura and os.path.exists(caminho_json):
         update_ui_status(nome, "[magenta]Minerando...[/]")
-        try:
-            with open(caminho_json, 'r', encoding='utf-8', errors='ignore') as f:
-                extrair_parcerias_e_downloads(f.read(), nome)
-        except: pass
+        mineracao = minerar_fonte(nome, nome_arq, caminho_json, conteudo)
+        if mineracao: gravar_apks(nome, mineracao["apks"])
 
+    registrar_no_diario(nome, resultado, nome_arq)
+    registro.evento("mineracao", fonte=nome, status=resultado, msg=msg,
+                    duracao=round(time.perf_counter() - inicio, 4))
     update_ui_status(nome, None)
     with lock_stats: stats["concluidos"] += 1
-    progress_obj.advance(progress_task_id)
+    if progress_obj: progress_obj.advance(progress_task_id)
+    if MODO_HEADLESS:
+        emitir_json({
+            "tipo": "fonte", "nome": nome, "status": resultado, "msg": msg,
+            "duracao": round(time.perf_counter() - inicio, 4),
+            "concluidos": stats["concluidos"], "total": stats["total"]
+        })
+    return sucesso_leitura
 
 # --- FUNÇÃO GERADORA DA INTERFACE ---
 def gerar_dashboard(overall_progress):
+    from rich import box
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.table import Table
+
     # 1. Tabela de Estatísticas
     tabela_stats = Table(box=box.SIMPLE_HEAVY, expand=True)
     tabela_stats.add_column("Total", justify="center", style="cyan")
     tabela_stats.add_column("Atualizados", justify="center", style="green")
     tabela_stats.add_column("Cache", justify="center", style="blue")
+    tabela_stats.add_column("Sem Mudanças", justify="center", style="dim green")
     tabela_stats.add_column("Falhas", justify="center", style="red")
+    tabela_stats.add_column("Viagens Poupadas", justify="center", style="magenta")
     
     tabela_stats.add_row(
         str(stats["total"]),
         str(stats["atualizados"]),
         str(stats["cacheados"]),
-        str(stats["erros"])
+        str(stats["inalterados"]),
+        str(stats["erros"]),
+        str(stats["viagens_economizadas"])
     )
 
     # 2. Tabela de Threads Ativas
@@ -255,29 +530,249 @@ def gerar_dashboard(overall_progress):
         Panel(overall_progress, title="Progresso Geral", border_style="green")
     )
 
+async def redesenhar_dashboard(live, overall_progress):
+    """Só redesenha quando algum evento avisou que o estado mudou"""
+    while True:
+        await evento_ui.wait()
+        evento_ui.clear()
+        live.update(gerar_dashboard(overall_progress), refresh=True)
+        await asyncio.sleep(INTERVALO_MIN_REDESENHO)
+
+async def minerar_fontes(fontes, task_id=None, overall_progress=None, live=None):
+    global evento_ui
+    evento_ui = asyncio.Event()
+    sem_global = asyncio.Semaphore(MAX_CONEXOES)
+    async with PoolSessoesAsync(max_por_host=MAX_POR_HOST) as pool:
+        tarefa_ui = asyncio.create_task(redesenhar_dashboard(live, overall_progress)) if live else None
+        tarefa_checkpoint = asyncio.create_task(checkpoint_periodico())
+        await asyncio.gather(*(
+            processar_fonte(pool, sem_global, item, task_id, overall_progress)
+            for item in fontes
+        ))
+        tarefa_checkpoint.cancel()
+        if tarefa_ui: tarefa_ui.cancel()
+
+async def checkpoint_periodico():
+    """Grava o índice de tempos em tempos: a retomada reaproveita o que já foi minerado"""
+    while True:
+        await asyncio.sleep(INTERVALO_CHECKPOINT)
+        await salvar_estado_async()
+
+# --- MODO AGENDADOR (DAEMON) ---
+def fechar_gravacao():
+    """Descarrega e encerra as threads de gravação (toda saída do main passa aqui)"""
+    gravador.fechar()
+    registro.fechar()
+
+def salvar_estado(metodos=None):
+    indice_fontes.salvar()
+    mineracoes.salvar()
+    salvar_json_atomico(ARQUIVO_CACHE_METODOS, cache_metodos if metodos is None else metodos, indent=4)
+
+async def salvar_estado_async():
+    """salvar_estado numa thread: serializar os índices não trava o loop (o cache de métodos vai em cópia)"""
+    await asyncio.to_thread(salvar_estado, dict(cache_metodos))
+
+def migrar_mineracao_do_indice():
+    """Índice de antes do ARQUIVO_MINERACAO: leva o resultado da mineração para o arquivo próprio"""
+    for nome_arq in indice_fontes.nomes():
+        registro = indice_fontes.get(nome_arq) or {}
+        if "mineracao" not in registro: continue
+        if registro.get("hash_minerado") and mineracoes.get(nome_arq) is None:
+            mineracoes.atualizar(nome_arq, hash=registro["hash_minerado"], mineracao=registro["mineracao"])
+        indice_fontes.remover(nome_arq)
+        indice_fontes.atualizar(nome_arq, **{k: v for k, v in registro.items() if k not in ("mineracao", "hash_minerado")})
+
+def proxima_renovacao(item, falhou=False):
+    """Quando a fonte deve ser renovada, olhando só o índice (sem abrir JSON)"""
+    agora = time.time()
+    if falhou: return agora + INTERVALO_APOS_FALHA
+
+    nome_arq = nome_arquivo_fonte(item.get('nome', 'Sem Nome'))
+    registro = indice_fontes.get(nome_arq)
+    if registro is None:
+        caminho_json = os.path.join(PASTA_JSON_RAW, nome_arq)
+        if not os.path.exists(caminho_json) or not migrar_para_indice(nome_arq, caminho_json):
+            return agora
+        registro = indice_fontes.get(nome_arq)
+
+    ultima = registro.get("atualizado_em", 0)
+    if registro.get("expira") is None:
+        quando = ultima + INTERVALO_SEM_VALIDADE
+    else:
+        quando = registro["expira"] - ANTECEDENCIA_RENOVACAO
+    # Painel que devolve credencial já vencida não pode virar loop de renovação
+    return max(quando, ultima + INTERVALO_MINIMO)
+
+async def executar_agendador(fontes, console):
+    """
+    Min-heap de (próxima_renovação, fonte). Dorme até a próxima fonte vencer,
+    renova e reagenda pelo novo expiresAt. Roda até Ctrl+C.
+    """
+    sem_global = asyncio.Semaphore(MAX_CONEXOES)
+    fila = []
+    desempate = itertools.count()
+    fila_mudou = asyncio.Event()
+    parcerias_pendentes = asyncio.Event()
+    em_andamento = set()
+
+    def agendar(item, quando):
+        heapq.heappush(fila, (quando, next(desempate), item))
+        fila_mudou.set()
+
+    async def renovar(pool, item):
+        try:
+            sucesso = await processar_fonte(pool, sem_global, item, None, None, forcar=True)
+            if sucesso: parcerias_pendentes.set()
+            await salvar_estado_async()
+            quando = proxima_renovacao(item, falhou=not sucesso)
+        except Exception as e:
+            # Nenhuma fonte pode sair da fila por causa de um erro inesperado
+            sucesso = False
+            quando = proxima_renovacao(item, falhou=True)
+            registrar_erro_log(item.get('nome'), item.get('api_url'), f"Agendador: {str(e)[:100]}")
+        if MODO_HEADLESS:
+            emitir_json({"tipo": "agendamento", "nome": item.get('nome'), "sucesso": sucesso, "proxima": round(quando)})
+        else:
+            icone = "✅" if sucesso else "❌"
+            console.print(f"[{datetime.now():%H:%M:%S}] {icone} {item.get('nome')} -> próxima: {datetime.fromtimestamp(quando):%d/%m %H:%M}")
+        agendar(item, quando)
+
+    async def reconstruir_parcerias_pendentes():
+        """Parcerias/ regerada numa thread, no máximo uma vez a cada ESPERA_PARCERIAS (o loop segue livre)"""
+        try:
+            while True:
+                await parcerias_pendentes.wait()
+                await asyncio.sleep(ESPERA_PARCERIAS)
+                parcerias_pendentes.clear()
+                try: await asyncio.to_thread(reconstruir_parcerias, fontes)
+                except Exception as e: registrar_erro_log("Parcerias", "-", f"Reconstrução: {str(e)[:100]}")
+        except asyncio.CancelledError:
+            # Saindo (Ctrl+C) com renovação ainda não refletida em Parcerias/
+            if parcerias_pendentes.is_set(): reconstruir_parcerias(fontes)
+            raise
+
+    for item in fontes:
+        if item.get('api_url'): agendar(item, proxima_renovacao(item))
+
+    if not MODO_HEADLESS:
+        console.print(f"[bold cyan]⏰ Agendador ativo com {len(fila)} fontes. Ctrl+C para sair.[/]")
+
+    async with PoolSessoesAsync(max_por_host=MAX_POR_HOST) as pool:
+        tarefa_parcerias = asyncio.create_task(reconstruir_parcerias_pendentes())
+        while fila or em_andamento:
+            agora = time.time()
+            while fila and fila[0][0] <= agora:
+                _, _, item = heapq.heappop(fila)
+                tarefa = asyncio.create_task(renovar(pool, item))
+                em_andamento.add(tarefa)
+                tarefa.add_done_callback(em_andamento.discard)
+
+            fila_mudou.clear()
+            espera = (fila[0][0] - time.time()) if fila else None
+            try: await asyncio.wait_for(fila_mudou.wait(), timeout=espera)
+            except asyncio.TimeoutError: pass
+        tarefa_parcerias.cancel()
+
+def executar_rodada(fontes, pendentes, task_id=None, overall_progress=None, live=None):
+    """
+    Processa as pendentes e, no fim, regera Parcerias/ com todas as fontes que
+    têm JSON no disco (inclusive as concluídas antes de uma interrupção).
+    Ctrl+C grava o estado e deixa o diário aberto para a próxima execução retomar.
+    """
+    try:
+        asyncio.run(minerar_fontes(pendentes, task_id, overall_progress, live))
+    except KeyboardInterrupt:
+        salvar_estado()
+        fechar_gravacao()
+        return False
+
+    reconstruir_parcerias(fontes)
+    salvar_estado()
+    fechar_gravacao()
+    diario.fechar(**{k: stats[k] for k in ("atualizados", "inalterados", "cacheados", "erros")})
+    return True
+
 def main():
+    parser = argparse.ArgumentParser(description="Minerador de fontes Sigma (Dados-Brutos + Parcerias)")
+    parser.add_argument("--agendador", action="store_true",
+                        help="Fica rodando e renova cada fonte pouco antes do expiresAt")
+    parser.add_argument("--headless", action="store_true",
+                        help="Sem interface Rich: progresso e resumo em JSON lines no stdout (cron/CI)")
+    parser.add_argument("--do-zero", action="store_true",
+                        help="Ignora a rodada interrompida no diário e processa todas as fontes")
+    args = parser.parse_args()
+
+    global indice_fontes, mineracoes, diario, gravador, registro, MODO_HEADLESS
+    MODO_HEADLESS = args.headless
+    if not MODO_HEADLESS:
+        exigir("rich")
+        from rich.console import Console
+
     # Setup Pastas
     for p in [PASTA_JSON_RAW, PASTA_PARCERIAS, PASTA_TXTS]:
         os.makedirs(p, exist_ok=True)
 
-    # Limpeza
-    if os.path.exists(ARQUIVO_LOG_ERROS):
-        try: os.remove(ARQUIVO_LOG_ERROS)
-        except: pass
-    
-    for f in os.listdir(PASTA_PARCERIAS):
-        try: os.remove(os.path.join(PASTA_PARCERIAS, f))
-        except: pass
-
     if not os.path.exists(ARQUIVO_FONTES):
-        print(f"❌ '{ARQUIVO_FONTES}' não encontrado.")
+        if MODO_HEADLESS: emitir_json({"tipo": "erro", "msg": f"'{ARQUIVO_FONTES}' não encontrado"})
+        else: print(f"❌ '{ARQUIVO_FONTES}' não encontrado.")
         return
 
     with open(ARQUIVO_FONTES, 'r', encoding='utf-8') as f:
         fontes = json.load(f)
     
-    stats["total"] = len(fontes)
+    cache_metodos.update(carregar_json(ARQUIVO_CACHE_METODOS, {}))
+    migrar_links_apks()
+    indice_fontes = IndiceFontes(ARQUIVO_INDICE_FONTES)
+    mineracoes = IndiceFontes(ARQUIVO_MINERACAO)
+    migrar_mineracao_do_indice()
+    gravador = GravadorDeduplicado()
+    registro = RegistroEventos(ARQUIVO_EVENTOS)
+
+    if args.agendador:
+        stats["total"] = len(fontes)
+        console = None if MODO_HEADLESS else Console()
+        try: asyncio.run(executar_agendador(fontes, console))
+        except KeyboardInterrupt:
+            if console: console.print("\n[yellow]⏹️ Agendador interrompido.[/]")
+        finally:
+            salvar_estado()
+            fechar_gravacao()
+        return
+
+    # --- DIÁRIO / RETOMADA ---
+    diario = DiarioExecucao(ARQUIVO_DIARIO)
+    interrompida = None if args.do_zero else diario.ler_rodada_interrompida()
+    if interrompida:
+        status_rodada.update({r["nome"]: r["status"] for r in interrompida if "nome" in r})
+        pendentes = [item for item in fontes if item.get('nome', 'Sem Nome') not in status_rodada]
+        if MODO_HEADLESS: emitir_json({"tipo": "retomada", "ja_concluidas": len(status_rodada), "pendentes": len(pendentes)})
+        else: print(f"⏯️ Retomando rodada interrompida: {len(status_rodada)} fontes já concluídas, {len(pendentes)} pendentes.")
+    else:
+        pendentes = fontes
+        # Rodada nova: o log de erros começa limpo (Parcerias não; são regeradas no fim)
+        if os.path.exists(ARQUIVO_LOG_ERROS):
+            try: os.remove(ARQUIVO_LOG_ERROS)
+            except: pass
+
+    diario.abrir(retomando=bool(interrompida), fontes=len(fontes), pendentes=len(pendentes))
+    stats["total"] = len(pendentes)
+
+    if MODO_HEADLESS:
+        start_time = time.time()
+        if not executar_rodada(fontes, pendentes): return
+        emitir_json({
+            "tipo": "resumo",
+            "tempo": round(time.time() - start_time, 3),
+            **stats,
+            "recusadas_disjuntor": disjuntor.recusadas,
+            "apks_novos": gravador.gravadas, "apks_repetidos": gravador.repetidas
+        })
+        return
     
+    from rich.live import Live
+    from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn
+
     overall_progress = Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -286,31 +781,28 @@ def main():
         TimeRemainingColumn(),
         expand=True
     )
-    task_id = overall_progress.add_task("[green]Processando Fontes...", total=len(fontes))
+    task_id = overall_progress.add_task("[green]Processando Fontes...", total=len(pendentes))
 
     # --- EXECUÇÃO ---
     start_time = time.time()
     
-    with Live(gerar_dashboard(overall_progress), refresh_per_second=10) as live:
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = []
-            for item in fontes:
-                futures.append(executor.submit(processar_fonte, item, task_id, overall_progress))
-            
-            while stats["concluidos"] < stats["total"]:
-                live.update(gerar_dashboard(overall_progress))
-                time.sleep(0.1)
-                
-            for f in as_completed(futures):
-                pass
-            
-            live.update(gerar_dashboard(overall_progress))
+    # auto_refresh=False: quem dispara o redesenho são os eventos, não um timer
+    with Live(gerar_dashboard(overall_progress), auto_refresh=False) as live:
+        concluiu = executar_rodada(fontes, pendentes, task_id, overall_progress, live)
+        live.update(gerar_dashboard(overall_progress), refresh=True)
+    if not concluiu:
+        print("\n⏹️ Rodada interrompida. Rode de novo para continuar de onde parou.")
+        return
 
     tempo_total = time.time() - start_time
     
     print("\n")
     console = Console()
     console.print(f"[bold green]✅ FIM DA MINERAÇÃO em {tempo_total:.2f} segundos.[/]")
+    console.print(f"♻️ Respostas idênticas às do disco (não regravadas): [bold]{stats['inalterados']}[/]")
+    console.print(f"🔁 Round trips poupados pelo cache de método: [bold]{stats['viagens_economizadas']}[/] | Reprovas: {stats['reprovas']}")
+    console.print(f"🚦 Bloqueios recebidos: {stats['bloqueios']} | Requisições barradas pelo disjuntor: {disjuntor.recusadas}")
+    console.print(f"🧹 Links de APK novos: {gravador.gravadas} | repetidos descartados: {gravador.repetidas}")
     console.print(f"📂 Resultados salvos em: [bold]{PASTA_PARCERIAS}[/]")
 
 if __name__ == "__main__":
@@ -3,6 +3,9 @@ from rich.console import Console
 from rich.table import Table
 from rich import box
 
+from sigma_core.armazem import listas_com_dados
+from sigma_core.listas import abrir_lista, tamanho_lista
+
 # --- CONFIGURAÇÃO ---
 PASTA_ALVO = 'Listas-Downloaded'
 # --------------------
@@ -12,11 +15,11 @@ console = Console()
 def analisar_conteudo(caminho):
     """Lê o início do arquivo para descobrir o que ele é"""
     try:
-        tamanho = os.path.getsize(caminho)
+        tamanho = tamanho_lista(caminho)  # Descomprimido, se for .gz/.zst
         if tamanho == 0:
             return "[red]Vazio (0kb)[/]", "❌"
 
-        with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+        with abrir_lista(caminho) as f:
             inicio = f.read(200).strip() # Lê os primeiros 200 caracteres
         
         # Análise de Assinatura
@@ -37,6 +40,21 @@ def analisar_conteudo(caminho):
     except Exception as e:
         return f"[red]Erro leitura[/]", "❌"
 
+def analisar_indexado(entrada):
+    """Mesmo diagnóstico, a partir da análise feita durante o download (não abre o arquivo)"""
+    formato, qtd = entrada.get("formato"), entrada["entradas"]
+    if formato == "html":
+        return "[red]HTML (Site/Bloqueio/Erro 403)[/]", "❌"
+    if formato == "json":
+        return "[red]JSON (Erro de API/Token)[/]", "❌"
+    if not qtd:
+        return "[red]Sem canais (0 #EXTINF)[/]", "❌"
+    if entrada.get("truncada"):
+        return f"[yellow]M3U Truncada ({qtd} canais)[/]", "⚠️"
+    if entrada["tamanho"] < 1024:
+        return "[yellow]M3U Curto (Poucos canais)[/]", "⚠️"
+    return f"[bold green]M3U Válido ({qtd} canais)[/]", "✅"
+
 def formatar_tamanho(tamanho):
     for unidade in ['B', 'KB', 'MB', 'GB']:
         if tamanho < 1024.0:
@@ -49,7 +67,7 @@ def main():
         console.print(f"[red]Pasta '{PASTA_ALVO}' não encontrada![/]")
         return
 
-    arquivos = [f for f in os.listdir(PASTA_ALVO) if f.endswith('.m3u')]
+    arquivos = listas_com_dados(PASTA_ALVO)  # (nome, caminho, entrada): armazém + arquivos soltos
     if not arquivos:
         console.print("[yellow]Nenhum arquivo .m3u encontrado.[/]")
         return
@@ -64,11 +82,14 @@ def main():
     validos = 0
     invalidos = 0
 
-    arquivos.sort() # Ordena alfabeticamente
+    arquivos.sort(key=lambda x: x[0]) # Ordena alfabeticamente
 
-    for arq in arquivos:
-        caminho = os.path.join(PASTA_ALVO, arq)
-        tipo, status = analisar_conteudo(caminho)
+    for arq, caminho, entrada in arquivos:
+        # Listas do armazém já vêm analisadas; só arquivos soltos (IDM) são abertos
+        if entrada and "entradas" in entrada:
+            tipo, status = analisar_indexado(entrada)
+        else:
+            tipo, status = analisar_conteudo(caminho)
         tamanho_fmt = formatar_tamanho(os.path.getsize(caminho))
         
         if status == "✅":
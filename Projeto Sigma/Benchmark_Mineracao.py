@@ -0,0 +1,144 @@
+"""
+Benchmark do minerador (Atualizar_Links_M3U.py) contra o Simulador_API_Sigma.
+
+Para cada tamanho roda o minerador em --headless numa pasta temporária com um
+fontes.json sintético e mede:
+  - requisições/s que chegaram no simulador
+  - latência p50/p99 por requisição (cache_metodos.json do próprio minerador)
+  - duração p50/p99 por fonte (fila + download + mineração)
+  - pico de memória (RSS) do processo do minerador
+
+Uso:
+    python Benchmark_Mineracao.py                      # 100, 1000 e 10000 fontes
+    python Benchmark_Mineracao.py --tamanhos 100 500 --latencia 120 --taxa-erro 0.05
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from Simulador_API_Sigma import ConfigSimulador, SimuladorSigma, PORTA_INICIAL
+from sigma_core.persistencia import carregar_json, salvar_json_atomico
+
+# --- CONFIGURAÇÕES ---
+PASTA_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_MINERADOR = os.path.join(PASTA_SCRIPT, "Atualizar_Links_M3U.py")
+TAMANHOS_PADRAO = [100, 1000, 10000]
+HOSTS_SIMULADOS = 50
+ARQUIVO_RESULTADO = os.path.join("TXTs", "benchmark_mineracao.json")
+
+
+def percentil(valores, p):
+    if not valores: return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def rss_pico_mb(uso):
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    if sys.platform == "darwin": return uso.ru_maxrss / (1024 * 1024)
+    return uso.ru_maxrss / 1024
+
+
+def rodar_minerador(pasta):
+    """Roda o minerador com cwd na pasta temporária. Devolve (linhas JSON, rss_mb ou None)."""
+    processo = subprocess.Popen(
+        [sys.executable, SCRIPT_MINERADOR, "--headless"],
+        cwd=pasta, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding="utf-8"
+    )
+    linhas = []
+    for linha in processo.stdout:
+        try: linhas.append(json.loads(linha))
+        except ValueError: pass
+
+    rss = None
+    if hasattr(os, "wait4"):
+        # wait4 devolve o uso de recursos só deste filho (RUSAGE_CHILDREN acumularia as rodadas)
+        _, _, uso = os.wait4(processo.pid, 0)
+        processo.returncode = 0
+        rss = rss_pico_mb(uso)
+    else:
+        processo.wait()  # Windows: sem rusage, RSS fica em branco
+    return linhas, rss
+
+
+def medir(simulador, quantidade):
+    pasta = tempfile.mkdtemp(prefix="sigma_bench_")
+    try:
+        with open(os.path.join(pasta, "fontes.json"), "w", encoding="utf-8") as f:
+            json.dump(simulador.gerar_fontes(quantidade), f)
+
+        simulador.estatisticas.zerar()
+        inicio = time.perf_counter()
+        linhas, rss = rodar_minerador(pasta)
+        tempo = time.perf_counter() - inicio
+        contagem = simulador.estatisticas.resumo()
+
+        metodos = carregar_json(os.path.join(pasta, "TXTs", "cache_metodos.json"), {})
+        latencias = [m["latencia"] * 1000 for m in metodos.values() if "latencia" in m]
+        duracoes = [l["duracao"] * 1000 for l in linhas if l.get("tipo") == "fonte" and "duracao" in l]
+        resumo = next((l for l in linhas if l.get("tipo") == "resumo"), {})
+
+        return {
+            "fontes": quantidade,
+            "tempo_s": round(tempo, 2),
+            "requisicoes": contagem["requisicoes"],
+            "req_por_s": round(contagem["requisicoes"] / tempo, 1) if tempo else None,
+            "fontes_por_s": round(quantidade / tempo, 1) if tempo else None,
+            "latencia_p50_ms": percentil(latencias, 50),
+            "latencia_p99_ms": percentil(latencias, 99),
+            "duracao_p50_ms": percentil(duracoes, 50),
+            "duracao_p99_ms": percentil(duracoes, 99),
+            "rss_pico_mb": round(rss, 1) if rss is not None else None,
+            "atualizados": resumo.get("atualizados"),
+            "erros": resumo.get("erros"),
+            "por_status": contagem["por_status"],
+        }
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def formatar(valor, casas=1):
+    if valor is None: return "-"
+    return f"{valor:.{casas}f}" if isinstance(valor, float) else str(valor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do minerador contra o simulador local")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Quantidades de fontes")
+    parser.add_argument("--hosts", type=int, default=HOSTS_SIMULADOS, help="Painéis simulados (um por porta)")
+    parser.add_argument("--porta", type=int, default=PORTA_INICIAL)
+    parser.add_argument("--latencia", type=float, default=50, help="Latência média do simulador em ms")
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--taxa-bloqueio", type=float, default=0.0)
+    parser.add_argument("--taxa-html", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = ConfigSimulador(latencia_ms=args.latencia, taxa_erro=args.taxa_erro,
+                             taxa_bloqueio=args.taxa_bloqueio, taxa_html=args.taxa_html)
+    resultados = []
+
+    print(f"🧪 Benchmark do minerador | {args.hosts} painéis simulados | latência ~{args.latencia:.0f} ms")
+    with SimuladorSigma(args.porta, args.hosts, config) as simulador:
+        for quantidade in args.tamanhos:
+            print(f"⏳ {quantidade} fontes...", flush=True)
+            resultados.append(medir(simulador, quantidade))
+
+    print(f"\n{'Fontes':>7} {'Tempo(s)':>9} {'Req/s':>8} {'Lat p50':>8} {'Lat p99':>8} {'Dur p50':>8} {'Dur p99':>8} {'RSS(MB)':>8} {'Erros':>6}")
+    for r in resultados:
+        print(f"{r['fontes']:>7} {formatar(r['tempo_s'], 2):>9} {formatar(r['req_por_s']):>8} "
+              f"{formatar(r['latencia_p50_ms']):>8} {formatar(r['latencia_p99_ms']):>8} "
+              f"{formatar(r['duracao_p50_ms']):>8} {formatar(r['duracao_p99_ms']):>8} "
+              f"{formatar(r['rss_pico_mb']):>8} {formatar(r['erros']):>6}")
+
+    salvar_json_atomico(ARQUIVO_RESULTADO, {"data": time.strftime("%Y-%m-%d %H:%M:%S"), "resultados": resultados}, indent=4)
+    print(f"\n📂 Resultados salvos em: {ARQUIVO_RESULTADO}")
+
+
+if __name__ == "__main__":
+    main()
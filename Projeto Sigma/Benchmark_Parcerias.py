@@ -0,0 +1,95 @@
+"""
+Micro-benchmark da detecção de parcerias sobre o corpus de Dados-Brutos.
+
+Compara o laço antigo (chave por chave + any() das credenciais, linha a
+linha) com o ClassificadorParcerias do sigma_core, confere que os dois dão
+exatamente o mesmo resultado e mostra linhas/s de cada um. Mede os dois
+modos: primeiro app da linha (minerador) e todos os apps (downloader).
+
+Uso:
+    python Benchmark_Parcerias.py
+    python Benchmark_Parcerias.py --pasta Dados-Brutos --repeticoes 10
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+from sigma_core.parcerias import APPS_PARCERIA, PALAVRAS_CREDENCIAL, CLASSIFICADOR
+
+PASTA_JSON_RAW = "Dados-Brutos"
+REPETICOES = 5
+
+
+def carregar_blocos(pasta):
+    """
+    Blocos de linhas como os scripts os veem: o texto cru quebrado em '\\n'
+    (minerador) e o json.dumps quebrado no '\\\\n' escapado (downloader).
+    """
+    blocos = []
+    for caminho in glob.glob(os.path.join(pasta, "*.json")):
+        with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+            texto = f.read()
+        try:
+            texto_dump = json.dumps(json.loads(texto))
+        except ValueError:
+            texto_dump = texto
+        for bloco in (texto.split('\n'), texto_dump.split('\\n')):
+            blocos.append([l for l in (linha.strip() for linha in bloco) if l and len(l) <= 300])
+    return blocos
+
+
+def laco_antigo(linhas, todos=False):
+    """Cópia fiel do que os scripts faziam antes, no formato {índice: app(s)}"""
+    resultado = {}
+    for indice, l in enumerate(linhas):
+        l_upper = l.upper()
+        apps = []
+        for k, v in APPS_PARCERIA.items():
+            if k in l_upper:
+                apps.append(v)
+                if not todos: break
+        if apps and any(x in l_upper for x in PALAVRAS_CREDENCIAL):
+            resultado[indice] = list(dict.fromkeys(apps)) if todos else apps[0]
+    return resultado
+
+
+def cronometrar(funcao, blocos, repeticoes, todos):
+    """Melhor tempo entre as repetições (menos ruído do SO)"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for bloco in blocos: funcao(bloco, todos=todos)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da detecção de parcerias")
+    parser.add_argument("--pasta", default=PASTA_JSON_RAW)
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    args = parser.parse_args()
+
+    blocos = carregar_blocos(args.pasta)
+    total_linhas = sum(len(b) for b in blocos)
+    if not total_linhas:
+        print(f"❌ Nenhuma linha encontrada em '{args.pasta}'.")
+        return
+
+    print(f"📄 Corpus: {total_linhas} linhas em {len(blocos)} blocos de '{args.pasta}'")
+    for todos, rotulo in ((False, "primeiro app (minerador)"), (True, "todos os apps (downloader)")):
+        for bloco in blocos:
+            if laco_antigo(bloco, todos) != CLASSIFICADOR.classificar_linhas(bloco, todos=todos):
+                print(f"❌ Resultado diferente em {rotulo}. Exemplo: {bloco[:3]}")
+                return
+
+        tempo_antigo = cronometrar(laco_antigo, blocos, args.repeticoes, todos)
+        tempo_novo = cronometrar(CLASSIFICADOR.classificar_linhas, blocos, args.repeticoes, todos)
+        print(f"\n🔎 {rotulo}: resultados idênticos")
+        print(f"   🐢 Laço antigo:   {total_linhas / tempo_antigo:>12,.0f} linhas/s")
+        print(f"   🚀 Classificador: {total_linhas / tempo_novo:>12,.0f} linhas/s  ({tempo_antigo / tempo_novo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
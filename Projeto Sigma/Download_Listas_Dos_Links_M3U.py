@@ -1,99 +1,121 @@
+import hashlib
+import heapq
 import json
 import os
-import re
 import queue
-import sys
 import time
-import msvcrt
-import shutil
 import warnings
 import glob
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-# --- IMPORTAÇÕES (Motor Novo) ---
 try:
-    from tqdm import tqdm
-    from curl_cffi import requests as cffi_requests
+    import msvcrt  # Tecla Z para parar (só existe no Windows)
 except ImportError:
-    print("❌ ERRO: Bibliotecas faltando.")
-    print("Execute no terminal: pip install tqdm curl_cffi --user")
-    sys.exit()
+    msvcrt = None
+
+# --- IMPORTAÇÕES (Motor Novo) ---
+# tqdm e curl_cffi só são conferidos aqui; carregam de fato no primeiro uso
+from sigma_core.dependencias import exigir
+exigir("tqdm", "curl_cffi")
+
+from sigma_core.caminhos import (PASTA_JSON_RAW, PASTA_DESTINO, PASTA_PARCERIAS, PASTA_TXTS,
+                                 PASTA_PARCIAIS, ARQUIVO_LINKS_APKS, ARQUIVO_INDICE_FONTES)
+from sigma_core.agendamento import HistoricoDownloads, makespan_previsto, ordenar_lpt
+from sigma_core.conexoes import PoolSessoes
+from sigma_core.controle_fluxo import LimitadorHost, DisjuntorHost, ConcorrenciaAdaptativa
+from sigma_core.extracao import REGEX_URL_ENTRE_ASPAS, extrair_m3u_do_json
+from sigma_core.falhas import DiarioFalhas, classificar_falha, eh_transitoria
+from sigma_core.indice import IndiceFontes
+from sigma_core.armazem import ArmazemListas, listas_soltas_por_fonte, nome_exibicao
+from sigma_core.listas import BLOCO_COPIA, compressao_disponivel
+from sigma_core.m3u import EstatisticasM3U, lista_valida
+from sigma_core.parciais import DownloadParcial, limpar_parciais_antigos
+from sigma_core.persistencia import carregar_json, salvar_json_atomico
+from sigma_core.parcerias import APPS_PARCERIA, ClassificadorParcerias
+from sigma_core.gravador import GravadorDeduplicado
+from sigma_core.registro import RegistroEventos
+from sigma_core.segmentado import DownloadSegmentado, aceita_segmentos, planejar_faixas, quantos_segmentos, validador_resposta
+from sigma_core.voo_unico import VooUnico, normalizar_url
 
 warnings.filterwarnings("ignore")
 
 # --- CONFIGURAÇÕES ---
-PASTA_JSON_RAW = "Dados-Brutos"
-PASTA_DESTINO = "Listas-Downloaded"
-PASTA_PARCERIAS = "Parcerias"
-PASTA_TXTS = "TXTs" # <--- NOVA PASTA
-
-# Arquivos organizados
 ARQUIVO_ERROS = os.path.join(PASTA_TXTS, "erros_download.txt")
-ARQUIVO_FALHAS_JSON = os.path.join(PASTA_TXTS, "falhas_download.json")
-ARQUIVO_LINKS_APKS = os.path.join(PASTA_TXTS, "Links_APKs.txt")
-
-MAX_SIMULTANEOS = 5      
+ARQUIVO_FALHAS = os.path.join(PASTA_TXTS, "falhas_download.jsonl")
+ARQUIVO_EVENTOS = os.path.join(PASTA_TXTS, "eventos_download.jsonl")
+ARQUIVO_CACHE_EXTRACAO = os.path.join(PASTA_TXTS, "cache_extracao_json.json")
+ARQUIVO_MARCA_EXTRACAO = os.path.join(PASTA_PARCERIAS, ".extracao_downloader")  # Some junto com Parcerias/
+ARQUIVO_VALIDADORES = os.path.join(PASTA_TXTS, "validadores_listas.json")
+ARQUIVO_HISTORICO = os.path.join(PASTA_TXTS, "historico_downloads.json")
+
+MAX_SIMULTANEOS = 20          # Teto de downloads simultâneos (o limite real se ajusta pela vazão)
+MIN_SIMULTANEOS = 2
+INICIAL_SIMULTANEOS = 5
+MAX_POR_SERVIDOR = 3          # Conexões no mesmo painel (1 por credencial, cai para 1 se o painel falhar)
 CACHE_VALIDADE = 43200   
+SEGMENTOS_POR_LISTA = 4       # Conexões Range paralelas numa lista grande (1 = uma conexão só; substitui o antigo script Via_IDM)
+COMPRESSAO_LISTAS = None      # None (texto puro), "gzip" ou "zstd": as listas são lidas por sigma_core.listas.abrir_lista
 TIMEOUT_CONEXAO = 15     
+TAXA_INICIAL_SERVIDOR = 1.0   # downloads iniciados/s por servidor (AIMD ajusta)
+VALIDADE_PARCIAL = 3 * 86400  # parcial parado há mais que isso é apagado
+FALHAS_PARA_ABRIR = 3         # falhas seguidas até isolar o servidor
+TEMPO_DISJUNTOR = 300         # segundos até tentar o servidor de novo
+MAX_TENTATIVAS = 3            # falha transitória (timeout, 5xx...) volta para a fila até isso
+ESPERA_RETENTATIVA = 10       # segundos antes da 2ª tentativa; dobra a cada nova
+PULAR_FALHAS_PERMANENTES = True  # 404/DNS/sem canais: só tenta de novo quando o JSON da fonte mudar
+ORDENAR_POR_HISTORICO = True  # Fontes mais demoradas (pelas rodadas anteriores) começam primeiro
 
 PARAR_EXECUCAO = False
 
-APPS_PARCERIA = {
-    # --- APLICATIVOS FAMOSOS (TV BOX/ANDROID) ---
-    "ASSIST": "Assist_Plus_Play_Sim", 
-    "PLAY SIM": "Assist_Plus_Play_Sim",
-    "LAZER": "Lazer_Play", 
-    "VIZZION": "Vizzion", 
-    "UNITV": "UniTV",
-    "UNI TV": "UniTV",
-    "XCLOUD": "XCloud_TV", 
-    "P2P": "Codigos_P2P_Geral", 
-    "SMARTERS": "IPTV_Smarters_DNS",
-    "XCIPTV": "XCIPTV_Dados",
-    "SSIPTV": "SSIPTV_Playlist",
-    "NETRANGE": "NetRange",
-    "CLOUDDY": "Clouddy_App",
-    "IBO": "IBO_Player",
-    "DUPLEX": "Duplex_Play",
-    
-    # --- SERVIÇOS PREMIUM ---
-    "EAGLE": "Eagle_TV", 
-    "FLASH": "Flash_P2P",
-    "TVE": "TV_Express", 
-    "TV EXPRESS": "TV_Express",
-    "MY FAMILY": "MyFamily_Cinema", 
-    "MFC": "MyFamily_Cinema",
-    "REDPLAY": "RedPlay",
-    "BTV": "BTV_Codes", 
-    "HTV": "HTV_Codes",
-    "YOUCINE": "YouCine",
-    "BLUE": "Blue_TV",
-    
-    # --- SERVIDORES ESPECÍFICOS (Que apareceram nos JSONs) ---
-    "UCAST": "UCast_App",
-    "ALPHA": "Alpha_Master_App",
-    "WAVE": "Wave_App",
-    "TITÃ": "Tita_App",
-    "ATENA": "Atena_App",
-    "ANDRÔMEDA": "Andromeda_App",
-    "SOLAR": "Solar_App",
-    "FIRE": "Fire_App",
-    "LUNAR": "Lunar_App",
-    "GALAXY": "Galaxy_App",
-    "OLYMPUS": "Olympus_App",
-    "SPEED": "Speed_App",
-    "SEVEN": "Seven_App",
-    "SKY": "Sky_Alternative_App",
-    "HADES": "Hades_App",
-    "VÊNUS": "Venus_App",
-    "URANO": "Urano_App",
-    "K9": "K9_Play",
-    "CINEMAX": "Cinemax_App",
-    "GREEN": "Green_TV",
-    "GTA": "GTA_Player"
-}
+# Sessões keep-alive compartilhadas entre os workers (uma por servidor)
+POOL_SESSOES = PoolSessoes(max_por_host=MAX_POR_SERVIDOR)
+
+# Taxa adaptativa + disjuntor por servidor (evita repetir timeouts de 15s)
+LIMITADOR = LimitadorHost(taxa_inicial=TAXA_INICIAL_SERVIDOR)
+DISJUNTOR = DisjuntorHost(limite_falhas=FALHAS_PARA_ABRIR, tempo_aberto=TEMPO_DISJUNTOR)
+
+# Quantos downloads rodam juntos: cresce com a vazão, encolhe com timeouts/erros
+CONCORRENCIA = ConcorrenciaAdaptativa(inicial=INICIAL_SIMULTANEOS, minimo=MIN_SIMULTANEOS,
+                                      maximo=MAX_SIMULTANEOS, max_por_servidor=MAX_POR_SERVIDOR)
+
+# Hash da resposta (índice do minerador) -> link M3U já extraído dela.
+# JSON que não mudou desde a última rodada nem é aberto de novo.
+INDICE_FONTES = None
+CACHE_EXTRACAO = {}
+LOCK_CACHE_EXTRACAO = threading.Lock()
+
+# URL da lista -> ETag/Last-Modified da última resposta completa (GET condicional)
+VALIDADORES_LISTAS = {}
+LOCK_VALIDADORES = threading.Lock()
+MSG_INALTERADO = "Inalterada (HTTP 304)"
+MSG_MESMO_CONTEUDO = "Baixada, mas igual à atual (mesmo hash)"
+
+# Várias fontes apontando para a mesma lista: um download só por rodada
+VOO_UNICO = VooUnico()
+
+# Listas guardadas por hash + manifesto por fonte (atual/anterior)
+ARMAZEM = ArmazemListas(PASTA_DESTINO)
+# Arquivos soltos por fonte, de uma varredura só no início da rodada
+LISTAS_SOLTAS = {}
+
+# Falhas em JSON lines: uma linha acrescentada por falha, compactado uma vez por rodada
+DIARIO_FALHAS = DiarioFalhas(ARQUIVO_FALHAS)
+
+# Tempo/tamanho de cada fonte nas rodadas anteriores: define a ordem dos downloads
+HISTORICO = HistoricoDownloads(ARQUIVO_HISTORICO)
+
+# erros_download.txt + eventos por lista: thread registradora, fsync por lote (não por linha)
+# Parcerias/ e Links_APKs: uma thread gravadora, um handle por arquivo, sem repetidas
+# As duas threads nascem no main() (importar o módulo não dispara nada) e são fechadas lá
+REGISTRO = None
+GRAVADOR = None
+
+# Mesmo dicionário do minerador, com as palavras de credencial do downloader
+CLASSIFICADOR_PARCERIAS = ClassificadorParcerias(APPS_PARCERIA, ['USER', 'PASS', 'SENHA', 'CODIGO', 'LOGIN'])
 
 def limpar_lixo_tmp():
     files = glob.glob(os.path.join(PASTA_DESTINO, "*.tmp"))
@@ -103,106 +125,44 @@ def limpar_lixo_tmp():
                 try: os.remove(f)
                 except: pass
         except: pass
+    # Parciais recentes ficam: são retomados com Range
+    limpar_parciais_antigos(PASTA_PARCIAIS, VALIDADE_PARCIAL)
 
 def checar_tecla_z():
     global PARAR_EXECUCAO
-    if msvcrt.kbhit():
+    if msvcrt and msvcrt.kbhit():
         if msvcrt.getch().decode('utf-8').lower() == 'z':
             PARAR_EXECUCAO = True
 
-def limpar_url(url):
-    if not url: return None
-    try: url = url.encode().decode('unicode_escape')
-    except: pass
-
-    for lixo in ['\\n', '\n', '\r', '\t', ' ']:
-        url = url.replace(lixo, '')
-
-    match = re.search(r'(https?://[a-zA-Z0-9\.\-_:/?=&%@]+)', url)
-    if match:
-        url_limpa = match.group(1)
-        if 'output=mpegts' in url_limpa:
-            return url_limpa.split('output=mpegts')[0] + 'output=mpegts'
-        if '.m3u8' in url_limpa:
-            return url_limpa.split('.m3u8')[0] + '.m3u8'
-        if '.m3u' in url_limpa:
-            return url_limpa.split('.m3u')[0] + '.m3u'
-        return url_limpa
-    return None
-
-def salvar_falhas_json(novas_falhas):
-    if not novas_falhas: return
-    falhas_existentes = []
-    
-    if os.path.exists(ARQUIVO_FALHAS_JSON):
-        try:
-            with open(ARQUIVO_FALHAS_JSON, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if content:
-                    falhas_existentes = json.loads(content)
-        except: falhas_existentes = []
-
-    mapa_falhas = {item['url']: item for item in falhas_existentes}
-    for falha in novas_falhas: mapa_falhas[falha['url']] = falha
-    
-    lista_final = list(mapa_falhas.values())
-    
+def versao_fonte(nome_arquivo_json):
+    """Hash do JSON da fonte (índice do minerador) ou, sem ele, tamanho+mtime do arquivo"""
+    caminho = os.path.join(PASTA_JSON_RAW, nome_arquivo_json)
+    hash_atual = INDICE_FONTES.hash_confirmado(nome_arquivo_json, caminho) if INDICE_FONTES else None
+    if hash_atual:
+        return hash_atual
     try:
-        os.makedirs(PASTA_TXTS, exist_ok=True)
-        with open(ARQUIVO_FALHAS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(lista_final, f, indent=4, ensure_ascii=False)
-            f.flush()
-            os.fsync(f.fileno())
-    except: pass
+        st = os.stat(caminho)
+        return f"{st.st_size}:{st.st_mtime_ns}"
+    except OSError:
+        return None
+
+def custo_previsto(nome_base, estimar):
+    """Segundos esperados para a fonte nesta rodada: zero se a lista ainda vale pelo cache,
+    senão o tempo histórico, inflado pelas retentativas que a taxa de falha sugere."""
+    entrada, _ = ARMAZEM.atual(nome_base)
+    if entrada and lista_valida(entrada) and time.time() - entrada.get("verificado_em", 0) < CACHE_VALIDADE:
+        return 0.0
+    return estimar(nome_base) * (1 + HISTORICO.taxa_falha(nome_base) * (MAX_TENTATIVAS - 1))
 
 def salvar_linha_unica(caminho_arquivo, nova_linha):
-    try:
-        os.makedirs(os.path.dirname(caminho_arquivo), exist_ok=True)
-        with open(caminho_arquivo, 'a', encoding='utf-8') as f:
-            f.write(f"{nova_linha.strip()}\n")
-    except: pass
-
-def extrair_m3u_do_json(caminho_arquivo):
-    try:
-        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-            conteudo = json.load(f)
-        
-        url_encontrada = None
-        if isinstance(conteudo, dict):
-            chaves = ['link_m3u', 'url', 'link', 'endereco', 'source', 'm3u']
-            for k in chaves:
-                if k in conteudo:
-                    limpo = limpar_url(conteudo[k])
-                    if limpo: 
-                        url_encontrada = limpo
-                        break
-            texto = json.dumps(conteudo)
-        elif isinstance(conteudo, list):
-            if conteudo and isinstance(conteudo[0], str) and conteudo[0].startswith('http'):
-                url_encontrada = limpar_url(conteudo[0])
-            texto = json.dumps(conteudo)
-        else:
-            return None, conteudo
-
-        if not url_encontrada:
-            urls = re.findall(r'(https?://[^"\'\s\\]+)', texto)
-            for url in urls:
-                u_lower = url.lower()
-                if ('.m3u' in u_lower or 'get.php' in u_lower or 'mpegts' in u_lower):
-                    if 'aftv.news' not in u_lower:
-                        limpo = limpar_url(url)
-                        if limpo:
-                            url_encontrada = limpo
-                            break
-        return url_encontrada, conteudo
-    except:
-        return None, None
+    """Enfileira no gravador: linha já presente no arquivo não é escrita de novo"""
+    GRAVADOR.gravar(caminho_arquivo, nova_linha)
 
 def extrair_infos_extras(dados_json, nome_base):
     if not dados_json: return
     texto = json.dumps(dados_json)
     
-    urls = re.findall(r'(https?://[^"\'\s]+)', texto)
+    urls = REGEX_URL_ENTRE_ASPAS.findall(texto)
     apks = [u for u in urls if any(x in u.lower() for x in ['.apk', 'aftv', 'downloader'])]
     if apks:
         for apk in set(apks): 
@@ -210,123 +170,348 @@ def extrair_infos_extras(dados_json, nome_base):
 
     linhas = texto.split('\\n') 
     if len(linhas) < 2: linhas = texto.split('\n')
-    for linha in linhas:
-        l = linha.strip()
-        if len(l) > 300: continue
-        for key, nome_arquivo in APPS_PARCERIA.items():
-            if key.upper() in l.upper():
-                if any(x in l.upper() for x in ['USER', 'PASS', 'SENHA', 'CODIGO', 'LOGIN']):
-                    caminho_txt = os.path.join(PASTA_PARCERIAS, f"{nome_arquivo}.txt")
-                    salvar_linha_unica(caminho_txt, f"[{nome_base}] {l}")
+    candidatas = [l for l in (linha.strip() for linha in linhas) if len(l) <= 300]
+    for indice, apps in CLASSIFICADOR_PARCERIAS.classificar_linhas(candidatas, todos=True).items():
+        for nome_arquivo in apps:
+            caminho_txt = os.path.join(PASTA_PARCERIAS, f"{nome_arquivo}.txt")
+            salvar_linha_unica(caminho_txt, f"[{nome_base}] {candidatas[indice]}")
+
+def extrair_com_cache(nome_arquivo_json, caminho_json, nome_base):
+    """
+    Se o minerador marcou a resposta com o mesmo hash da última extração, usa o
+    link guardado e pula APKs/parcerias (já foram gravados naquela vez e o
+    minerador preserva as linhas do downloader; se Parcerias/ for apagada, o
+    main descarta o cache e tudo é extraído de novo).
+    """
+    hash_atual = INDICE_FONTES.hash_confirmado(nome_arquivo_json, caminho_json) if INDICE_FONTES else None
+    with LOCK_CACHE_EXTRACAO:
+        anterior = CACHE_EXTRACAO.get(nome_arquivo_json)
+    if hash_atual and anterior and anterior.get("hash") == hash_atual:
+        return anterior.get("url_m3u")
+
+    url_m3u, dados_brutos = extrair_m3u_do_json(caminho_json)
+    extrair_infos_extras(dados_brutos, nome_base)
+    if hash_atual:
+        with LOCK_CACHE_EXTRACAO:
+            CACHE_EXTRACAO[nome_arquivo_json] = {"hash": hash_atual, "url_m3u": url_m3u}
+    return url_m3u
+
+def cabecalhos_condicionais(url, entrada_antiga):
+    """
+    If-None-Match/If-Modified-Since da última lista baixada desta URL, só se a
+    lista em vigor da fonte for exatamente aquela (mesmo hash). Sem isso, uma
+    fonte que passou a apontar para a URL de outra ganharia um 304 e ficaria
+    com a lista antiga, de conteúdo diferente, como se fosse a atual.
+    """
+    if not entrada_antiga:
+        return {}
+    with LOCK_VALIDADORES:
+        validadores = VALIDADORES_LISTAS.get(url) or {}
+    if "hash" in validadores:
+        confere = validadores["hash"] == entrada_antiga.get("hash")
+    else:
+        confere = entrada_antiga.get("url") == url  # Validadores de antes do hash
+    if not confere:
+        return {}
+    cabecalhos = {}
+    if validadores.get("etag"): cabecalhos["If-None-Match"] = validadores["etag"]
+    if validadores.get("last_modified"): cabecalhos["If-Modified-Since"] = validadores["last_modified"]
+    return cabecalhos
+
+def registrar_validadores(url, headers, digest):
+    """Validadores da resposta + hash da lista que eles descrevem"""
+    validadores = {"etag": headers.get('etag'), "last_modified": headers.get('last-modified')}
+    with LOCK_VALIDADORES:
+        if validadores["etag"] or validadores["last_modified"]:
+            VALIDADORES_LISTAS[url] = {**validadores, "hash": digest}
+        else:
+            VALIDADORES_LISTAS.pop(url, None)
 
-def gerenciar_cache_inteligente(nome_base):
-    padrao = os.path.join(PASTA_DESTINO, f"{glob.escape(nome_base)}_[*.m3u")
-    arquivos_existentes = glob.glob(padrao)
-    
-    arquivo_antigo = None
-    cache_valido = False
+def servidor_ok(url):
+    DISJUNTOR.sucesso(url)
+    CONCORRENCIA.sucesso(url)
 
-    if arquivos_existentes:
-        arquivo_antigo = max(arquivos_existentes, key=os.path.getmtime)
+def servidor_falhou(url):
+    DISJUNTOR.falha(url)
+    CONCORRENCIA.falha(url)
+
+def gerenciar_cache_inteligente(nome_base):
+    """
+    (cache_valido, entrada no armazém, caminho do blob) da lista atual da fonte.
+    Arquivos soltos da fonte (IDM / antes do armazém): o mais novo é adotado e o resto apagado.
+    """
+    entrada, caminho = ARMAZEM.atual(nome_base)
+    if entrada is None:
+        soltos = [a for a in LISTAS_SOLTAS.get(nome_base, []) if os.path.exists(a)]
+        if soltos:
+            mais_novo = max(soltos, key=os.path.getmtime)
+            for arquivo in soltos:
+                if arquivo != mais_novo:
+                    try: os.remove(arquivo)
+                    except: pass
+            try:
+                ARMAZEM.adotar(nome_base, mais_novo)
+                entrada, caminho = ARMAZEM.atual(nome_base)
+            except OSError: pass
+
+    if entrada is None:
+        return False, None, None
+    idade = time.time() - entrada.get("verificado_em", 0)
+    return lista_valida(entrada) and idade < CACHE_VALIDADE, entrada, caminho
+
+def baixar_arquivo(url, desc_barra, posicao, nome_base, entrada_antiga=None):
+    """
+    Baixa (ou continua baixando) a lista e guarda no armazém como a atual da
+    fonte. O parcial fica em PASTA_PARCIAIS com os validadores da resposta; se o
+    servidor recusar o Range, tenta uma vez do zero. Com `entrada_antiga` (lista
+    em vigor da fonte) o pedido pode ser condicional (304 -> MSG_INALTERADO).
+    Hash e estatísticas da lista saem dos próprios chunks do download.
+    Devolve (sucesso, msg, entrada do armazém ou None).
+    """
+    parcial = DownloadParcial(PASTA_PARCIAIS, nome_base)
+    stats, sha1 = EstatisticasM3U(), hashlib.sha1()
+    sucesso, msg = _baixar_com_retomada(url, desc_barra, posicao, parcial, entrada_antiga, stats, sha1)
+    if sucesso is None:
+        stats, sha1 = EstatisticasM3U(), hashlib.sha1()
+        sucesso, msg = _baixar_com_retomada(url, desc_barra, posicao, parcial, entrada_antiga, stats, sha1)
+    if not sucesso:
+        return False, msg, None
+    if msg == MSG_INALTERADO:
+        entrada = ARMAZEM.renovar(nome_base)
+        if entrada is None:  # Manifesto sumiu entre o pedido e o 304: nada para renovar
+            return False, f"{msg}, mas sem lista guardada", None
+        return True, msg, entrada
+
+    entrada, mudou = ARMAZEM.guardar(nome_base, parcial.caminho, url, COMPRESSAO_LISTAS,
+                                     digest=sha1.hexdigest(), estatisticas=stats.finalizar())
+    parcial.descartar()  # Só sobrou o .json de validadores
+    return True, ("OK" if mudou else MSG_MESMO_CONTEUDO), entrada
+
+def _alimentar_do_disco(caminho, quantidade, stats, sha1):
+    """Passa os primeiros `quantidade` bytes já gravados por `stats` e `sha1`."""
+    with open(caminho, 'rb') as arquivo:
+        restante = quantidade
+        while restante > 0:
+            bloco = arquivo.read(min(BLOCO_COPIA, restante))
+            if not bloco: break
+            stats.alimentar(bloco)
+            sha1.update(bloco)
+            restante -= len(bloco)
+
+def reservar_conexoes_extras(url, response, total_size):
+    """Quantas conexões a mais esta lista ganha (0 = uma conexão só). Cada uma casa com CONCORRENCIA.sair."""
+    if SEGMENTOS_POR_LISTA < 2 or not aceita_segmentos(response.status_code, response.headers):
+        return 0
+    extras = 0
+    while extras < quantos_segmentos(total_size, SEGMENTOS_POR_LISTA) - 1 and CONCORRENCIA.entrar_extra(url):
+        extras += 1
+    return extras
+
+@contextmanager
+def _abrir_faixa(url, validador, inicio, fim):
+    LIMITADOR.aguardar(url)
+    with POOL_SESSOES.sessao(url) as local_session:
+        resposta = local_session.get(url, headers={"Range": f"bytes={inicio}-{fim}", "If-Range": validador},
+                                     stream=True, timeout=TIMEOUT_CONEXAO, allow_redirects=True)
         try:
-            if os.path.getsize(arquivo_antigo) > 2048:
-                idade = time.time() - os.path.getmtime(arquivo_antigo)
-                if idade < CACHE_VALIDADE:
-                    cache_valido = True
-        except: pass
-            
-    return cache_valido, arquivo_antigo
+            yield resposta
+        finally:
+            resposta.close()
+
+def _baixar_segmentado(url, response, primeiro_chunk, parcial, total_size, extras, bar):
+    """A resposta aberta vira a 1ª faixa; as outras `extras` saem em paralelo. Devolve bytes contínuos gravados."""
+    validador = validador_resposta(response.headers)
+
+    def ao_receber(quantidade):
+        CONCORRENCIA.registrar_bytes(quantidade)
+        bar.update(quantidade)
+
+    segmentado = DownloadSegmentado(
+        parcial.caminho, total_size, planejar_faixas(total_size, extras + 1),
+        lambda inicio, fim: _abrir_faixa(url, validador, inicio, fim),
+        ao_receber=ao_receber, parar=lambda: PARAR_EXECUCAO)
+    try:
+        return segmentado.executar(primeiro_chunk, response.iter_content(chunk_size=64*1024))
+    finally:
+        for _ in range(extras):
+            CONCORRENCIA.sair(url)
 
-def baixar_arquivo(url, caminho_destino, desc_barra, posicao):
-    caminho_temp = caminho_destino + ".tmp"
-    
-    if os.path.exists(caminho_temp): 
-        try: os.remove(caminho_temp)
-        except: pass
+def _baixar_com_retomada(url, desc_barra, posicao, parcial, entrada_antiga, stats, sha1):
+    """(True/False, msg) ou (None, msg) quando o parcial não servia e vale recomeçar já.
+    No sucesso o .part completo fica no lugar para baixar_arquivo guardar.
+    Cada chunk gravado também passa por `stats` (EstatisticasM3U) e `sha1`."""
+    from tqdm import tqdm
 
-    local_session = cffi_requests.Session()
-    
-    try:
-        response = local_session.get(
-            url, 
-            impersonate="chrome120", 
-            stream=True, 
-            timeout=TIMEOUT_CONEXAO, 
-            allow_redirects=True
-        )
-        
-        if response.status_code != 200:
-            local_session.close()
-            return False, f"Erro HTTP {response.status_code}"
+    if not DISJUNTOR.permitir(url):
+        return False, "Disjuntor aberto: servidor falhando em sequência"
 
-        total_size = int(response.headers.get('content-length', 0))
-        
-        if total_size > 500 * 1024 * 1024:
-            local_session.close()
-            return False, "Arquivo muito grande (+500MB - Provável Vídeo)"
+    response = None
+    concluido = False
+    reportado = False  # Todo caminho avisa disjuntor/concorrência (sonda do meio-aberto inclusa)
 
-        tamanho_baixado = 0
+    def ok():
+        nonlocal reportado
+        reportado = True
+        servidor_ok(url)
 
-        try:
-            iterator = response.iter_content(chunk_size=512)
-            primeiro_chunk = next(iterator)
-        except StopIteration:
-            local_session.close()
-            return False, "Arquivo vazio recebido"
-        except Exception as e:
-            local_session.close()
-            if "time" in str(e).lower() or "out" in str(e).lower():
-                return False, "TIMEOUT: Servidor não enviou dados"
-            return False, f"Erro Conexão Inicial: {str(e)[:50]}"
-
-        if b"<html" in primeiro_chunk.lower() or b"<!doctype" in primeiro_chunk.lower():
-             local_session.close()
-             return False, "Bloqueio (HTML Detectado)"
-        
-        if b"{" in primeiro_chunk and b"error" in primeiro_chunk.lower():
-             local_session.close()
-             return False, "Erro API (JSON Detectado)"
+    def falhou():
+        nonlocal reportado
+        reportado = True
+        servidor_falhou(url)
 
-        with tqdm(total=total_size, unit='B', unit_scale=True, desc=desc_barra, 
-                  position=posicao, leave=False, ncols=90, 
-                  bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt}") as bar:
+    LIMITADOR.aguardar(url)
+    CONCORRENCIA.entrar(url)
+    inicio = time.monotonic()  # Só a transferência: a espera por vaga não entra no histórico
+    
+    try:
+        with POOL_SESSOES.sessao(url) as local_session:
+            # Retomada tem prioridade; sem parcial, pergunta se a lista mudou
+            retomada = parcial.cabecalhos(url)
+            condicionais = {} if retomada else cabecalhos_condicionais(url, entrada_antiga)
+            response = local_session.get(
+                url, 
+                headers=retomada or condicionais,
+                stream=True, 
+                timeout=TIMEOUT_CONEXAO, 
+                allow_redirects=True
+            )
             
-            with open(caminho_temp, 'wb') as f:
-                f.write(primeiro_chunk)
-                bar.update(len(primeiro_chunk))
-                tamanho_baixado += len(primeiro_chunk)
-                
-                for chunk in response.iter_content(chunk_size=64*1024):
-                    if PARAR_EXECUCAO: break
-                    if chunk:
-                        f.write(chunk)
-                        tam_chunk = len(chunk)
-                        bar.update(tam_chunk)
-                        tamanho_baixado += tam_chunk
+            if response.status_code == 304 and condicionais:
+                # Lista igual à do disco: só renova a idade (CACHE_VALIDADE conta de novo)
+                ok()
+                LIMITADOR.sucesso(url)
+                return True, MSG_INALTERADO
+
+            if response.status_code == 416:
+                # Range fora do arquivo: o parcial não corresponde mais ao servidor
+                ok()
+                parcial.descartar()
+                return None, "Parcial recusado (HTTP 416)"
+
+            if response.status_code not in (200, 206):
+                if response.status_code in (403, 429):
+                    LIMITADOR.bloqueio(url)
+                if response.status_code in (403, 429) or response.status_code >= 500:
+                    falhou()
+                else:
+                    ok()
+                return False, f"Erro HTTP {response.status_code}"
+
+            if not parcial.aceitar(url, response.status_code, response.headers):
+                ok()
+                return None, "Parcial recusado (Content-Range incoerente)"
+
+            total_size = parcial.total
+            if not total_size and parcial.offset:
+                total_size = parcial.offset + int(response.headers.get('content-length', 0))
+            
+            if total_size > 500 * 1024 * 1024:
+                ok()
+                parcial.descartar()
+                return False, "Arquivo muito grande (+500MB - Provável Vídeo)"
+
+            tamanho_baixado = parcial.offset
+
+            try:
+                iterator = response.iter_content(chunk_size=512)
+                primeiro_chunk = next(iterator)
+            except StopIteration:
+                ok()
+                return False, "Arquivo vazio recebido"
+            except Exception as e:
+                falhou()
+                if "time" in str(e).lower() or "out" in str(e).lower():
+                    return False, "TIMEOUT: Servidor não enviou dados"
+                return False, f"Erro Conexão Inicial: {str(e)[:50]}"
+
+            # Bloqueio/erro só aparece no começo do corpo (não no meio de uma retomada)
+            if not parcial.offset:
+                if b"<html" in primeiro_chunk.lower() or b"<!doctype" in primeiro_chunk.lower():
+                     LIMITADOR.bloqueio(url)
+                     falhou()
+                     parcial.descartar()
+                     return False, "Bloqueio (HTML Detectado)"
+            
+            # Daqui pra frente o servidor respondeu de verdade
+            ok()
+
+            if not parcial.offset and b"{" in primeiro_chunk and b"error" in primeiro_chunk.lower():
+                 parcial.descartar()
+                 return False, "Erro API (JSON Detectado)"
+
+            LIMITADOR.sucesso(url)
+
+            if parcial.offset:
+                # Retomada: o começo da lista já está no disco, entra na análise antes
+                _alimentar_do_disco(parcial.caminho, parcial.offset, stats, sha1)
 
-                        if tamanho_baixado > 500 * 1024 * 1024:
-                            local_session.close()
-                            return False, "Abortado: Excedeu 500 MB"
+            # Lista grande num servidor com Range e folga de conexões: faixas em paralelo
+            extras = 0 if parcial.offset else reservar_conexoes_extras(url, response, total_size)
 
-        local_session.close()
+            with tqdm(total=total_size, initial=parcial.offset, unit='B', unit_scale=True, desc=desc_barra, 
+                      position=posicao, leave=False, ncols=90, 
+                      bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt}") as bar:
+                
+                if extras:
+                    tamanho_baixado = _baixar_segmentado(url, response, primeiro_chunk, parcial, total_size, extras, bar)
+                    # Faixas chegam fora de ordem: hash e análise numa leitura só do arquivo pronto
+                    _alimentar_do_disco(parcial.caminho, tamanho_baixado, stats, sha1)
+                else:
+                    with parcial.abrir() as f:
+                        f.write(primeiro_chunk)
+                        stats.alimentar(primeiro_chunk)
+                        sha1.update(primeiro_chunk)
+                        CONCORRENCIA.registrar_bytes(len(primeiro_chunk))
+                        bar.update(len(primeiro_chunk))
+                        tamanho_baixado += len(primeiro_chunk)
+
+                        for chunk in response.iter_content(chunk_size=64*1024):
+                            if PARAR_EXECUCAO: break
+                            if chunk:
+                                f.write(chunk)
+                                stats.alimentar(chunk)
+                                sha1.update(chunk)
+                                CONCORRENCIA.registrar_bytes(len(chunk))
+                                tam_chunk = len(chunk)
+                                bar.update(tam_chunk)
+                                tamanho_baixado += tam_chunk
+
+                                if tamanho_baixado > 500 * 1024 * 1024:
+                                    parcial.descartar()
+                                    return False, "Abortado: Excedeu 500 MB"
 
         if PARAR_EXECUCAO:
-            return False, "Interrompido pelo usuário"
+            return False, "Interrompido pelo usuário (parcial guardado)"
+
+        if parcial.total and tamanho_baixado < parcial.total:
+            return False, f"Incompleto: {tamanho_baixado}/{parcial.total} bytes (parcial guardado)"
 
-        if os.path.getsize(caminho_temp) < 100:
+        if parcial.tamanho_atual < 100:
+            parcial.descartar()
             return False, "Arquivo muito pequeno"
 
-        if os.path.exists(caminho_destino): 
-            try: os.remove(caminho_destino)
-            except: pass
-            
-        os.rename(caminho_temp, caminho_destino)
+        # Diagnóstico do conteúdo inteiro, já feito durante o download
+        resumo = stats.finalizar()
+        if resumo["formato"] == "html":
+            LIMITADOR.bloqueio(url)
+            parcial.descartar()
+            return False, "Bloqueio (HTML Detectado)"
+        if resumo["formato"] == "json":
+            parcial.descartar()
+            return False, "Erro API (JSON Detectado)"
+        if not resumo["entradas"]:
+            parcial.descartar()
+            return False, "Lista sem canais (nenhum #EXTINF)"
+
+        registrar_validadores(url, response.headers, sha1.hexdigest())
+        if not parcial.offset:
+            # Histórico só com lista inteira baixada: 304, erro, timeout e retomada distorcem a previsão
+            HISTORICO.registrar_transferencia(parcial.chave, time.monotonic() - inicio, tamanho_baixado)
+        concluido = True
         return True, "OK"
 
     except Exception as e:
-        try: local_session.close()
-        except: pass
-        
+        falhou()
         msg_erro = str(e).lower()
         if "could not resolve host" in msg_erro:
              return False, "DNS ERROR: Servidor não existe"
@@ -335,9 +520,18 @@ def baixar_arquivo(url, caminho_destino, desc_barra, posicao):
         return False, f"Erro: {str(e)[:60]}"
     
     finally:
-        if os.path.exists(caminho_temp):
-            try: os.remove(caminho_temp)
+        if not reportado:
+            # Saída sem desfecho explícito: respondeu = vivo; nem respondeu = falha
+            if response is not None: ok()
+            else: falhou()
+        CONCORRENCIA.sair(url)
+        # Fecha só a resposta: a sessão volta aquecida para o pool
+        if response is not None:
+            try: response.close()
             except: pass
+        # Parou no meio: o .part fica para a próxima rodada (se tiver validador)
+        if not concluido:
+            parcial.encerrar_incompleto()
                     
 def worker(nome_arquivo_json, fila_slots):
     global PARAR_EXECUCAO
@@ -350,45 +544,53 @@ def worker(nome_arquivo_json, fila_slots):
     try:
         checar_tecla_z()
         try:
-            url_m3u, dados_brutos = extrair_m3u_do_json(caminho_json)
-            extrair_infos_extras(dados_brutos, nome_base)
+            url_m3u = extrair_com_cache(nome_arquivo_json, caminho_json, nome_base)
         except Exception:
             fila_slots.put(slot)
             return "ERRO", nome_base, ("Erro Leitura JSON", "N/A")
 
-        cache_valido, arquivo_antigo = gerenciar_cache_inteligente(nome_base)
+        cache_valido, entrada_atual, _ = gerenciar_cache_inteligente(nome_base)
         
         if cache_valido:
             fila_slots.put(slot)
-            nome_exibicao = os.path.basename(arquivo_antigo)
-            return "CACHE", nome_exibicao, "Válido"
+            return "CACHE", nome_exibicao(nome_base, entrada_atual), "Válido"
 
         if not url_m3u:
             fila_slots.put(slot)
             return "IGNORADO", nome_base, "Link não encontrado"
 
-        timestamp = datetime.now().strftime("[%d-%m-%Y_%Hh%M]")
-        novo_nome_arquivo = f"{nome_base}_{timestamp}.m3u"
-        caminho_final = os.path.join(PASTA_DESTINO, novo_nome_arquivo)
-
         desc = f"Slot {slot} | {nome_base[:15]}"
-        sucesso, msg = baixar_arquivo(url_m3u, caminho_final, desc, slot)
-        
+        (sucesso, msg, entrada), baixou = VOO_UNICO.executar(
+            normalizar_url(url_m3u),
+            lambda: baixar_arquivo(url_m3u, desc, slot, nome_base, entrada_atual)
+        )
+        if sucesso and not baixou and entrada is None:
+            # O líder não deixou lista no armazém para apontar: baixa por conta própria
+            (sucesso, msg, entrada), baixou = baixar_arquivo(url_m3u, desc, slot, nome_base, entrada_atual), True
+
         fila_slots.put(slot)
 
-        if sucesso:
-            if arquivo_antigo and os.path.exists(arquivo_antigo):
-                try: os.remove(arquivo_antigo)
-                except: pass
-            return "SUCESSO", novo_nome_arquivo, url_m3u
-        else:
+        if not sucesso:
+            if not baixou: msg = f"{msg} (mesma URL de outra fonte)"
             return "ERRO", nome_base, (msg, url_m3u)
 
+        if not baixou:
+            # Outra fonte já baixou esta URL: só aponta o manifesto para o mesmo blob
+            entrada, _ = ARMAZEM.apontar(nome_base, entrada)
+            bytes_poupados = 0 if msg == MSG_INALTERADO else entrada["tamanho"]
+            return "COMPARTILHADO", nome_exibicao(nome_base, entrada), (url_m3u, bytes_poupados)
+
+        if msg == MSG_INALTERADO:
+            return "CACHE", nome_exibicao(nome_base, entrada), msg
+        return "SUCESSO", nome_exibicao(nome_base, entrada), url_m3u
+
     except Exception as e:
         fila_slots.put(slot)
         return "ERRO", nome_base, (f"CRASH WORKER: {str(e)}", "url_desconhecida")
 
 def main():
+    from tqdm import tqdm
+    global INDICE_FONTES, REGISTRO, GRAVADOR
     limpar_lixo_tmp()
 
     # Cria pasta TXTs e remove criação da pasta Downloads
@@ -399,7 +601,38 @@ def main():
         print("❌ Pasta Dados-Brutos não encontrada.")
         return
 
+    if not compressao_disponivel(COMPRESSAO_LISTAS):
+        print(f"❌ Compressão '{COMPRESSAO_LISTAS}' indisponível (zstd requer: pip install zstandard --user)")
+        return
+
     arquivos = [f for f in os.listdir(PASTA_JSON_RAW) if f.endswith('.json')]
+
+    INDICE_FONTES = IndiceFontes(ARQUIVO_INDICE_FONTES)
+    REGISTRO = RegistroEventos(ARQUIVO_EVENTOS, fsync=True)
+    GRAVADOR = GravadorDeduplicado()
+    # Sem a marca, Parcerias/ foi apagada depois da última extração: o cache
+    # pularia linhas que não estão mais lá, então esta rodada extrai tudo
+    if os.path.exists(ARQUIVO_MARCA_EXTRACAO):
+        CACHE_EXTRACAO.update(carregar_json(ARQUIVO_CACHE_EXTRACAO, {}))
+    else:
+        open(ARQUIVO_MARCA_EXTRACAO, 'w').close()
+    VALIDADORES_LISTAS.update(carregar_json(ARQUIVO_VALIDADORES, {}))
+    LISTAS_SOLTAS.update(listas_soltas_por_fonte(PASTA_DESTINO))
+    DIARIO_FALHAS.carregar()
+
+    versoes = {arq: versao_fonte(arq) for arq in arquivos}
+    suprimidas = set()
+    if PULAR_FALHAS_PERMANENTES:
+        suprimidas = {arq for arq in arquivos if DIARIO_FALHAS.suprimida(arq.replace('.json', ''), versoes[arq])}
+    a_baixar = [arq for arq in arquivos if arq not in suprimidas]
+
+    # LPT: as mais demoradas primeiro, para nenhuma lista gigante sobrar sozinha no fim
+    estimar = HISTORICO.estimador()
+    custos = {arq: custo_previsto(arq.replace('.json', ''), estimar) for arq in a_baixar}
+    if ORDENAR_POR_HISTORICO:
+        a_baixar = ordenar_lpt(a_baixar, custos)
+    simultaneos_plano = CONCORRENCIA.limite
+    previsto = makespan_previsto([custos[arq] for arq in a_baixar], simultaneos_plano)
     
     os.system('cls' if os.name == 'nt' else 'clear')
     print(f"============================================================")
@@ -411,53 +644,102 @@ def main():
     for i in range(1, MAX_SIMULTANEOS + 1): fila_slots.put(i)
 
     stats = defaultdict(int)
+    stats["SUPRIMIDO"] = len(suprimidas)
+    bytes_poupados = 0
+    agenda = []  # Retentativas: (quando, arquivo, nº da tentativa)
+    inicio_rodada = time.monotonic()
 
     with ThreadPoolExecutor(max_workers=MAX_SIMULTANEOS) as executor:
-        futures = [executor.submit(worker, arq, fila_slots) for arq in arquivos]
+        pendentes = {executor.submit(worker, arq, fila_slots): (arq, 1) for arq in a_baixar}
         
-        with tqdm(total=len(arquivos), unit="arq", position=0, leave=True, 
+        with tqdm(total=len(arquivos), initial=len(suprimidas), unit="arq", position=0, leave=True, 
                   bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}] {postfix}") as pbar:
             
-            for f in as_completed(futures):
-                try:
-                    status, nome, info = f.result()
-                except Exception as e:
-                    status, nome, info = "ERRO", "DESCONHECIDO", (f"FATAL ERROR: {e}", "N/A")
-
-                stats[status] += 1
-                agora = datetime.now().strftime("%H:%M:%S")
-                
-                if status == "ERRO":
-                    msg_erro, url_erro = info 
-                    
-                    tqdm.write(f"[{agora}] ❌ {nome} -> {msg_erro}")
-                    
+            while (pendentes or agenda) and not PARAR_EXECUCAO:
+                # Retentativas cuja espera já passou voltam para o pool
+                while agenda and agenda[0][0] <= time.monotonic():
+                    _, arq, tentativa = heapq.heappop(agenda)
+                    pendentes[executor.submit(worker, arq, fila_slots)] = (arq, tentativa)
+                espera = max(0.1, agenda[0][0] - time.monotonic()) if agenda else None
+                if not pendentes:
+                    time.sleep(espera)
+                    continue
+
+                prontos, _ = wait(pendentes, timeout=espera, return_when=FIRST_COMPLETED)
+                for f in prontos:
+                    arq, tentativa = pendentes.pop(f)
+                    nome_base = arq.replace('.json', '')
                     try:
-                        os.makedirs(PASTA_TXTS, exist_ok=True)
-                        with open(ARQUIVO_ERROS, 'a', encoding='utf-8') as log:
-                            log.write(f"[{agora}] {nome} | {msg_erro} | URL: {url_erro}\n")
-                            log.flush()
-                            os.fsync(log.fileno())
-                    except: pass
+                        status, nome, info = f.result()
+                    except Exception as e:
+                        status, nome, info = "ERRO", nome_base, (f"FATAL ERROR: {e}", "N/A")
 
-                    erro_obj = {
-                        "nome": nome,
-                        "url": url_erro,
-                        "erro": msg_erro,
-                        "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    salvar_falhas_json([erro_obj])
-                
-                pbar.set_postfix_str(f"✅{stats['SUCESSO']} ⏭️{stats['CACHE']} ❌{stats['ERRO']}")
-                pbar.update(1)
+                    agora = datetime.now().strftime("%H:%M:%S")
+                    
+                    if status in ("SUCESSO", "ERRO"):
+                        HISTORICO.registrar_resultado(nome_base, status == "SUCESSO")
+
+                    if status == "ERRO":
+                        msg_erro, url_erro = info 
+                        classe = classificar_falha(msg_erro)
+
+                        if eh_transitoria(classe) and tentativa < MAX_TENTATIVAS and not PARAR_EXECUCAO:
+                            # Timeout/5xx/queda: tenta de novo mais tarde, na mesma rodada
+                            atraso = ESPERA_RETENTATIVA * 2 ** (tentativa - 1)
+                            VOO_UNICO.esquecer(normalizar_url(url_erro))
+                            heapq.heappush(agenda, (time.monotonic() + atraso, arq, tentativa + 1))
+                            stats["RETENTATIVA"] += 1
+                            REGISTRO.evento("download", fonte=nome_base, status="retentativa", classe=classe,
+                                            erro=msg_erro, url=url_erro, tentativa=tentativa, espera=atraso)
+                            tqdm.write(f"[{agora}] 🔁 {nome} -> {msg_erro} (tentativa {tentativa + 1} em {atraso}s)")
+                            continue
+
+                        stats[status] += 1
+                        tqdm.write(f"[{agora}] ❌ {nome} -> {msg_erro}")
+                        REGISTRO.texto(ARQUIVO_ERROS, f"[{agora}] {nome} | {msg_erro} | URL: {url_erro}\n")
+                        REGISTRO.evento("download", fonte=nome_base, status="erro", classe=classe,
+                                        erro=msg_erro, url=url_erro, tentativa=tentativa)
+
+                        DIARIO_FALHAS.registrar(nome_base, url=url_erro, erro=msg_erro, classe=classe,
+                                                tentativas=tentativa, versao_fonte=versoes.get(arq),
+                                                data=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+                    else:
+                        stats[status] += 1
+                        REGISTRO.evento("download", fonte=nome_base, status=status.lower(), lista=nome, tentativa=tentativa)
+                        if status != "PARADO":
+                            DIARIO_FALHAS.resolver(nome_base)
+                        if status == "COMPARTILHADO":
+                            bytes_poupados += info[1]
+                    
+                    pbar.set_postfix_str(f"✅{stats['SUCESSO']} 🔗{stats['COMPARTILHADO']} ⏭️{stats['CACHE']} ❌{stats['ERRO']} 🔁{stats['RETENTATIVA']} ⚙️{CONCORRENCIA.limite}")
+                    pbar.update(1)
                 
-                if PARAR_EXECUCAO:
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    break
+            if PARAR_EXECUCAO:
+                executor.shutdown(wait=False, cancel_futures=True)
+    duracao_rodada = time.monotonic() - inicio_rodada
         
+    POOL_SESSOES.fechar()
+    GRAVADOR.fechar()
+    REGISTRO.fechar()
+    with LOCK_CACHE_EXTRACAO:
+        salvar_json_atomico(ARQUIVO_CACHE_EXTRACAO, {k: v for k, v in CACHE_EXTRACAO.items() if k in arquivos})
+    with LOCK_VALIDADORES:
+        salvar_json_atomico(ARQUIVO_VALIDADORES, VALIDADORES_LISTAS)
     limpar_lixo_tmp()
+    removidos, liberados = ARMAZEM.coletar_lixo()
+    ARMAZEM.salvar_indice()
+    HISTORICO.salvar()
     print("\n" * (MAX_SIMULTANEOS + 1))
     print(f"🏁 Concluído!")
+    print(f"🧹 Linhas novas em Parcerias/APKs: {GRAVADOR.gravadas} | repetidas descartadas: {GRAVADOR.repetidas}")
+    print(f"🔁 Retentativas: {stats['RETENTATIVA']} | ⛔ Puladas por falha permanente (fonte sem mudança): {stats['SUPRIMIDO']}")
+    print(f"🔗 Fontes servidas pelo download de outra (mesma URL): {stats['COMPARTILHADO']} | {bytes_poupados / (1024 * 1024):.1f} MB poupados")
+    vazao = f" | vazão máxima {CONCORRENCIA.vazao_pico / (1024 * 1024):.1f} MB/s" if CONCORRENCIA.vazao_pico else ""
+    print(f"⚙️ Downloads simultâneos: terminou em {CONCORRENCIA.limite} (pico {CONCORRENCIA.pico}){vazao}")
+    ordem = "mais demoradas primeiro" if ORDENAR_POR_HISTORICO else "ordem da pasta"
+    print(f"⏱️ Tempo total: previsto {previsto:.1f}s ({ordem}, {simultaneos_plano} simultâneos) | real {duracao_rodada:.1f}s")
+    print(f"🗃️ Armazém: {ARMAZEM.blobs_novos} listas novas | {ARMAZEM.blobs_reaproveitados} iguais a uma já guardada | "
+          f"{removidos} versões sem uso apagadas ({liberados / (1024 * 1024):.1f} MB)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,18 +1,37 @@
 import os
 
+from sigma_core.armazem import ArmazemListas, listas_com_dados
+from sigma_core.listas import eh_lista, tamanho_lista
+from sigma_core.m3u import lista_valida
+
 PASTA = 'Listas-Downloaded'
 
 removidos = 0
 if os.path.exists(PASTA):
+    armazem = ArmazemListas(PASTA)
+
+    # Listas do armazém: sai o ponteiro da fonte; o blob vai embora no coletar_lixo
+    for nome, caminho, entrada in listas_com_dados(PASTA):
+        if entrada is not None and not lista_valida(entrada):
+            if armazem.descartar(nome.rsplit("_[", 1)[0]):
+                print(f"🗑️ Removido lixo: {nome}")
+                removidos += 1
+
+    # Arquivos soltos na raiz (.blobs, .manifestos e .indice.json não entram)
     for f in os.listdir(PASTA):
         caminho = os.path.join(PASTA, f)
+        if f.startswith('.') or not os.path.isfile(caminho): continue
         try:
-            # Se for menor que 2KB (2048 bytes), é lixo/erro
-            if os.path.getsize(caminho) < 2048:
+            # Se for menor que 2KB (2048 bytes), é lixo/erro (listas .gz/.zst contam descomprimidas)
+            tamanho = tamanho_lista(caminho) if eh_lista(f) else os.path.getsize(caminho)
+            if tamanho < 2048:
                 os.remove(caminho)
                 print(f"🗑️ Removido lixo: {f}")
                 removidos += 1
         except:
             pass
 
-print(f"\n✅ Limpeza concluída! {removidos} arquivos inválidos removidos.")
\ No newline at end of file
+    armazem.coletar_lixo()
+    armazem.salvar_indice()
+
+print(f"\n✅ Limpeza concluída! {removidos} arquivos inválidos removidos.")
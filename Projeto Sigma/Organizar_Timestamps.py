@@ -2,6 +2,8 @@ import os
 import re
 import datetime
 
+from sigma_core.listas import eh_lista, extensao_lista
+
 # --- CONFIGURAÇÃO ---
 PASTA_ALVO = 'Listas-Downloaded'
 # Padrão para identificar se já tem data: _[DD-MM-YYYY_HHhMM]
@@ -20,7 +22,7 @@ def main():
         print(f"❌ Pasta '{PASTA_ALVO}' não encontrada.")
         return
 
-    arquivos = [f for f in os.listdir(PASTA_ALVO) if f.endswith('.m3u')]
+    arquivos = [f for f in os.listdir(PASTA_ALVO) if eh_lista(f)]
     
     print(f"📂 Analisando {len(arquivos)} arquivos em '{PASTA_ALVO}'...\n")
     
@@ -44,11 +46,12 @@ def main():
         try:
             # 2. Gera o novo nome com a data real do arquivo
             timestamp_str = obter_timestamp_arquivo(caminho_antigo)
-            nome_base = arquivo.replace('.m3u', '')
+            extensao = extensao_lista(arquivo)  # .m3u, .m3u.gz ou .m3u.zst
+            nome_base = arquivo[:-len(extensao)]
             
             # Remove qualquer timestamp antigo ou mal formatado se houver (opcional, mas bom pra limpeza)
             # Aqui vamos apenas adicionar ao final
-            novo_nome = f"{nome_base}_{timestamp_str}.m3u"
+            novo_nome = f"{nome_base}_{timestamp_str}{extensao}"
             caminho_novo = os.path.join(PASTA_ALVO, novo_nome)
 
             # 3. Renomeia
@@ -0,0 +1,239 @@
+"""
+Simulador local dos painéis Sigma (/api/chatbot/<id>/<id>).
+
+Serve respostas no mesmo formato de Dados-Brutos (dns, username, password,
+expiresAt, reply...) para medir o minerador sem bater nos painéis reais.
+Cada porta faz o papel de um painel diferente (host:porta distintos), assim
+os limites por host do minerador se comportam como em produção.
+
+Uso avulso:
+    python Simulador_API_Sigma.py --porta 8800 --hosts 10 --latencia 80 --taxa-erro 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# --- CONFIGURAÇÕES PADRÃO ---
+PORTA_INICIAL = 8800
+QTD_HOSTS = 10
+LATENCIA_MS = 50          # Latência média de cada resposta
+VARIACAO_MS = 20          # +/- aleatório em cima da média
+TAXA_ERRO = 0.0           # Fração de respostas HTTP 500
+TAXA_BLOQUEIO = 0.0       # Fração de respostas HTTP 429
+TAXA_HTML = 0.0           # Fração de páginas HTML de bloqueio (Cloudflare e afins)
+FRACAO_SO_GET = 0.3       # Fração das fontes que devolvem 405 para POST
+FRACAO_SO_POST = 0.1      # Fração das fontes que devolvem 405 para GET
+VALIDADE_HORAS = 4        # expiresAt = agora + isso
+
+PAGINA_BLOQUEIO = b"<!DOCTYPE html><html><head><title>Just a moment...</title></head><body>blocked</body></html>"
+
+
+class ConfigSimulador:
+    def __init__(self, latencia_ms=LATENCIA_MS, variacao_ms=VARIACAO_MS, taxa_erro=TAXA_ERRO,
+                 taxa_bloqueio=TAXA_BLOQUEIO, taxa_html=TAXA_HTML, fracao_so_get=FRACAO_SO_GET,
+                 fracao_so_post=FRACAO_SO_POST, validade_horas=VALIDADE_HORAS):
+        self.latencia_ms = latencia_ms
+        self.variacao_ms = variacao_ms
+        self.taxa_erro = taxa_erro
+        self.taxa_bloqueio = taxa_bloqueio
+        self.taxa_html = taxa_html
+        self.fracao_so_get = fracao_so_get
+        self.fracao_so_post = fracao_so_post
+        self.validade_horas = validade_horas
+
+
+class EstatisticasSimulador:
+    """Contadores compartilhados por todas as portas (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        with self._lock:
+            self.requisicoes = 0
+            self.por_status = {}
+            self.por_metodo = {}
+
+    def registrar(self, metodo, status):
+        with self._lock:
+            self.requisicoes += 1
+            self.por_status[status] = self.por_status.get(status, 0) + 1
+            self.por_metodo[metodo] = self.por_metodo.get(metodo, 0) + 1
+
+    def resumo(self):
+        with self._lock:
+            return {
+                "requisicoes": self.requisicoes,
+                "por_status": {str(k): v for k, v in self.por_status.items()},
+                "por_metodo": dict(self.por_metodo),
+            }
+
+
+def modo_da_fonte(caminho, config):
+    """GET-only / POST-only / ambos, fixo por fonte (o cache de métodos do minerador depende disso)."""
+    sorteio = (zlib.crc32(caminho.encode()) % 1000) / 1000
+    if sorteio < config.fracao_so_get: return "GET"
+    if sorteio < config.fracao_so_get + config.fracao_so_post: return "POST"
+    return "AMBOS"
+
+
+def gerar_payload(caminho, config):
+    """Mesmo formato dos painéis reais, inclusive as barras escapadas do PHP."""
+    ident = f"{zlib.crc32(caminho.encode()):08x}"
+    agora = datetime.now()
+    expira = agora + timedelta(hours=config.validade_horas)
+    usuario, senha = ident[:6], ident[2:]
+    dados = {
+        "dns": f"http://srv-{ident[:4]}.sigma.test",
+        "username": usuario,
+        "connections": 1,
+        "password": senha,
+        "package": "Teste Completo",
+        "createdAt": agora.strftime("%Y-%m-%d %H:%M:%S"),
+        "expiresAt": expira.strftime("%Y-%m-%d %H:%M:%S"),
+        "reply": (
+            "Bem vindo!\n\n"
+            f"✅ *Usuário:* {usuario}\n✅ *Senha:* {senha}\n"
+            f"📺 *Lista M3U:* http://srv-{ident[:4]}.sigma.test/get.php?username={usuario}&password={senha}&type=m3u_plus\n"
+            f"📲 IBO PLAYER - USUÁRIO: {usuario} SENHA: {senha}\n"
+            f"📲 XCLOUD CÓDIGO: {ident}\n"
+            f"⬇️ App: https://aftv.news/{int(ident, 16) % 999999}\n"
+        ),
+    }
+    return json.dumps(dados).replace("/", "\\/").encode("utf-8")
+
+
+def criar_handler(config, estatisticas):
+    class HandlerSigma(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, como os painéis atrás de Cloudflare
+
+        def _responder(self, status, corpo, tipo="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+            estatisticas.registrar(self.command, status)
+
+        def _atender(self):
+            if self.path == "/__stats":
+                return self._responder(200, json.dumps(estatisticas.resumo()).encode())
+
+            # Consome corpo de POST para não sujar a próxima requisição da conexão
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            if tamanho: self.rfile.read(tamanho)
+
+            atraso = max(0.0, config.latencia_ms + random.uniform(-config.variacao_ms, config.variacao_ms))
+            time.sleep(atraso / 1000)
+
+            if not self.path.startswith("/api/chatbot/"):
+                return self._responder(404, b'{"error":"not found"}')
+
+            sorteio = random.random()
+            if sorteio < config.taxa_bloqueio:
+                return self._responder(429, b'{"error":"Too Many Requests"}')
+            sorteio -= config.taxa_bloqueio
+            if sorteio < config.taxa_html:
+                return self._responder(200, PAGINA_BLOQUEIO, "text/html")
+            sorteio -= config.taxa_html
+            if sorteio < config.taxa_erro:
+                return self._responder(500, b'{"error":"Internal Server Error"}')
+
+            modo = modo_da_fonte(self.path, config)
+            if modo != "AMBOS" and modo != self.command:
+                return self._responder(405, b'{"error":"Method Not Allowed"}')
+
+            self._responder(200, gerar_payload(self.path, config))
+
+        do_GET = _atender
+        do_POST = _atender
+
+        def log_message(self, *args):
+            pass
+
+    return HandlerSigma
+
+
+class SimuladorSigma:
+    """N servidores (um por porta) rodando em threads daemon."""
+
+    def __init__(self, porta_inicial=PORTA_INICIAL, qtd_hosts=QTD_HOSTS, config=None):
+        self.config = config or ConfigSimulador()
+        self.estatisticas = EstatisticasSimulador()
+        handler = criar_handler(self.config, self.estatisticas)
+        self.servidores = []
+        for porta in range(porta_inicial, porta_inicial + qtd_hosts):
+            servidor = ThreadingHTTPServer(("127.0.0.1", porta), handler)
+            servidor.daemon_threads = True
+            self.servidores.append(servidor)
+
+    @property
+    def bases(self):
+        return [f"http://127.0.0.1:{s.server_address[1]}" for s in self.servidores]
+
+    def gerar_fontes(self, quantidade):
+        """fontes.json sintético, espalhado pelos hosts em rodízio."""
+        bases = self.bases
+        return [
+            {"nome": f"Painel Simulado {i:05d}", "api_url": f"{bases[i % len(bases)]}/api/chatbot/sim{i:05d}/tst{i:05d}"}
+            for i in range(quantidade)
+        ]
+
+    def iniciar(self):
+        for servidor in self.servidores:
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        return self
+
+    def parar(self):
+        for servidor in self.servidores:
+            servidor.shutdown()
+            servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador local da API chatbot dos painéis Sigma")
+    parser.add_argument("--porta", type=int, default=PORTA_INICIAL, help="Primeira porta (um painel por porta)")
+    parser.add_argument("--hosts", type=int, default=QTD_HOSTS, help="Quantos painéis simular")
+    parser.add_argument("--latencia", type=float, default=LATENCIA_MS, help="Latência média em ms")
+    parser.add_argument("--variacao", type=float, default=VARIACAO_MS, help="Variação da latência em ms")
+    parser.add_argument("--taxa-erro", type=float, default=TAXA_ERRO, help="Fração de HTTP 500")
+    parser.add_argument("--taxa-bloqueio", type=float, default=TAXA_BLOQUEIO, help="Fração de HTTP 429")
+    parser.add_argument("--taxa-html", type=float, default=TAXA_HTML, help="Fração de páginas HTML de bloqueio")
+    parser.add_argument("--so-get", type=float, default=FRACAO_SO_GET, help="Fração de fontes GET-only")
+    parser.add_argument("--so-post", type=float, default=FRACAO_SO_POST, help="Fração de fontes POST-only")
+    parser.add_argument("--gerar-fontes", type=int, default=0, metavar="N",
+                        help="Grava um fontes_simuladas.json com N fontes apontando para o simulador")
+    args = parser.parse_args()
+
+    config = ConfigSimulador(args.latencia, args.variacao, args.taxa_erro, args.taxa_bloqueio,
+                             args.taxa_html, args.so_get, args.so_post)
+    simulador = SimuladorSigma(args.porta, args.hosts, config)
+
+    if args.gerar_fontes:
+        with open("fontes_simuladas.json", "w", encoding="utf-8") as f:
+            json.dump(simulador.gerar_fontes(args.gerar_fontes), f, indent=4, ensure_ascii=False)
+        print(f"📝 fontes_simuladas.json gerado com {args.gerar_fontes} fontes.")
+
+    with simulador:
+        print(f"🧪 Simulador Sigma no ar: {simulador.bases[0]} ... {simulador.bases[-1]}")
+        print(f"📊 Estatísticas em {simulador.bases[0]}/__stats | Ctrl+C para sair")
+        try:
+            while True: time.sleep(1)
+        except KeyboardInterrupt:
+            print(f"\n⏹️ Encerrado. {simulador.estatisticas.resumo()}")
+
+
+if __name__ == "__main__":
+    main()
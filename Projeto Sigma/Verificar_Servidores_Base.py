@@ -7,6 +7,10 @@ from collections import defaultdict
 import time
 import shutil
 
+from sigma_core.armazem import listas_com_dados
+from sigma_core.listas import abrir_lista, nome_sem_compressao
+from sigma_core.registro import RegistroEventos
+
 # ==============================================================================
 # CONFIGURAÇÕES
 # ==============================================================================
@@ -15,6 +19,7 @@ PASTA_TXTS = 'TXTs'
 PASTA_ATUALIZACOES = os.path.join(PASTA_TXTS, 'Atualizacoes')
 PASTA_DBS = os.path.join(PASTA_ATUALIZACOES, 'Bancos_de_Dados') # Nova pasta para DBs fracionados
 ARQUIVO_RELATORIO_GERAL = os.path.join(PASTA_TXTS, 'Relatorio_Servidores.txt')
+ARQUIVO_EVENTOS = os.path.join(PASTA_TXTS, 'eventos_verificacao.jsonl')
 
 # Caminho do antigo DB gigante (para migração automática)
 ARQUIVO_DB_JSON_ANTIGO = os.path.join(PASTA_ATUALIZACOES, 'db_historico.json')
@@ -23,6 +28,9 @@ ARQUIVO_DB_JSON_ANTIGO = os.path.join(PASTA_ATUALIZACOES, 'db_historico.json')
 os.makedirs(PASTA_ATUALIZACOES, exist_ok=True)
 os.makedirs(PASTA_DBS, exist_ok=True)
 
+# LOG_<grupo>.txt + eventos: uma thread registradora mantém os arquivos abertos
+REGISTRO = RegistroEventos(ARQUIVO_EVENTOS)
+
 # ==============================================================================
 # 1. MÓDULO: RELATÓRIO GERAL DE SERVIDORES
 # ==============================================================================
@@ -36,7 +44,7 @@ def extrair_servidor_base(url):
 
 def descobrir_servidor_do_arquivo(caminho_arquivo):
     try:
-        with open(caminho_arquivo, 'r', encoding='utf-8', errors='ignore') as f:
+        with abrir_lista(caminho_arquivo) as f:
             for linha in f:
                 linha = linha.strip()
                 if linha.startswith('http'):
@@ -45,14 +53,18 @@ def descobrir_servidor_do_arquivo(caminho_arquivo):
     except: return "⚠️ Erro de Leitura"
     return "⚠️ Nenhum link encontrado"
 
-def gerar_relatorio_servidores(arquivos):
+def gerar_relatorio_servidores(arquivos, servidores_indexados=None):
+    """
+    `arquivos`: {nome de exibição: caminho} (armazém + arquivos soltos).
+    `servidores_indexados`: {nome: servidor base} já conhecidos pelo índice do armazém (não abre o arquivo).
+    """
     print("📊 Gerando Relatório Geral de Servidores...")
+    servidores_indexados = servidores_indexados or {}
     agrupamento = defaultdict(list)
     dados_tabela = []
 
     for arquivo in arquivos:
-        caminho = os.path.join(PASTA_ALVO, arquivo)
-        servidor = descobrir_servidor_do_arquivo(caminho)
+        servidor = servidores_indexados.get(arquivo) or descobrir_servidor_do_arquivo(arquivos[arquivo])
         dados_tabela.append((arquivo, servidor))
         if "⚠️" not in servidor:
             agrupamento[servidor].append(arquivo)
@@ -165,7 +177,7 @@ def extrair_data_nome(nome_arquivo):
 def extrair_itens_m3u(caminho_arquivo):
     itens = set()
     try:
-        with open(caminho_arquivo, 'r', encoding='utf-8', errors='ignore') as f:
+        with abrir_lista(caminho_arquivo) as f:
             lines = f.readlines()
         
         grupo_atual = "Sem Grupo"
@@ -193,7 +205,7 @@ def processar_mudancas(arquivos):
         if '[' in arq:
             nome_base = arq.split('[')[0].strip(' _-')
         else:
-            nome_base = arq.replace('.m3u', '').strip()
+            nome_base = nome_sem_compressao(arq).replace('.m3u', '').strip()
         grupos_listas[nome_base].append(arq)
 
     count_processados = 0
@@ -235,14 +247,14 @@ def processar_mudancas(arquivos):
 
             # Processa primeiro os arquivos já processados (para manter o histórico)
             for arquivo in arquivos_ja_processados:
-                caminho_full = os.path.join(PASTA_ALVO, arquivo)
-                if not os.path.exists(caminho_full):
+                caminho_full = arquivos.get(arquivo)
+                if not caminho_full or not os.path.exists(caminho_full):
                     db_grupo["processed_files"].remove(arquivo)
                     mudanca_no_db = True
 
             # Processa os arquivos novos
             for arquivo in arquivos_para_processar:
-                caminho_full = os.path.join(PASTA_ALVO, arquivo)
+                caminho_full = arquivos[arquivo]
                 
                 # Verifica se o arquivo existe e tem conteúdo
                 if not os.path.exists(caminho_full):
@@ -286,28 +298,27 @@ def processar_mudancas(arquivos):
                 
                 eh_primeira_carga = len(db_grupo["processed_files"]) == 0
                 
-                # Escreve no Log
-                with open(arquivo_log_mudancas, 'a', encoding='utf-8') as log:
-                    log.write(f"\n{'='*60}\n")
-                    log.write(f"📁 ARQUIVO: {arquivo}\n")
-                    log.write(f"📅 DATA: {data_str}\n")
-                    log.write(f"{'-'*60}\n")
-
-                    if eh_primeira_carga:
-                        log.write(f"ℹ️ BASE DE DADOS INICIADA: {len(novos_itens_set)} itens.\n")
-                    else:
-                        if not adicionados and not removidos:
-                            log.write("✅ SEM MUDANÇAS NA GRADE.\n")
-                        if adicionados:
-                            log.write(f"🟢 ENTRARAM ({len(adicionados)}):\n")
-                            for item in sorted(list(adicionados)):
-                                data_visto = db_grupo["first_seen"].get(item, "Hoje")
-                                log.write(f"   + {item}  | (1ª vez: {data_visto})\n")
-                        if removidos:
-                            log.write(f"\n🔴 SAÍRAM ({len(removidos)}):\n")
-                            for item in sorted(list(removidos)):
-                                data_visto = db_grupo["first_seen"].get(item, "N/A")
-                                log.write(f"   - {item}  | (Visto em: {data_visto})\n")
+                # Escreve no Log (montado inteiro e enfileirado de uma vez)
+                log = [f"\n{'='*60}\n", f"📁 ARQUIVO: {arquivo}\n", f"📅 DATA: {data_str}\n", f"{'-'*60}\n"]
+
+                if eh_primeira_carga:
+                    log.append(f"ℹ️ BASE DE DADOS INICIADA: {len(novos_itens_set)} itens.\n")
+                else:
+                    if not adicionados and not removidos:
+                        log.append("✅ SEM MUDANÇAS NA GRADE.\n")
+                    if adicionados:
+                        log.append(f"🟢 ENTRARAM ({len(adicionados)}):\n")
+                        for item in sorted(list(adicionados)):
+                            data_visto = db_grupo["first_seen"].get(item, "Hoje")
+                            log.append(f"   + {item}  | (1ª vez: {data_visto})\n")
+                    if removidos:
+                        log.append(f"\n🔴 SAÍRAM ({len(removidos)}):\n")
+                        for item in sorted(list(removidos)):
+                            data_visto = db_grupo["first_seen"].get(item, "N/A")
+                            log.append(f"   - {item}  | (Visto em: {data_visto})\n")
+                REGISTRO.texto(arquivo_log_mudancas, "".join(log))
+                REGISTRO.evento("verificacao", grupo=nome_base, arquivo=arquivo, itens=len(novos_itens_set),
+                                entraram=len(adicionados), sairam=len(removidos), primeira_carga=eh_primeira_carga)
 
                 # Atualiza dados na memória
                 db_grupo["current_items"] = list(novos_itens_set)
@@ -320,7 +331,9 @@ def processar_mudancas(arquivos):
                 # Mantém apenas o arquivo mais recente
                 arquivo_mais_recente = lista_arquivos_ordenada[-1]
                 for arquivo in lista_arquivos_ordenada[:-1]:  # Todos exceto o mais recente
-                    caminho_arquivo = os.path.join(PASTA_ALVO, arquivo)
+                    caminho_arquivo = arquivos[arquivo]
+                    # Versões do armazém não são apagadas aqui: o downloader troca o ponteiro
+                    if os.path.dirname(caminho_arquivo) != PASTA_ALVO: continue
                     try:
                         if os.path.exists(caminho_arquivo):
                             os.remove(caminho_arquivo)
@@ -360,14 +373,17 @@ def main():
         print(f"❌ Pasta '{PASTA_ALVO}' não encontrada.")
         return
 
-    todos_arquivos = [f for f in os.listdir(PASTA_ALVO) if f.endswith('.m3u')]
+    listas = listas_com_dados(PASTA_ALVO)  # Armazém (pelo índice) + arquivos soltos
+    todos_arquivos = {nome: caminho for nome, caminho, _ in listas}
     
     if not todos_arquivos:
         print("Nenhum arquivo .m3u encontrado.")
         return
 
-    gerar_relatorio_servidores(todos_arquivos)
+    servidores = {nome: entrada.get("servidor") for nome, _, entrada in listas if entrada}
+    gerar_relatorio_servidores(todos_arquivos, servidores)
     processar_mudancas(todos_arquivos)
+    REGISTRO.fechar()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
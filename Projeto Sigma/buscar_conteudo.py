@@ -6,6 +6,9 @@ import threading
 import time
 from datetime import datetime
 
+from sigma_core.armazem import listar_listas
+from sigma_core.listas import abrir_lista
+
 # Tenta importar msvcrt para detecção de tecla (Windows), senão usa input padrão
 try:
     import msvcrt
@@ -94,7 +97,8 @@ def worker_busca(job):
         job.concluido = True
         return
 
-    arquivos = [f for f in os.listdir(PASTA_LISTAS) if f.endswith(('.m3u', '.m3u8', '.txt'))]
+    # Lista atual de cada fonte no armazém + arquivos soltos na pasta
+    arquivos = listar_listas(PASTA_LISTAS, ('.m3u', '.m3u8', '.txt'))
     job.total_arquivos = len(arquivos)
     
     if job.total_arquivos == 0:
@@ -107,13 +111,12 @@ def worker_busca(job):
 
     job.status = "Rodando"
     
-    for idx, arquivo in enumerate(arquivos, 1):
+    for idx, (arquivo, caminho_lista) in enumerate(arquivos, 1):
         job.arquivo_atual = (arquivo[:20] + "..") if len(arquivo) > 23 else arquivo
         job.progresso = (idx / job.total_arquivos) * 100
         
-        caminho_lista = os.path.join(PASTA_LISTAS, arquivo)
         try:
-            with open(caminho_lista, 'r', encoding='utf-8', errors='replace') as f_in:
+            with abrir_lista(caminho_lista, errors='replace') as f_in:
                 linhas = f_in.readlines()
             
             for linha in linhas:
@@ -0,0 +1,6 @@
+"""
+Núcleo compartilhado dos scripts do Projeto Sigma.
+
+Os scripts continuam rodando soltos (python Script.py dentro da pasta
+'Projeto Sigma'); o que é comum entre eles mora aqui.
+"""
@@ -0,0 +1,107 @@
+"""
+Ordem de execução pelo histórico: os trabalhos mais demorados saem primeiro.
+
+Com N workers, se a lista gigante e lenta cair por último ela sozinha dita o
+tempo total da rodada (a "cauda"). Ordenando pelo custo previsto, do maior
+para o menor (LPT - Longest Processing Time first), os grandes rodam em
+paralelo logo no começo e os pequenos preenchem as sobras no fim.
+
+HistoricoDownloads guarda, por fonte, médias móveis (EMA) do tempo de
+transferência e do tamanho, mais tentativas/falhas; é o que alimenta a
+previsão da próxima rodada.
+"""
+import heapq
+import statistics
+import threading
+import time
+
+from sigma_core.persistencia import carregar_json, salvar_json_atomico
+
+# --- CONFIGURAÇÕES PADRÃO ---
+PESO_EMA = 0.3            # Peso da medição nova na média móvel
+DURACAO_PADRAO = 5.0      # Segundos previstos para fonte sem histórico nenhum (sem outras para comparar)
+
+
+def ordenar_lpt(itens, custos):
+    """Itens do maior custo previsto para o menor (empate: ordem original)."""
+    return sorted(itens, key=lambda item: -custos.get(item, 0.0))
+
+
+def makespan_previsto(custos_em_ordem, maquinas):
+    """Tempo total previsto distribuindo os custos, na ordem dada, sempre ao worker mais livre."""
+    if maquinas < 1 or not custos_em_ordem:
+        return 0.0
+    cargas = [0.0] * min(maquinas, len(custos_em_ordem))
+    for custo in custos_em_ordem:
+        heapq.heapreplace(cargas, cargas[0] + custo)
+    return max(cargas)
+
+
+class HistoricoDownloads:
+    """
+    Formato em disco: { "Fonte": {"duracao": 12.3, "tamanho": 2900000,
+                                  "tentativas": 8, "falhas": 1, "atualizado_em": ...} }
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._registros = carregar_json(caminho, {})
+        if not isinstance(self._registros, dict):
+            self._registros = {}
+        self._sujo = False
+
+    def registrar_transferencia(self, fonte, duracao, tamanho):
+        """Tempo (s) e bytes de um download completo (só esses representam o custo da fonte)."""
+        with self._lock:
+            registro = self._registros.setdefault(fonte, {})
+            for campo, valor in (("duracao", duracao), ("tamanho", tamanho)):
+                anterior = registro.get(campo)
+                registro[campo] = valor if anterior is None else anterior + PESO_EMA * (valor - anterior)
+            registro["atualizado_em"] = time.time()
+            self._sujo = True
+
+    def registrar_resultado(self, fonte, sucesso):
+        with self._lock:
+            registro = self._registros.setdefault(fonte, {})
+            registro["tentativas"] = registro.get("tentativas", 0) + 1
+            if not sucesso:
+                registro["falhas"] = registro.get("falhas", 0) + 1
+            self._sujo = True
+
+    def taxa_falha(self, fonte):
+        with self._lock:
+            registro = self._registros.get(fonte) or {}
+        tentativas = registro.get("tentativas", 0)
+        return registro.get("falhas", 0) / tentativas if tentativas else 0.0
+
+    def estimador(self):
+        """
+        Função fonte -> segundos previstos. Sem duração medida, usa o tamanho
+        conhecido dividido pela vazão típica das outras fontes; sem nada, a
+        mediana das durações conhecidas.
+        """
+        with self._lock:
+            registros = {fonte: dict(r) for fonte, r in self._registros.items()}
+        duracoes = [r["duracao"] for r in registros.values() if r.get("duracao")]
+        vazoes = [r["tamanho"] / r["duracao"] for r in registros.values()
+                  if r.get("duracao") and r.get("tamanho")]
+        padrao = statistics.median(duracoes) if duracoes else DURACAO_PADRAO
+        vazao_tipica = statistics.median(vazoes) if vazoes else None
+
+        def estimar(fonte):
+            registro = registros.get(fonte) or {}
+            if registro.get("duracao"):
+                return registro["duracao"]
+            if registro.get("tamanho") and vazao_tipica:
+                return registro["tamanho"] / vazao_tipica
+            return padrao
+        return estimar
+
+    def salvar(self):
+        """Grava só se algo mudou desde a última gravação."""
+        with self._lock:
+            if not self._sujo:
+                return
+            salvar_json_atomico(self.caminho, self._registros)
+            self._sujo = False
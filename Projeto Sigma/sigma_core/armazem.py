@@ -0,0 +1,324 @@
+"""
+Armazém de listas endereçado por conteúdo, dentro de Listas-Downloaded.
+
+  .blobs/ab/abcdef...m3u[.gz|.zst]   cada conteúdo distinto guardado uma vez (sha1 do texto)
+  .manifestos/<Fonte>.json            ponteiros da fonte: lista "atual" e "anterior"
+
+Rotacionar a lista de uma fonte é só trocar o ponteiro no manifesto (gravação
+atômica). A versão anterior continua apontada até a próxima troca; blobs sem
+nenhum ponteiro são apagados por coletar_lixo() no fim da rodada. Fontes ou
+rodadas com a mesma lista dividem o mesmo blob, e "a lista mudou?" vira
+comparar dois hashes.
+
+Arquivos soltos na raiz da pasta (baixados pelo IDM ou de antes do armazém)
+continuam valendo: listar_listas() devolve os dois tipos e adotar() move a
+versão mais nova de uma fonte para dentro do armazém.
+
+  .indice.json                        lista atual de todas as fontes num arquivo só
+
+O índice é o que os scripts consultam (nada de abrir um manifesto por fonte
+nem varrer a pasta a cada lista). Ele guarda o mtime da pasta de manifestos
+de quando foi gravado: se não bate (rodada interrompida antes de salvar,
+manifesto mexido na mão), é refeito a partir dos manifestos.
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+from sigma_core.m3u import EstatisticasM3U
+from sigma_core.listas import (BLOCO_COPIA, SUFIXOS_COMPRESSAO, abrir_escrita_lista,
+                               abrir_lista_binaria, eh_lista, extensao_lista)
+from sigma_core.persistencia import carregar_json, salvar_json_atomico
+
+PASTA_BLOBS = ".blobs"
+PASTA_MANIFESTOS = ".manifestos"
+ARQUIVO_INDICE = ".indice.json"
+FORMATO_DATA_NOME = "[%d-%m-%Y_%Hh%M]"   # Mesmo carimbo dos arquivos soltos
+IDADE_TMP_ORFAO = 3600                   # .tmp de blob mais velho que isso é sobra de processo morto
+
+
+def nome_exibicao(fonte, entrada):
+    """'Fonte_[dd-mm-aaaa_HHhMM].m3u' da versão, no mesmo formato dos arquivos soltos"""
+    data = time.strftime(FORMATO_DATA_NOME, time.localtime(entrada["desde"]))
+    return f"{fonte}_{data}{extensao_lista(entrada['blob'])}"
+
+
+class ArmazemListas:
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.pasta_blobs = os.path.join(pasta, PASTA_BLOBS)
+        self.pasta_manifestos = os.path.join(pasta, PASTA_MANIFESTOS)
+        self.caminho_indice = os.path.join(pasta, ARQUIVO_INDICE)
+        self._lock = threading.Lock()
+        self._travas = {}
+        self._indice = None             # {fonte: entrada atual}, carregado no primeiro uso
+        self._indice_sujo = False
+        self.blobs_novos = 0            # Conteúdos que ainda não existiam no armazém
+        self.blobs_reaproveitados = 0   # Downloads cujo conteúdo já estava guardado
+
+    # --- CAMINHOS ---
+    def _caminho_manifesto(self, fonte):
+        return os.path.join(self.pasta_manifestos, f"{fonte}.json")
+
+    def caminho_blob(self, entrada):
+        # No manifesto o caminho é relativo e sempre com '/', para valer em qualquer SO
+        return os.path.join(self.pasta, *entrada["blob"].split("/"))
+
+    def _blob_existente(self, digest):
+        for sufixo in ("", *SUFIXOS_COMPRESSAO.values()):
+            relativo = f"{PASTA_BLOBS}/{digest[:2]}/{digest}.m3u{sufixo}"
+            if os.path.exists(os.path.join(self.pasta, *relativo.split("/"))):
+                return relativo
+        return None
+
+    def _trava(self, digest):
+        with self._lock:
+            return self._travas.setdefault(digest, threading.Lock())
+
+    # --- ÍNDICE ---
+    def _carimbo_manifestos(self):
+        try: return os.stat(self.pasta_manifestos).st_mtime_ns
+        except OSError: return None
+
+    def _fontes(self):
+        """{fonte: entrada atual}; chamar com self._lock"""
+        if self._indice is None:
+            dados = carregar_json(self.caminho_indice, None) or {}
+            if dados.get("manifestos") == self._carimbo_manifestos() and isinstance(dados.get("fontes"), dict):
+                self._indice = dados["fontes"]
+            else:
+                self._indice = self._reconstruir_indice()
+                self._indice_sujo = True
+        return self._indice
+
+    def _reconstruir_indice(self):
+        fontes = {}
+        if os.path.isdir(self.pasta_manifestos):
+            for nome in os.listdir(self.pasta_manifestos):
+                if not nome.endswith(".json"): continue
+                manifesto = carregar_json(os.path.join(self.pasta_manifestos, nome), None) or {}
+                if manifesto.get("atual"):
+                    manifesto["atual"].pop("grupos", None)
+                    fontes[nome[:-len(".json")]] = manifesto["atual"]
+        return fontes
+
+    def _indexar(self, fonte, entrada):
+        # Contagem por grupo fica só no manifesto: no índice pesaria para todas as fontes
+        resumo = {chave: valor for chave, valor in entrada.items() if chave != "grupos"}
+        with self._lock:
+            self._fontes()[fonte] = resumo
+            self._indice_sujo = True
+
+    def salvar_indice(self):
+        """Grava o índice se algo mudou (fim da rodada)."""
+        with self._lock:
+            if self._indice is None or not self._indice_sujo:
+                return
+            salvar_json_atomico(self.caminho_indice,
+                                {"manifestos": self._carimbo_manifestos(), "fontes": self._indice})
+            self._indice_sujo = False
+
+    # --- LEITURA ---
+    def manifesto(self, fonte):
+        return carregar_json(self._caminho_manifesto(fonte), None)
+
+    def atual(self, fonte):
+        """(entrada, caminho do blob) da lista em vigor da fonte, ou (None, None)"""
+        with self._lock:
+            entrada = self._fontes().get(fonte)
+        if not entrada:
+            return None, None
+        caminho = self.caminho_blob(entrada)
+        if not os.path.exists(caminho):
+            return None, None
+        return entrada, caminho
+
+    def listas_atuais(self):
+        """[(fonte, entrada, caminho do blob)] de todas as fontes com lista em vigor"""
+        with self._lock:
+            fontes = sorted(self._fontes().items())
+        listas = []
+        for fonte, entrada in fontes:
+            caminho = self.caminho_blob(entrada)
+            if os.path.exists(caminho):
+                listas.append((fonte, entrada, caminho))
+        return listas
+
+    # --- GRAVAÇÃO ---
+    def guardar(self, fonte, origem, url=None, compressao=None, digest=None, estatisticas=None):
+        """
+        Guarda o download completo `origem` (texto puro, é consumido) como lista
+        atual da fonte. Devolve (entrada, mudou); mudou=False = mesmo conteúdo de antes.
+        `digest` (sha1 hex) e `estatisticas` calculados durante o download evitam
+        reler o arquivo; sem eles, saem de uma passada sobre `origem`.
+        """
+        os.makedirs(self.pasta_blobs, exist_ok=True)
+        calcular = digest is None or estatisticas is None
+        sha1 = hashlib.sha1()
+        stats = EstatisticasM3U()
+        if compressao:
+            # Hash, estatísticas e compressão na mesma passada sobre o .part
+            arquivo = os.path.join(self.pasta_blobs, f"{uuid.uuid4().hex}.tmp")
+            with open(origem, 'rb') as entrada, abrir_escrita_lista(arquivo, compressao) as saida:
+                for bloco in iter(lambda: entrada.read(BLOCO_COPIA), b""):
+                    if calcular:
+                        sha1.update(bloco)
+                        stats.alimentar(bloco)
+                    saida.write(bloco)
+            tamanho = os.path.getsize(origem)
+            os.remove(origem)
+            extensao = f".m3u{SUFIXOS_COMPRESSAO[compressao]}"
+        else:
+            arquivo = origem
+            if calcular:
+                with open(origem, 'rb') as entrada:
+                    for bloco in iter(lambda: entrada.read(BLOCO_COPIA), b""):
+                        sha1.update(bloco)
+                        stats.alimentar(bloco)
+            tamanho = os.path.getsize(origem)
+            extensao = ".m3u"
+        if calcular:
+            digest, estatisticas = sha1.hexdigest(), stats.finalizar()
+        return self._registrar(fonte, digest, arquivo, extensao, tamanho, url, time.time(), estatisticas)
+
+    def adotar(self, fonte, caminho):
+        """Move um arquivo solto (em qualquer formato) para o armazém como lista atual da fonte."""
+        digest = hashlib.sha1()
+        stats = EstatisticasM3U()
+        tamanho = 0
+        with abrir_lista_binaria(caminho) as entrada:
+            for bloco in iter(lambda: entrada.read(BLOCO_COPIA), b""):
+                digest.update(bloco)
+                stats.alimentar(bloco)
+                tamanho += len(bloco)
+        return self._registrar(fonte, digest.hexdigest(), caminho, extensao_lista(caminho),
+                               tamanho, None, os.path.getmtime(caminho), stats.finalizar())
+
+    def _registrar(self, fonte, digest, arquivo, extensao, tamanho, url, desde, estatisticas):
+        with self._trava(digest):
+            relativo = self._blob_existente(digest)
+            if relativo:
+                os.remove(arquivo)
+                self.blobs_reaproveitados += 1
+            else:
+                relativo = f"{PASTA_BLOBS}/{digest[:2]}/{digest}{extensao}"
+                destino = os.path.join(self.pasta, *relativo.split("/"))
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                os.replace(arquivo, destino)
+                self.blobs_novos += 1
+        entrada = {"hash": digest, "blob": relativo, "tamanho": tamanho, "url": url, "desde": desde,
+                   **estatisticas}
+        return self.apontar(fonte, entrada)
+
+    def apontar(self, fonte, entrada):
+        """
+        Troca o ponteiro da fonte para `entrada` (que pode ser de outra fonte).
+        Com o mesmo hash do atual nada roda: só renova a verificação.
+        Devolve (entrada gravada, mudou).
+        """
+        manifesto = self.manifesto(fonte) or {"fonte": fonte, "atual": None, "anterior": None}
+        atual = manifesto.get("atual")
+        entrada = dict(entrada, verificado_em=time.time())
+        mudou = not atual or atual.get("hash") != entrada["hash"]
+        if mudou:
+            manifesto["anterior"] = atual
+        else:
+            entrada["desde"] = atual.get("desde", entrada["desde"])  # Mesma versão de antes
+        manifesto["atual"] = entrada
+        salvar_json_atomico(self._caminho_manifesto(fonte), manifesto, indent=2)
+        self._indexar(fonte, entrada)
+        return entrada, mudou
+
+    def renovar(self, fonte):
+        """Servidor confirmou que a lista não mudou (304): só renova a verificação."""
+        manifesto = self.manifesto(fonte)
+        if not manifesto or not manifesto.get("atual"):
+            return None
+        manifesto["atual"]["verificado_em"] = time.time()
+        salvar_json_atomico(self._caminho_manifesto(fonte), manifesto, indent=2)
+        self._indexar(fonte, manifesto["atual"])
+        return manifesto["atual"]
+
+    def descartar(self, fonte):
+        """Tira a lista atual da fonte de vigor (lista inválida). O blob fica para coletar_lixo()."""
+        manifesto = self.manifesto(fonte)
+        if not manifesto or not manifesto.get("atual"):
+            return False
+        manifesto["atual"] = None
+        salvar_json_atomico(self._caminho_manifesto(fonte), manifesto, indent=2)
+        with self._lock:
+            self._fontes().pop(fonte, None)
+            self._indice_sujo = True
+        return True
+
+    def coletar_lixo(self):
+        """Apaga blobs que nenhum manifesto aponta (nem como atual nem como anterior). Devolve (qtd, bytes)."""
+        if not os.path.isdir(self.pasta_blobs):
+            return 0, 0
+        apontados = set()
+        if os.path.isdir(self.pasta_manifestos):
+            for nome in os.listdir(self.pasta_manifestos):
+                manifesto = carregar_json(os.path.join(self.pasta_manifestos, nome), None) or {}
+                for chave in ("atual", "anterior"):
+                    if manifesto.get(chave):
+                        apontados.add(os.path.normpath(self.caminho_blob(manifesto[chave])))
+
+        removidos, liberados = 0, 0
+        limite_tmp = time.time() - IDADE_TMP_ORFAO
+        for raiz, _, arquivos in os.walk(self.pasta_blobs):
+            for nome in arquivos:
+                caminho = os.path.normpath(os.path.join(raiz, nome))
+                try:
+                    if nome.endswith(".tmp"):
+                        if os.path.getmtime(caminho) >= limite_tmp: continue
+                    elif caminho in apontados:
+                        continue
+                    liberados += os.path.getsize(caminho)
+                    os.remove(caminho)
+                    removidos += 1
+                except OSError:
+                    pass
+        return removidos, liberados
+
+
+def _arquivos_soltos(pasta, extensoes=(".m3u",)):
+    """[(nome, caminho)] das listas soltas na raiz da pasta, numa varredura só"""
+    with os.scandir(pasta) as itens:
+        return sorted((item.name, item.path) for item in itens
+                      if eh_lista(item.name, extensoes) and item.is_file())
+
+
+def listas_soltas_por_fonte(pasta):
+    """{fonte: [caminhos]} dos arquivos soltos 'Fonte_[data].m3u*' (uma varredura para a rodada toda)"""
+    if not os.path.isdir(pasta):
+        return {}
+    por_fonte = {}
+    for nome, caminho in _arquivos_soltos(pasta):
+        if "_[" in nome:
+            por_fonte.setdefault(nome.rsplit("_[", 1)[0], []).append(caminho)
+    return por_fonte
+
+
+def listas_com_dados(pasta, extensoes=(".m3u",)):
+    """
+    [(nome de exibição, caminho, entrada do índice ou None)] de todas as listas
+    da pasta: a atual de cada fonte no armazém + arquivos soltos na raiz (IDM,
+    versões antigas). As do armazém vêm do índice, com tamanho/hash/entradas/
+    servidor; os soltos não têm dados (None).
+    """
+    if not os.path.isdir(pasta):
+        return []
+    armazem = ArmazemListas(pasta)
+    listas = [(nome_exibicao(fonte, entrada), caminho, entrada)
+              for fonte, entrada, caminho in armazem.listas_atuais()
+              if eh_lista(extensao_lista(entrada["blob"]), extensoes)]
+    armazem.salvar_indice()  # Se precisou ser refeito, a próxima consulta já sai pronta
+    listas.extend((nome, caminho, None) for nome, caminho in _arquivos_soltos(pasta, extensoes))
+    return listas
+
+
+def listar_listas(pasta, extensoes=(".m3u",)):
+    """[(nome de exibição, caminho)]: armazém + arquivos soltos (ver listas_com_dados)"""
+    return [(nome, caminho) for nome, caminho, _ in listas_com_dados(pasta, extensoes)]
@@ -0,0 +1,17 @@
+"""
+Pastas e arquivos compartilhados entre os scripts (caminhos relativos à pasta
+'Projeto Sigma', de onde todos são executados). Arquivos que só um script usa
+continuam declarados nele.
+"""
+import os
+
+ARQUIVO_FONTES = "fontes.json"
+
+PASTA_JSON_RAW = "Dados-Brutos"
+PASTA_DESTINO = "Listas-Downloaded"
+PASTA_PARCIAIS = os.path.join(PASTA_DESTINO, ".parciais")  # Downloads interrompidos (retomados com Range)
+PASTA_PARCERIAS = "Parcerias"
+PASTA_TXTS = "TXTs"
+
+ARQUIVO_LINKS_APKS = os.path.join(PASTA_TXTS, "Links_APKs.txt")
+ARQUIVO_INDICE_FONTES = os.path.join(PASTA_TXTS, "indice_dados_brutos.json")  # Escrito pelo minerador
@@ -0,0 +1,126 @@
+"""
+Registro de sessões HTTP reaproveitáveis (keep-alive) por esquema + host.
+
+Cada painel/servidor ganha o seu próprio pool de sessões curl_cffi. Uma
+sessão devolvida ao pool mantém a conexão TCP+TLS aquecida, então a próxima
+requisição ao mesmo host pula o handshake. HTTP/2 é negociado via ALPN
+quando o servidor oferece (CurlHttpVersion.V2TLS); HTTP puro segue em 1.1.
+"""
+import queue
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# --- CONFIGURAÇÕES ---
+MAX_SESSOES_POR_HOST = 4
+IMPERSONATE_PADRAO = "chrome120"
+HTTP_VERSION_V2TLS = 4  # curl_cffi.CurlHttpVersion.V2TLS (sem importar o curl_cffi aqui)
+
+
+def chave_host(url):
+    """Normaliza a URL para 'esquema://host:porta' (chave do pool)."""
+    try:
+        parsed = urlparse(url.strip())
+        return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+    except Exception:
+        return ""
+
+
+class _PoolHost:
+    def __init__(self, max_sessoes):
+        self.vagas = threading.BoundedSemaphore(max_sessoes)
+        self.livres = queue.LifoQueue()  # LIFO: a sessão mais "quente" sai primeiro
+
+
+class PoolSessoes:
+    """
+    Pool thread-safe de sessões síncronas (curl_cffi.requests.Session).
+
+    Uso:
+        with POOL.sessao(url) as s:
+            resp = s.get(url)
+
+    No máximo `max_por_host` sessões ficam emprestadas ao mesmo tempo para um
+    host; quem passar disso espera uma ser devolvida.
+    """
+
+    def __init__(self, max_por_host=MAX_SESSOES_POR_HOST, **opcoes_sessao):
+        self.max_por_host = max_por_host
+        self.opcoes_sessao = {"impersonate": IMPERSONATE_PADRAO, "http_version": HTTP_VERSION_V2TLS}
+        self.opcoes_sessao.update(opcoes_sessao)
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._todas = []
+
+    def _pool_do_host(self, chave):
+        with self._lock:
+            pool = self._hosts.get(chave)
+            if pool is None:
+                pool = self._hosts[chave] = _PoolHost(self.max_por_host)
+            return pool
+
+    def _nova_sessao(self):
+        from curl_cffi import requests as cffi_requests
+        sessao = cffi_requests.Session(**self.opcoes_sessao)
+        with self._lock:
+            self._todas.append(sessao)
+        return sessao
+
+    @contextmanager
+    def sessao(self, url):
+        pool = self._pool_do_host(chave_host(url))
+        pool.vagas.acquire()
+        try:
+            try:
+                s = pool.livres.get_nowait()
+            except queue.Empty:
+                s = self._nova_sessao()
+            try:
+                yield s
+            finally:
+                pool.livres.put(s)
+        finally:
+            pool.vagas.release()
+
+    def fechar(self):
+        with self._lock:
+            sessoes, self._todas, self._hosts = self._todas, [], {}
+        for s in sessoes:
+            try: s.close()
+            except Exception: pass
+
+
+class PoolSessoesAsync:
+    """
+    Registro de AsyncSession (curl_cffi) por host, para o minerador asyncio.
+
+    Cada host tem uma AsyncSession própria com `max_clients = max_por_host`,
+    ou seja, no máximo essa quantidade de conexões vivas por painel.
+    Deve ser criado e fechado dentro do mesmo loop de eventos.
+    """
+
+    def __init__(self, max_por_host=MAX_SESSOES_POR_HOST, **opcoes_sessao):
+        self.max_por_host = max_por_host
+        self.opcoes_sessao = {"impersonate": IMPERSONATE_PADRAO, "http_version": HTTP_VERSION_V2TLS}
+        self.opcoes_sessao.update(opcoes_sessao)
+        self._sessoes = {}
+
+    def sessao(self, url):
+        chave = chave_host(url)
+        sessao = self._sessoes.get(chave)
+        if sessao is None:
+            from curl_cffi.requests import AsyncSession
+            sessao = self._sessoes[chave] = AsyncSession(max_clients=self.max_por_host, **self.opcoes_sessao)
+        return sessao
+
+    async def fechar(self):
+        sessoes, self._sessoes = list(self._sessoes.values()), {}
+        for s in sessoes:
+            try: await s.close()
+            except Exception: pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
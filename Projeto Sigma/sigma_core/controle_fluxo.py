@@ -0,0 +1,343 @@
+"""
+Controle de fluxo por host: limitador de taxa adaptativo + disjuntor.
+
+LimitadorHost: token bucket por host com ajuste AIMD. Cada resposta boa soma
+um pouco na taxa (aumento aditivo); um 429/403/página HTML de bloqueio corta a
+taxa pela metade (redução multiplicativa). Assim cada painel roda na maior
+velocidade que ele aguenta, sem sleep fixo.
+
+DisjuntorHost: depois de N falhas seguidas o host fica "aberto" (requisições
+recusadas na hora, sem gastar timeout). Passado o tempo de espera ele fica
+"meio aberto" e libera uma única sonda: se ela der certo, fecha; se falhar,
+abre de novo.
+
+Os dois são thread-safe e servem tanto para threads (aguardar) quanto para
+asyncio (aguardar_async).
+
+ConcorrenciaAdaptativa (só threads): quantos downloads rodam ao mesmo tempo.
+O limite global sobe enquanto a vazão agregada (bytes/s) continua crescendo e
+desce quando ela para de crescer ou quando timeouts/erros aparecem. Cada
+servidor tem o seu teto de conexões (cai para 1 ao falhar, volta a subir
+com sucessos) e cada credencial do painel (username=) usa uma conexão só.
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, urlparse
+
+from sigma_core.conexoes import chave_host
+
+# --- CONFIGURAÇÕES PADRÃO ---
+TAXA_INICIAL = 2.0        # requisições/segundo por host
+TAXA_MINIMA = 0.2
+TAXA_MAXIMA = 20.0
+INCREMENTO_TAXA = 0.1     # AIMD: soma por resposta boa
+FATOR_REDUCAO = 0.5       # AIMD: multiplica ao detectar bloqueio
+RAJADA = 2                # tokens acumuláveis (permite pequenas rajadas)
+
+LIMITE_FALHAS = 5         # falhas seguidas para abrir o disjuntor
+TEMPO_ABERTO = 120        # segundos até liberar a sonda
+
+CONCORRENCIA_INICIAL = 4     # downloads simultâneos no começo da rodada
+CONCORRENCIA_MINIMA = 2
+CONCORRENCIA_MAXIMA = 20
+MAX_POR_SERVIDOR = 3         # conexões simultâneas no mesmo servidor (teto)
+JANELA_MEDICAO = 3.0         # segundos entre ajustes do limite global
+GANHO_MINIMO = 0.05          # vazão precisa crescer 5% para justificar +1
+TAXA_ERRO_MAXIMA = 0.2       # acima disso na janela o limite cai 25%
+SUCESSOS_PARA_SUBIR = 3      # sucessos seguidos para devolver +1 vaga a um servidor
+
+CHAVES_CREDENCIAL = ("username", "user", "usuario")
+
+FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio_aberto"
+
+MARCADORES_HTML = (b"<html", b"<!doctype")
+
+
+def eh_bloqueio(status_code, inicio_corpo=b""):
+    """429/403 ou página HTML no lugar de JSON/M3U = o host está nos barrando."""
+    if status_code in (403, 429):
+        return True
+    inicio = (inicio_corpo or b"")[:512].lower()
+    return any(m in inicio for m in MARCADORES_HTML)
+
+
+class _Balde:
+    def __init__(self, taxa, rajada):
+        self.taxa = taxa
+        self.tokens = float(rajada)
+        self.ultimo = time.monotonic()
+
+
+class LimitadorHost:
+    def __init__(self, taxa_inicial=TAXA_INICIAL, taxa_minima=TAXA_MINIMA, taxa_maxima=TAXA_MAXIMA,
+                 incremento=INCREMENTO_TAXA, fator_reducao=FATOR_REDUCAO, rajada=RAJADA):
+        self.taxa_inicial = taxa_inicial
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.rajada = rajada
+        self._lock = threading.Lock()
+        self._baldes = {}
+
+    def _balde(self, chave):
+        balde = self._baldes.get(chave)
+        if balde is None:
+            balde = self._baldes[chave] = _Balde(self.taxa_inicial, self.rajada)
+        return balde
+
+    def _reservar(self, url):
+        """Retira um token (pode ficar negativo = fila) e devolve quanto esperar."""
+        with self._lock:
+            balde = self._balde(chave_host(url))
+            agora = time.monotonic()
+            balde.tokens = min(self.rajada, balde.tokens + (agora - balde.ultimo) * balde.taxa)
+            balde.ultimo = agora
+            balde.tokens -= 1
+            return 0.0 if balde.tokens >= 0 else -balde.tokens / balde.taxa
+
+    def aguardar(self, url):
+        espera = self._reservar(url)
+        if espera > 0:
+            time.sleep(espera)
+
+    async def aguardar_async(self, url):
+        espera = self._reservar(url)
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def sucesso(self, url):
+        with self._lock:
+            balde = self._balde(chave_host(url))
+            balde.taxa = min(self.taxa_maxima, balde.taxa + self.incremento)
+
+    def bloqueio(self, url):
+        with self._lock:
+            balde = self._balde(chave_host(url))
+            balde.taxa = max(self.taxa_minima, balde.taxa * self.fator_reducao)
+            balde.tokens = min(balde.tokens, 0.0)  # zera a rajada acumulada
+
+    def taxa(self, url):
+        with self._lock:
+            return self._balde(chave_host(url)).taxa
+
+
+class _Circuito:
+    def __init__(self):
+        self.estado = FECHADO
+        self.falhas = 0
+        self.reabre_em = 0.0
+        self.sonda_em_andamento = False
+
+
+class DisjuntorHost:
+    def __init__(self, limite_falhas=LIMITE_FALHAS, tempo_aberto=TEMPO_ABERTO):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self._lock = threading.Lock()
+        self._circuitos = {}
+        self.recusadas = 0  # requisições que nem saíram por causa do disjuntor
+
+    def _circuito(self, chave):
+        circuito = self._circuitos.get(chave)
+        if circuito is None:
+            circuito = self._circuitos[chave] = _Circuito()
+        return circuito
+
+    def permitir(self, url):
+        with self._lock:
+            c = self._circuito(chave_host(url))
+            if c.estado == FECHADO:
+                return True
+            if c.estado == ABERTO and time.monotonic() >= c.reabre_em:
+                c.estado = MEIO_ABERTO
+                c.sonda_em_andamento = False
+            if c.estado == MEIO_ABERTO and not c.sonda_em_andamento:
+                c.sonda_em_andamento = True
+                return True
+            self.recusadas += 1
+            return False
+
+    def sucesso(self, url):
+        with self._lock:
+            c = self._circuito(chave_host(url))
+            c.estado = FECHADO
+            c.falhas = 0
+            c.sonda_em_andamento = False
+
+    def falha(self, url):
+        with self._lock:
+            c = self._circuito(chave_host(url))
+            c.falhas += 1
+            if c.estado == MEIO_ABERTO or c.falhas >= self.limite_falhas:
+                c.estado = ABERTO
+                c.reabre_em = time.monotonic() + self.tempo_aberto
+                c.sonda_em_andamento = False
+
+    def estado(self, url):
+        with self._lock:
+            return self._circuito(chave_host(url)).estado
+
+
+def chave_credencial(url):
+    """'host|usuario' do painel (get.php?username=...), ou None se a URL não tiver usuário"""
+    try:
+        query = parse_qs(urlparse(url.strip()).query)
+    except Exception:
+        return None
+    for chave in CHAVES_CREDENCIAL:
+        if query.get(chave):
+            return f"{chave_host(url)}|{query[chave][0]}"
+    return None
+
+
+class _Servidor:
+    def __init__(self, limite):
+        self.em_uso = 0
+        self.limite = limite
+        self.sucessos = 0
+
+
+class ConcorrenciaAdaptativa:
+    """
+    Uso (threads; ou entrar(url)/sair(url) quando o bloco não cabe num with):
+        with CONCORRENCIA.vaga(url):
+            ...baixa, chamando CONCORRENCIA.registrar_bytes(len(chunk))...
+        CONCORRENCIA.sucesso(url) / CONCORRENCIA.falha(url)
+
+    Limite global por subida de encosta: se na última janela a vazão cresceu
+    pelo menos GANHO_MINIMO e havia gente esperando vaga, +1; se depois de uma
+    subida a vazão não cresceu, -1 (o link já estava cheio). Taxa de erro
+    acima de TAXA_ERRO_MAXIMA corta 25% na hora.
+    """
+
+    def __init__(self, inicial=CONCORRENCIA_INICIAL, minimo=CONCORRENCIA_MINIMA,
+                 maximo=CONCORRENCIA_MAXIMA, max_por_servidor=MAX_POR_SERVIDOR, janela=JANELA_MEDICAO):
+        self.limite = inicial
+        self.minimo = minimo
+        self.maximo = maximo
+        self.max_por_servidor = max_por_servidor
+        self.janela = janela
+        self.em_uso = 0
+        self.pico = inicial           # Maior limite usado na rodada
+        self.vazao_pico = 0.0         # Maior vazão agregada medida (bytes/s)
+        self._cond = threading.Condition()
+        self._servidores = {}
+        self._credenciais = set()
+        self._esperando = 0
+        self._inicio_janela = time.monotonic()
+        self._bytes = 0
+        self._falhas = 0
+        self._sucessos = 0
+        self._vazao_anterior = 0.0
+        self._subiu = False
+
+    def _servidor(self, chave):
+        servidor = self._servidores.get(chave)
+        if servidor is None:
+            servidor = self._servidores[chave] = _Servidor(self.max_por_servidor)
+        return servidor
+
+    def _livre(self, servidor, credencial):
+        return (self.em_uso < self.limite and servidor.em_uso < servidor.limite
+                and credencial not in self._credenciais)
+
+    def entrar(self, url):
+        """Espera uma vaga global + do servidor + da credencial (sempre casar com sair)."""
+        credencial = chave_credencial(url)
+        with self._cond:
+            servidor = self._servidor(chave_host(url))
+            self._esperando += 1
+            while not self._livre(servidor, credencial):
+                self._cond.wait(timeout=self.janela)
+                self._ajustar()
+            self._esperando -= 1
+            self.em_uso += 1
+            servidor.em_uso += 1
+            if credencial:
+                self._credenciais.add(credencial)
+
+    def entrar_extra(self, url):
+        """
+        Conexão a mais para um download que já está rodando (segmentos). Não espera:
+        False se não houver folga global/no servidor, se tiver alguém na fila ou se a
+        URL for de credencial (uma conexão por usuário). True casa com sair(url).
+        """
+        if chave_credencial(url):
+            return False
+        with self._cond:
+            servidor = self._servidor(chave_host(url))
+            if self._esperando or self.em_uso >= self.limite or servidor.em_uso >= servidor.limite:
+                return False
+            self.em_uso += 1
+            servidor.em_uso += 1
+            return True
+
+    def sair(self, url):
+        with self._cond:
+            self.em_uso -= 1
+            self._servidor(chave_host(url)).em_uso -= 1
+            self._credenciais.discard(chave_credencial(url))
+            self._ajustar()
+            self._cond.notify_all()
+
+    @contextmanager
+    def vaga(self, url):
+        self.entrar(url)
+        try:
+            yield
+        finally:
+            self.sair(url)
+
+    def registrar_bytes(self, quantidade):
+        with self._cond:
+            self._bytes += quantidade
+            if self._ajustar():
+                self._cond.notify_all()
+
+    def sucesso(self, url):
+        with self._cond:
+            self._sucessos += 1
+            servidor = self._servidor(chave_host(url))
+            servidor.sucessos += 1
+            if servidor.sucessos >= SUCESSOS_PARA_SUBIR and servidor.limite < self.max_por_servidor:
+                servidor.limite += 1
+                servidor.sucessos = 0
+                self._cond.notify_all()
+
+    def falha(self, url):
+        """Timeout, erro de conexão, 403/429/5xx: o servidor está no limite dele."""
+        with self._cond:
+            self._falhas += 1
+            servidor = self._servidor(chave_host(url))
+            servidor.limite = 1
+            servidor.sucessos = 0
+
+    def _ajustar(self):
+        """Fecha a janela de medição, se já deu o tempo. Chamar com o lock. Devolve True se o limite mudou."""
+        agora = time.monotonic()
+        duracao = agora - self._inicio_janela
+        if duracao < self.janela:
+            return False
+        vazao = self._bytes / duracao
+        respostas = self._falhas + self._sucessos
+        antes = self.limite
+
+        if respostas and self._falhas / respostas > TAXA_ERRO_MAXIMA:
+            self.limite = max(self.minimo, int(self.limite * 0.75))
+            self._subiu = False
+        elif vazao >= self._vazao_anterior * (1 + GANHO_MINIMO) and self._esperando:
+            self.limite = min(self.maximo, self.limite + 1)
+            self._subiu = self.limite > antes
+        elif self._subiu:
+            self.limite = max(self.minimo, self.limite - 1)  # Subir não rendeu: desfaz
+            self._subiu = False
+
+        self.pico = max(self.pico, self.limite)
+        self.vazao_pico = max(self.vazao_pico, vazao)
+        self._vazao_anterior = vazao
+        self._inicio_janela = agora
+        self._bytes = self._falhas = self._sucessos = 0
+        return self.limite != antes
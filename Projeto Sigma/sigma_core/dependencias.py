@@ -0,0 +1,22 @@
+"""
+Checagem de dependências sem importá-las.
+
+importlib.util.find_spec só localiza o pacote no disco, então conferir
+curl_cffi/rich/tqdm no topo do script não custa o import pesado deles; o
+import de verdade acontece dentro da função que usa, na primeira chamada.
+"""
+import importlib.util
+import sys
+
+
+def faltando(*modulos):
+    return [m for m in modulos if importlib.util.find_spec(m) is None]
+
+
+def exigir(*modulos):
+    """Sai com a mesma mensagem de sempre se algum módulo não estiver instalado."""
+    ausentes = faltando(*modulos)
+    if ausentes:
+        print(f"❌ ERRO: Bibliotecas faltando: {', '.join(ausentes)}")
+        print(f"Execute no terminal: pip install {' '.join(ausentes)} --user")
+        sys.exit()
@@ -0,0 +1,69 @@
+"""
+Diário de execução em JSON lines (um registro por linha, só acrescenta).
+
+Cada linha sai inteira num único write + flush, então se o processo morrer no
+meio o pior caso é uma última linha cortada, que a leitura ignora. Uma rodada
+começa com {"tipo": "inicio"} e termina com {"tipo": "fim"}; sem o "fim" ela
+ficou pela metade e pode ser retomada a partir dos registros de item.
+"""
+import json
+import os
+import threading
+import time
+
+
+class DiarioExecucao:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._arquivo = None
+
+    def ler_rodada_interrompida(self):
+        """
+        Registros de item da última rodada, se ela não chegou ao "fim".
+        Devolve None quando não há nada para retomar.
+        """
+        if not os.path.exists(self.caminho):
+            return None
+        registros = None
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    continue  # Linha cortada por um kill no meio da escrita
+                tipo = registro.get("tipo")
+                if tipo == "inicio":
+                    registros = []
+                elif tipo == "fim":
+                    registros = None
+                elif tipo == "item" and registros is not None:
+                    registros.append(registro)
+        return registros
+
+    def abrir(self, retomando=False, **dados_inicio):
+        """Começa uma rodada nova (trunca o diário) ou continua a interrompida."""
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        self._arquivo = open(self.caminho, 'a' if retomando else 'w', encoding='utf-8')
+        self._escrever({"tipo": "retomada" if retomando else "inicio", **dados_inicio})
+
+    def registrar(self, **campos):
+        self._escrever({"tipo": "item", **campos})
+
+    def fechar(self, **dados_fim):
+        """Marca a rodada como completa. Sem chamar isso, a próxima execução retoma."""
+        if self._arquivo is None:
+            return
+        self._escrever({"tipo": "fim", **dados_fim})
+        with self._lock:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def _escrever(self, registro):
+        registro.setdefault("ts", round(time.time(), 3))
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._arquivo is None:
+                return
+            self._arquivo.write(linha)
+            self._arquivo.flush()
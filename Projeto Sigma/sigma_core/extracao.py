@@ -0,0 +1,83 @@
+"""
+Funções quentes de texto compartilhadas: nome de arquivo da fonte, limpeza
+de URL e extração do link M3U de um JSON de Dados-Brutos.
+Todas as regex são compiladas uma vez, na importação do módulo.
+"""
+import json
+import re
+
+REGEX_CARACTERES_PROIBIDOS = re.compile(r'[<>:"/\\|?*]')
+REGEX_URL = re.compile(r'(https?://[^\s<>"]+)')                 # URLs em texto corrido
+REGEX_URL_EM_JSON = re.compile(r'(https?://[^"\'\s\\]+)')       # URLs dentro de JSON serializado
+REGEX_URL_ENTRE_ASPAS = re.compile(r'(https?://[^"\'\s]+)')    # Idem, mantendo escapes (APKs)
+REGEX_URL_LIMPA = re.compile(r'(https?://[a-zA-Z0-9\.\-_:/?=&%@]+)')
+
+CHAVES_LINK_M3U = ['link_m3u', 'url', 'link', 'endereco', 'source', 'm3u']
+LIXO_URL = ['\\n', '\n', '\r', '\t', ' ']
+
+
+def limpar_nome_arquivo(nome):
+    try:
+        nome_ascii = nome.encode('ascii', 'ignore').decode('ascii')
+    except:
+        nome_ascii = "Nome_Desconhecido"
+    return REGEX_CARACTERES_PROIBIDOS.sub('', nome_ascii).strip().replace(" ", "_")
+
+
+def nome_arquivo_fonte(nome):
+    """Nome do JSON da fonte em Dados-Brutos"""
+    return f"{limpar_nome_arquivo(nome)}.json"
+
+
+def limpar_url(url):
+    if not url: return None
+    try: url = url.encode().decode('unicode_escape')
+    except: pass
+
+    for lixo in LIXO_URL:
+        url = url.replace(lixo, '')
+
+    match = REGEX_URL_LIMPA.search(url)
+    if match:
+        url_limpa = match.group(1)
+        if 'output=mpegts' in url_limpa:
+            return url_limpa.split('output=mpegts')[0] + 'output=mpegts'
+        if '.m3u8' in url_limpa:
+            return url_limpa.split('.m3u8')[0] + '.m3u8'
+        if '.m3u' in url_limpa:
+            return url_limpa.split('.m3u')[0] + '.m3u'
+        return url_limpa
+    return None
+
+
+def extrair_m3u_dos_dados(conteudo):
+    """Link M3U de um JSON já carregado (dict/list). None se não achar."""
+    if isinstance(conteudo, dict):
+        for k in CHAVES_LINK_M3U:
+            if k in conteudo:
+                limpo = limpar_url(conteudo[k])
+                if limpo: return limpo
+    elif isinstance(conteudo, list):
+        if conteudo and isinstance(conteudo[0], str) and conteudo[0].startswith('http'):
+            limpo = limpar_url(conteudo[0])
+            if limpo: return limpo
+    else:
+        return None
+
+    # Só serializa de novo quando as chaves diretas não resolveram
+    for url in REGEX_URL_EM_JSON.findall(json.dumps(conteudo)):
+        u_lower = url.lower()
+        if ('.m3u' in u_lower or 'get.php' in u_lower or 'mpegts' in u_lower) and 'aftv.news' not in u_lower:
+            limpo = limpar_url(url)
+            if limpo: return limpo
+    return None
+
+
+def extrair_m3u_do_json(caminho_arquivo):
+    """(link M3U ou None, conteúdo do JSON) — (None, None) se o arquivo não abrir"""
+    try:
+        with open(caminho_arquivo, 'r', encoding='utf-8') as f:
+            conteudo = json.load(f)
+        return extrair_m3u_dos_dados(conteudo), conteudo
+    except:
+        return None, None
@@ -0,0 +1,126 @@
+"""
+Diário de falhas de download em JSON lines (só acrescenta) + classificação.
+
+Cada falha vira uma linha no fim do arquivo, sem reler nem reescrever nada:
+o custo por falha é constante, não cresce com o histórico. O estado
+consolidado (última falha de cada fonte) é montado uma vez por rodada e o
+arquivo é compactado nessa hora, ficando com uma linha por fonte.
+
+Classes transitórias (timeout, queda de conexão, 5xx, 429...) voltam para a
+fila na mesma rodada com espera exponencial. Permanentes (DNS, 404, lista
+sem canais, arquivo gigante...) ficam suprimidas nas rodadas seguintes até
+o JSON da fonte mudar.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+from sigma_core.persistencia import salvar_texto_atomico
+
+# (classe, trecho da mensagem de erro do downloader) - a primeira que bater vale
+CLASSES_POR_MENSAGEM = (
+    ("dns", "dns error"),
+    ("timeout", "timeout"),
+    ("disjuntor", "disjuntor aberto"),
+    ("grande", "muito grande"),
+    ("grande", "excedeu"),
+    ("bloqueio", "bloqueio (html"),
+    ("api", "erro api"),
+    ("vazia", "sem canais"),
+    ("vazia", "muito pequeno"),
+    ("vazia", "arquivo vazio"),
+    ("incompleto", "incompleto"),
+    ("interrompido", "interrompido"),
+    ("fonte", "erro leitura json"),
+    ("conexao", "erro conexão"),
+    ("conexao", "erro:"),
+)
+REGEX_HTTP = re.compile(r'http (\d{3})', re.IGNORECASE)
+
+# "disjuntor" fica de fora das duas: o servidor só reabre depois de TEMPO_DISJUNTOR
+# (bem mais que a espera das retentativas), então a fonte volta na próxima rodada
+TRANSITORIAS = {"timeout", "conexao", "http_5xx", "http_429", "bloqueio", "incompleto"}
+PERMANENTES = {"dns", "http_404", "http_403", "http_410", "grande", "api", "vazia"}
+
+
+def classificar_falha(mensagem):
+    """Mensagem de erro do downloader -> classe ('timeout', 'http_404', 'dns', ...)"""
+    texto = (mensagem or "").lower()
+    http = REGEX_HTTP.search(texto)
+    if http and "erro http" in texto:
+        codigo = int(http.group(1))
+        return "http_5xx" if codigo >= 500 else f"http_{codigo}"
+    for classe, trecho in CLASSES_POR_MENSAGEM:
+        if trecho in texto:
+            return classe
+    return "outro"
+
+
+def eh_transitoria(classe):
+    return classe in TRANSITORIAS
+
+
+def eh_permanente(classe):
+    return classe in PERMANENTES
+
+
+class DiarioFalhas:
+    """
+    Uso:
+        DIARIO = DiarioFalhas("TXTs/falhas_download.jsonl")
+        estado = DIARIO.carregar()      # {fonte: último registro}, e compacta o arquivo
+        DIARIO.registrar(fonte, url=..., erro=..., classe=..., versao_fonte=...)
+        DIARIO.resolver(fonte)          # a fonte voltou a baixar
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self.estado = {}
+
+    def carregar(self):
+        """Lê o diário (linhas cortadas são ignoradas) e reescreve com uma linha por fonte."""
+        estado = {}
+        if os.path.exists(self.caminho):
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue
+                    if registro.get("resolvida"):
+                        estado.pop(registro.get("fonte"), None)
+                    elif registro.get("fonte"):
+                        estado[registro["fonte"]] = registro
+            salvar_texto_atomico(self.caminho, "".join(
+                json.dumps(r, ensure_ascii=False) + "\n" for r in estado.values()))
+        with self._lock:
+            self.estado = estado
+        return estado
+
+    def suprimida(self, fonte, versao_fonte):
+        """Falha permanente registrada para esta mesma versão do JSON da fonte?"""
+        with self._lock:
+            registro = self.estado.get(fonte)
+        return bool(registro and eh_permanente(registro.get("classe"))
+                    and versao_fonte and registro.get("versao_fonte") == versao_fonte)
+
+    def registrar(self, fonte, **campos):
+        registro = {"fonte": fonte, **campos, "ts": round(time.time(), 3)}
+        with self._lock:
+            self.estado[fonte] = registro
+            self._acrescentar(registro)
+
+    def resolver(self, fonte):
+        with self._lock:
+            if self.estado.pop(fonte, None) is not None:
+                self._acrescentar({"fonte": fonte, "resolvida": True, "ts": round(time.time(), 3)})
+
+    def _acrescentar(self, registro):
+        pasta = os.path.dirname(self.caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
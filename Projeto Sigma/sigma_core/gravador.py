@@ -0,0 +1,128 @@
+"""
+Gravador em segundo plano, com deduplicação, para Parcerias/ e Links_APKs.
+
+Quem minera só enfileira (caminho, linha) e segue em frente: nenhuma thread de
+mineração espera lock de arquivo. Uma única thread gravadora mantém um handle
+bufferizado aberto por arquivo de saída e descarrega quando o buffer passa de
+LIMITE_BYTES ou quando INTERVALO_DESCARGA segundos se passam.
+
+Deduplicação: cada arquivo tem um conjunto de hashes (blake2b de 8 bytes) das
+linhas que ele já contém. O próprio arquivo é o índice persistente: na
+primeira linha destinada a ele, o conteúdo existente é lido e hasheado uma vez.
+Assim o índice nunca fica desatualizado se outro script regerar o arquivo
+(o minerador regera a parte dele de Parcerias/ no fim da rodada).
+"""
+import atexit
+import hashlib
+import os
+import queue
+import threading
+import time
+
+# --- CONFIGURAÇÕES PADRÃO ---
+LIMITE_BYTES = 64 * 1024     # Descarrega o arquivo quando o buffer passa disso
+INTERVALO_DESCARGA = 2.0     # ...ou depois desse tempo, o que vier primeiro
+
+_FIM = object()
+
+
+def _hash_linha(linha):
+    return hashlib.blake2b(linha.encode('utf-8', 'ignore'), digest_size=8).digest()
+
+
+class _Destino:
+    def __init__(self, caminho):
+        self.vistas = set()
+        if os.path.exists(caminho):
+            with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+                self.vistas.update(_hash_linha(l.strip()) for l in f if l.strip())
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self.arquivo = open(caminho, 'a', encoding='utf-8', buffering=LIMITE_BYTES)
+        self.pendentes = 0
+
+
+class GravadorDeduplicado:
+    """
+    Uso:
+        GRAVADOR = GravadorDeduplicado()
+        GRAVADOR.gravar("TXTs/Links_APKs.txt", "[Fonte] http://...apk")
+        ...
+        GRAVADOR.fechar()   # também roda sozinho no atexit
+    """
+
+    def __init__(self, limite_bytes=LIMITE_BYTES, intervalo=INTERVALO_DESCARGA):
+        self.limite_bytes = limite_bytes
+        self.intervalo = intervalo
+        self.gravadas = 0      # Linhas novas escritas
+        self.repetidas = 0     # Linhas descartadas por já existirem no arquivo
+        self._fila = queue.Queue()
+        self._destinos = {}
+        self._fechado = False
+        self._lock_fechar = threading.Lock()
+        self._thread = threading.Thread(target=self._laco, name="GravadorDeduplicado", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def gravar(self, caminho, linha):
+        """Enfileira uma linha (sem quebra no fim). Não bloqueia."""
+        linha = linha.strip()
+        if linha:
+            self._fila.put((caminho, linha))
+
+    def fechar(self):
+        """Grava o que falta, fecha os arquivos e encerra a thread (idempotente)."""
+        with self._lock_fechar:
+            if self._fechado:
+                return
+            self._fechado = True
+        self._fila.put(_FIM)
+        self._thread.join()
+
+    def _laco(self):
+        ultima_descarga = time.monotonic()
+        while True:
+            try:
+                item = self._fila.get(timeout=self.intervalo)
+            except queue.Empty:
+                item = None
+
+            if item is _FIM:
+                break
+            if item is not None:
+                try: self._escrever(*item)
+                except Exception: pass
+
+            if time.monotonic() - ultima_descarga >= self.intervalo:
+                self._descarregar()
+                ultima_descarga = time.monotonic()
+
+        self._descarregar()
+        for destino in self._destinos.values():
+            try: destino.arquivo.close()
+            except Exception: pass
+        self._destinos.clear()
+
+    def _escrever(self, caminho, linha):
+        destino = self._destinos.get(caminho)
+        if destino is None:
+            destino = self._destinos[caminho] = _Destino(caminho)
+        chave = _hash_linha(linha)
+        if chave in destino.vistas:
+            self.repetidas += 1
+            return
+        destino.vistas.add(chave)
+        destino.arquivo.write(linha + "\n")
+        destino.pendentes += len(linha) + 1
+        self.gravadas += 1
+        if destino.pendentes >= self.limite_bytes:
+            destino.arquivo.flush()
+            destino.pendentes = 0
+
+    def _descarregar(self):
+        for destino in self._destinos.values():
+            if destino.pendentes:
+                try: destino.arquivo.flush()
+                except Exception: pass
+                destino.pendentes = 0
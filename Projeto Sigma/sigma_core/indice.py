@@ -0,0 +1,65 @@
+"""
+Índice lateral (sidecar) dos arquivos de Dados-Brutos.
+
+Guarda metadados pequenos por arquivo (validade, data da última atualização...)
+para que os scripts decidam o que fazer sem abrir e decodificar cada JSON.
+Formato em disco: { "Nome_Da_Fonte.json": { "expira": 1737436897.0, ... } }
+"""
+import os
+import threading
+
+from sigma_core.persistencia import carregar_json, salvar_json_atomico
+
+
+class IndiceFontes:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._registros = carregar_json(caminho, {})
+        if not isinstance(self._registros, dict):
+            self._registros = {}
+        self._sujo = False
+
+    def get(self, nome_arquivo):
+        with self._lock:
+            registro = self._registros.get(nome_arquivo)
+            return dict(registro) if registro else None
+
+    def atualizar(self, nome_arquivo, **campos):
+        with self._lock:
+            self._registros.setdefault(nome_arquivo, {}).update(campos)
+            self._sujo = True
+
+    def hash_confirmado(self, nome_arquivo, caminho):
+        """
+        Hash registrado do arquivo, desde que o arquivo no disco ainda seja o
+        mesmo (tamanho e mtime batem). Só faz stat, nunca lê o conteúdo.
+        Devolve None se não houver registro ou se o arquivo mudou por fora.
+        """
+        registro = self.get(nome_arquivo)
+        if not registro or not registro.get("hash"):
+            return None
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            return None
+        if st.st_size != registro.get("tamanho") or st.st_mtime != registro.get("mtime"):
+            return None
+        return registro["hash"]
+
+    def remover(self, nome_arquivo):
+        with self._lock:
+            if self._registros.pop(nome_arquivo, None) is not None:
+                self._sujo = True
+
+    def nomes(self):
+        with self._lock:
+            return list(self._registros)
+
+    def salvar(self):
+        """Grava só se algo mudou desde a última gravação."""
+        with self._lock:
+            if not self._sujo:
+                return
+            salvar_json_atomico(self.caminho, self._registros)
+            self._sujo = False
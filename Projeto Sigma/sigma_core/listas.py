@@ -0,0 +1,122 @@
+"""
+Listas M3U em Listas-Downloaded: texto puro (.m3u) ou comprimidas (.m3u.gz / .m3u.zst).
+
+Quem lê lista usa abrir_lista(): o formato vem dos bytes mágicos do arquivo,
+não da extensão, e o conteúdo sai em streaming (nada é descomprimido inteiro
+na memória). M3U é texto muito repetitivo, então gzip costuma render 5-8x e
+zstd um pouco mais, lendo bem mais rápido.
+
+zstd usa o módulo da biblioteca padrão (Python 3.14+) ou o pacote
+'zstandard'; sem nenhum dos dois só o gzip está disponível.
+"""
+import gzip
+import io
+import os
+
+SUFIXOS_COMPRESSAO = {"gzip": ".gz", "zstd": ".zst"}
+MAGICO_GZIP = b"\x1f\x8b"
+MAGICO_ZSTD = b"\x28\xb5\x2f\xfd"
+NIVEL_PADRAO = {"gzip": 6, "zstd": 10}
+BLOCO_COPIA = 1024 * 1024
+
+
+def _zstd():
+    """(módulo, é_da_stdlib) ou ImportError com a instrução de instalação"""
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd, True
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard, False
+    except ImportError:
+        raise ImportError("Compressão zstd requer o pacote 'zstandard' (pip install zstandard --user)")
+
+
+def compressao_disponivel(formato):
+    if formato == "zstd":
+        try: _zstd()
+        except ImportError: return False
+    return formato in (None, "gzip", "zstd")
+
+
+def extensao_lista(nome):
+    """'X_[data].m3u.gz' -> '.m3u.gz' (sufixo de compressão incluso)"""
+    base, ext = os.path.splitext(nome)
+    if ext in SUFIXOS_COMPRESSAO.values():
+        return os.path.splitext(base)[1] + ext
+    return ext
+
+
+def nome_sem_compressao(nome):
+    """'X.m3u.gz' -> 'X.m3u' (nomes sem compressão voltam iguais)"""
+    base, ext = os.path.splitext(nome)
+    return base if ext in SUFIXOS_COMPRESSAO.values() else nome
+
+
+def eh_lista(nome, extensoes=(".m3u",)):
+    return nome_sem_compressao(nome).endswith(extensoes)
+
+
+def formato_lista(caminho):
+    """'gzip', 'zstd' ou None (texto puro), pelos bytes mágicos"""
+    with open(caminho, 'rb') as f:
+        magico = f.read(4)
+    if magico[:2] == MAGICO_GZIP: return "gzip"
+    if magico == MAGICO_ZSTD: return "zstd"
+    return None
+
+
+def abrir_lista_binaria(caminho, formato=None):
+    """Bytes da lista já descomprimidos (para hash/cópia)."""
+    formato = formato or formato_lista(caminho)
+    if not formato:
+        return open(caminho, 'rb')
+    return _abrir_binario(caminho, formato)
+
+
+def _abrir_binario(caminho, formato):
+    if formato == "gzip":
+        return gzip.open(caminho, 'rb')
+    modulo, stdlib = _zstd()
+    if stdlib:
+        return modulo.open(caminho, 'rb')
+    return modulo.open(caminho, 'rb', dctx=modulo.ZstdDecompressor())
+
+
+def abrir_lista(caminho, encoding='utf-8', errors='ignore'):
+    """Abre uma lista para leitura em texto, comprimida ou não (use com `with`)."""
+    formato = formato_lista(caminho)
+    if not formato:
+        return open(caminho, 'r', encoding=encoding, errors=errors)
+    return io.TextIOWrapper(_abrir_binario(caminho, formato), encoding=encoding, errors=errors)
+
+
+def tamanho_lista(caminho):
+    """Tamanho do texto da lista (descomprimido), para os filtros de 'lista muito pequena'."""
+    formato = formato_lista(caminho)
+    if not formato:
+        return os.path.getsize(caminho)
+    if formato == "gzip":
+        # gzip guarda o tamanho original (mod 4 GB) nos 4 últimos bytes
+        with open(caminho, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), 'little')
+    total = 0
+    with _abrir_binario(caminho, formato) as f:
+        while True:
+            bloco = f.read(BLOCO_COPIA)
+            if not bloco: return total
+            total += len(bloco)
+
+
+def abrir_escrita_lista(caminho, compressao, nivel=None):
+    """Arquivo binário de escrita que comprime no formato pedido (gzip/zstd)."""
+    nivel = nivel or NIVEL_PADRAO[compressao]
+    if compressao == "gzip":
+        return gzip.open(caminho, 'wb', compresslevel=nivel)
+    modulo, stdlib = _zstd()
+    if stdlib:
+        return modulo.open(caminho, 'wb', level=nivel)
+    return modulo.open(caminho, 'wb', cctx=modulo.ZstdCompressor(level=nivel))
@@ -0,0 +1,113 @@
+"""
+Leitura incremental de listas M3U: os blocos de bytes chegam em qualquer
+tamanho (download, hash, cópia) e as linhas são montadas aos poucos, sem
+nunca ter a lista inteira na memória.
+
+O downloader alimenta o analisador com os próprios chunks da rede, então
+contagem de canais, grupos, servidor e o diagnóstico (M3U/HTML/JSON/truncada)
+saem de graça no fim do download e vão para o manifesto da lista. Nenhum
+script depois precisa reabrir o arquivo para saber se ele presta.
+"""
+import re
+from urllib.parse import urlparse
+
+REGEX_GRUPO = re.compile(rb'group-title="([^"]*)"', re.IGNORECASE)
+SEM_GRUPO = "Sem Grupo"
+MAX_LINHA = 64 * 1024   # Linha maior que isso (HTML/lixo sem quebra) só guarda o começo
+
+
+def servidor_base(url):
+    """'http://painel.com:8080/get.php?...' -> 'http://painel.com:8080'"""
+    try:
+        partes = urlparse(url.strip())
+        if not partes.netloc: return None
+        return f"{partes.scheme}://{partes.netloc}"
+    except ValueError:
+        return None
+
+
+def formato_inicio(linha):
+    """Diagnóstico pela primeira linha não vazia: 'm3u', 'html', 'json' ou 'desconhecido'"""
+    linha = linha.lstrip(b"\xef\xbb\xbf").strip().lower()  # Sem BOM
+    if linha.startswith(b"#extm3u") or linha.startswith(b"#extinf"):
+        return "m3u"
+    if linha.startswith(b"<") and (b"html" in linha or b"doctype" in linha or b"<head" in linha):
+        return "html"
+    if linha.startswith((b"{", b"[")):
+        return "json"
+    return "desconhecido"
+
+
+class EstatisticasM3U:
+    """
+    Uso:
+        stats = EstatisticasM3U()
+        for bloco in blocos: stats.alimentar(bloco)
+        stats.finalizar()
+        # -> {"formato": "m3u", "entradas": 1234, "servidor": "http://...",
+        #     "grupos": {"Filmes": 800, ...}, "truncada": False}
+    """
+
+    def __init__(self):
+        self.formato = None    # Definido pela primeira linha não vazia
+        self.entradas = 0      # Linhas #EXTINF
+        self.servidor = None   # Servidor base do primeiro link da lista
+        self.grupos = {}       # group-title -> quantidade de entradas
+        self._pendente = False # Último #EXTINF ainda sem link
+        self._resto = bytearray()  # Linha incompleta: espera o próximo bloco (até MAX_LINHA)
+
+    def alimentar(self, bloco):
+        linhas = bloco.split(b"\n")
+        if len(linhas) == 1:
+            # Sem quebra no bloco: só acumula (cópia limitada, nunca o resto inteiro de novo)
+            self._acumular(bloco)
+            return
+        if self._resto:
+            self._acumular(linhas[0])
+            linhas[0] = bytes(self._resto)
+            self._resto.clear()
+        self._acumular(linhas.pop())
+        for linha in linhas:
+            self._linha(linha)
+
+    def _acumular(self, parte):
+        falta = MAX_LINHA - len(self._resto)
+        if falta > 0:
+            self._resto += parte[:falta]
+
+    def _linha(self, linha):
+        linha = linha.strip()
+        if not linha:
+            return
+        if self.formato is None:
+            self.formato = formato_inicio(linha)
+        if linha.startswith(b"#EXTINF"):
+            self.entradas += 1
+            self._pendente = True
+            grupo = REGEX_GRUPO.search(linha)
+            nome = grupo.group(1).decode('utf-8', 'ignore').strip() if grupo else SEM_GRUPO
+            self.grupos[nome] = self.grupos.get(nome, 0) + 1
+        elif not linha.startswith(b"#"):
+            self._pendente = False
+            if self.servidor is None and linha.startswith(b"http"):
+                self.servidor = servidor_base(linha.decode('utf-8', 'ignore'))
+
+    def finalizar(self):
+        if self._resto:
+            self._linha(bytes(self._resto))
+            self._resto.clear()
+        return {
+            "formato": self.formato or "vazia",
+            "entradas": self.entradas,
+            "servidor": self.servidor,
+            "grupos": self.grupos,
+            # Terminou num #EXTINF sem link: a conexão caiu no meio da lista
+            "truncada": self._pendente,
+        }
+
+
+def lista_valida(entrada):
+    """Entrada do armazém/índice com canais de verdade (as antigas, sem análise, pelo tamanho)."""
+    if "entradas" not in entrada:
+        return entrada.get("tamanho", 0) > 2048
+    return entrada.get("formato") not in ("html", "json") and entrada["entradas"] > 0
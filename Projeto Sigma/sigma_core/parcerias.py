@@ -0,0 +1,133 @@
+"""
+Detecção de linhas de parceria (app + credencial), montada uma vez por processo.
+
+Antes cada linha passava por ~50 testes `chave in linha.upper()` e depois por
+um `any()` com as palavras de credencial, tudo em Python linha a linha. Aqui
+o bloco inteiro de uma resposta vira um texto só (um upper()), cada chave é
+procurada nele com str.find (varredura em C) e as ocorrências são mapeadas de
+volta para as linhas por bisect. A regex de credencial só roda nas poucas
+linhas que citam algum app.
+
+Regra de desempate mantida: quando a linha cita mais de um app, vence o que
+vem primeiro no dicionário (mesmo resultado do laço antigo com `break`).
+"""
+import operator
+import re
+from bisect import bisect_right
+from itertools import accumulate, repeat
+
+APPS_PARCERIA = {
+    # --- APLICATIVOS FAMOSOS (TV BOX/ANDROID) ---
+    "ASSIST": "Assist_Plus_Play_Sim",
+    "PLAY SIM": "Assist_Plus_Play_Sim",
+    "LAZER": "Lazer_Play",
+    "VIZZION": "Vizzion",
+    "UNITV": "UniTV",
+    "UNI TV": "UniTV",
+    "XCLOUD": "XCloud_TV",
+    "P2P": "Codigos_P2P_Geral",
+    "SMARTERS": "IPTV_Smarters_DNS",
+    "XCIPTV": "XCIPTV_Dados",
+    "SSIPTV": "SSIPTV_Playlist",
+    "NETRANGE": "NetRange",
+    "CLOUDDY": "Clouddy_App",
+    "IBO": "IBO_Player",
+    "DUPLEX": "Duplex_Play",
+
+    # --- SERVIÇOS PREMIUM ---
+    "EAGLE": "Eagle_TV",
+    "FLASH": "Flash_P2P",
+    "TVE": "TV_Express",
+    "TV EXPRESS": "TV_Express",
+    "MY FAMILY": "MyFamily_Cinema",
+    "MFC": "MyFamily_Cinema",
+    "REDPLAY": "RedPlay",
+    "BTV": "BTV_Codes",
+    "HTV": "HTV_Codes",
+    "YOUCINE": "YouCine",
+    "BLUE": "Blue_TV",
+
+    # --- SERVIDORES ESPECÍFICOS (Que apareceram nos JSONs) ---
+    "UCAST": "UCast_App",
+    "ALPHA": "Alpha_Master_App",
+    "WAVE": "Wave_App",
+    "TITÃ": "Tita_App",
+    "ATENA": "Atena_App",
+    "ANDRÔMEDA": "Andromeda_App",
+    "SOLAR": "Solar_App",
+    "FIRE": "Fire_App",
+    "LUNAR": "Lunar_App",
+    "GALAXY": "Galaxy_App",
+    "OLYMPUS": "Olympus_App",
+    "SPEED": "Speed_App",
+    "SEVEN": "Seven_App",
+    "SKY": "Sky_Alternative_App",
+    "HADES": "Hades_App",
+    "VÊNUS": "Venus_App",
+    "URANO": "Urano_App",
+    "K9": "K9_Play",
+    "CINEMAX": "Cinemax_App",
+    "GREEN": "Green_TV",
+    "GTA": "GTA_Player"
+}
+
+# Palavras que indicam que a linha carrega credencial (usadas pelo minerador)
+PALAVRAS_CREDENCIAL = ["CÓDIGO", "CODIGO", "USUÁRIO", "USER", "SENHA", "PASS", "PIN", "DNS", "URL"]
+
+
+class ClassificadorParcerias:
+    """
+    Uso:
+        for indice, app in CLASSIFICADOR.classificar_linhas(linhas).items(): ...
+
+    As chaves são comparadas em maiúsculas, então dicionários com chaves
+    "Assist"/"Play Sim" funcionam igual aos com "ASSIST"/"PLAY SIM".
+    """
+
+    def __init__(self, apps=APPS_PARCERIA, palavras_credencial=PALAVRAS_CREDENCIAL):
+        # chave em maiúsculas -> (posição no dicionário, nome do app), já na ordem de prioridade
+        self._prioridade = {}
+        for posicao, (chave, app) in enumerate(apps.items()):
+            self._prioridade.setdefault(chave.upper(), (posicao, app))
+        self._regex_credencial = re.compile("|".join(re.escape(p.upper()) for p in palavras_credencial))
+
+    def classificar(self, linha):
+        """Uma linha avulsa: (app de maior prioridade ou None, tem palavra de credencial?)"""
+        linha_upper = linha.upper()
+        app = next((app for chave, (_, app) in self._prioridade.items() if chave in linha_upper), None)
+        return app, self._regex_credencial.search(linha_upper) is not None
+
+    def classificar_linhas(self, linhas, todos=False):
+        """
+        Linhas do bloco que citam app E credencial: {índice: app}, em ordem de
+        linha. Com todos=True o valor é a lista de todos os apps citados (sem
+        repetir, na ordem do dicionário).
+        """
+        texto = "\n".join(linhas).upper()
+        # Offsets saem do texto já convertido: upper() pode mudar o tamanho ("ß" -> "SS")
+        linhas_upper = texto.split("\n")
+        fins = list(accumulate(map(operator.add, map(len, linhas_upper), repeat(1))))
+
+        achados = {}
+        for chave, prioridade in self._prioridade.items():
+            pos = texto.find(chave)
+            while pos != -1:
+                indice = bisect_right(fins, pos)
+                if todos:
+                    achados.setdefault(indice, set()).add(prioridade)
+                elif indice not in achados or prioridade < achados[indice]:
+                    achados[indice] = prioridade
+                pos = texto.find(chave, pos + 1)
+
+        resultado = {}
+        for indice in sorted(achados):
+            if not self._regex_credencial.search(linhas_upper[indice]): continue
+            if todos:
+                resultado[indice] = list(dict.fromkeys(app for _, app in sorted(achados[indice])))
+            else:
+                resultado[indice] = achados[indice][1]
+        return resultado
+
+
+# Instância padrão (dicionário e palavras do minerador), montada uma vez por processo
+CLASSIFICADOR = ClassificadorParcerias()
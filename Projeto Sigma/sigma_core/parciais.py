@@ -0,0 +1,146 @@
+"""
+Downloads parciais retomáveis com HTTP Range.
+
+Um download interrompido (timeout, Ctrl+C, tecla Z) deixa em <pasta>/<chave>.part
+os bytes já recebidos e, ao lado, <chave>.json com a URL e os validadores da
+resposta (ETag/Last-Modified/tamanho total). Na próxima tentativa o pedido sai
+com `Range: bytes=N-` + `If-Range: <validador>`:
+  - 206 com Content-Range começando em N -> continua acrescentando no .part
+  - 200 -> o servidor ignorou o Range ou o arquivo mudou: recomeça do zero
+
+Sem validador forte não há como saber se os bytes guardados ainda valem, então
+esse parcial nem é mantido. O mesmo vale para respostas comprimidas
+(Content-Encoding): o offset do Range é do corpo comprimido, não do que foi gravado.
+"""
+import os
+import re
+import time
+
+from sigma_core.persistencia import carregar_json, salvar_json_atomico
+
+REGEX_CONTENT_RANGE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)', re.IGNORECASE)
+
+
+def ler_content_range(valor):
+    """'bytes 100-199/1000' -> (100, 1000). Total desconhecido ('*') vira 0."""
+    match = REGEX_CONTENT_RANGE.match((valor or "").strip())
+    if not match:
+        return None, 0
+    total = match.group(3)
+    return int(match.group(1)), (int(total) if total != "*" else 0)
+
+
+def validador_if_range(meta):
+    """ETag forte ou, na falta dele, Last-Modified (If-Range não aceita ETag fraco)"""
+    etag = meta.get("etag") or ""
+    if etag and not etag.startswith("W/"):
+        return etag
+    return meta.get("last_modified") or None
+
+
+def limpar_parciais_antigos(pasta, validade):
+    """Apaga parciais (e seus .json) sem uso há mais de `validade` segundos"""
+    if not os.path.isdir(pasta):
+        return
+    limite = time.time() - validade
+    for nome in os.listdir(pasta):
+        caminho = os.path.join(pasta, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass
+
+
+class DownloadParcial:
+    """
+    Uso (dentro de uma função de download):
+        parcial = DownloadParcial(PASTA_PARCIAIS, nome_base)
+        resp = s.get(url, headers=parcial.cabecalhos(url), stream=True)
+        if not parcial.aceitar(url, resp.status_code, resp.headers): ...  # 206 incoerente
+        with parcial.abrir() as f: ...
+        ARMAZEM.guardar(nome_base, parcial.caminho, url)   # o .part completo vira blob do armazém
+        parcial.descartar()   # sobra só o .json de validadores (ou o conteúdo não presta)
+    """
+
+    def __init__(self, pasta, chave):
+        self.pasta = pasta
+        self.chave = chave
+        self.caminho = os.path.join(pasta, f"{chave}.part")
+        self.caminho_meta = os.path.join(pasta, f"{chave}.json")
+        self.offset = 0      # Bytes do .part que a resposta atual continua
+        self.total = 0       # Tamanho final esperado (0 = desconhecido)
+        self._pedido = 0     # Offset pedido no Range (0 = sem Range)
+
+    @property
+    def tamanho_atual(self):
+        try: return os.path.getsize(self.caminho)
+        except OSError: return 0
+
+    def cabecalhos(self, url):
+        """Range + If-Range quando há parcial válido desta URL; senão {} (e limpa o que sobrou)."""
+        meta = carregar_json(self.caminho_meta, None)
+        tamanho = self.tamanho_atual
+        validador = validador_if_range(meta) if meta and meta.get("url") == url else None
+        if not (validador and tamanho):
+            self.descartar()
+            self._pedido = 0
+            return {}
+        self._pedido = tamanho
+        return {"Range": f"bytes={tamanho}-", "If-Range": validador}
+
+    def aceitar(self, url, status, headers):
+        """
+        Confere a resposta (200 ou 206) e guarda os validadores dela.
+        Devolve False se for um 206 que não continua exatamente o .part.
+        """
+        if status == 206:
+            inicio, total = ler_content_range(headers.get('content-range'))
+            if not self._pedido or inicio != self._pedido:
+                self.descartar()
+                return False
+            self.offset, self.total = inicio, total
+        else:
+            self.offset = 0
+            self.total = int(headers.get('content-length') or 0)
+
+        meta = {
+            "url": url,
+            "etag": headers.get('etag'),
+            "last_modified": headers.get('last-modified'),
+            "total": self.total,
+        }
+        comprimido = (headers.get('content-encoding') or "identity").lower() != "identity"
+        if validador_if_range(meta) and not comprimido:
+            salvar_json_atomico(self.caminho_meta, meta)
+        else:
+            self._remover(self.caminho_meta)  # Sem como retomar: o .part some no fim
+        return True
+
+    def abrir(self):
+        """Arquivo binário posicionado no offset aceito (acrescenta ou recomeça)."""
+        os.makedirs(self.pasta, exist_ok=True)
+        if self.offset:
+            arquivo = open(self.caminho, 'r+b')
+            arquivo.seek(self.offset)
+            arquivo.truncate()
+            return arquivo
+        return open(self.caminho, 'wb')
+
+    @property
+    def retomavel(self):
+        return os.path.exists(self.caminho_meta)
+
+    def encerrar_incompleto(self):
+        """Download parou no meio: mantém o .part só se der para retomar depois."""
+        if not self.retomavel:
+            self.descartar()
+
+    def descartar(self):
+        self._remover(self.caminho)
+        self._remover(self.caminho_meta)
+
+    @staticmethod
+    def _remover(caminho):
+        try: os.remove(caminho)
+        except OSError: pass
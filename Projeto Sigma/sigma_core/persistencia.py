@@ -0,0 +1,40 @@
+"""
+Leitura e gravação de arquivos de estado (JSON) usados entre execuções.
+
+A gravação é atômica: escreve num .tmp ao lado e troca com os.replace, então
+um Ctrl+C no meio nunca deixa o arquivo pela metade.
+"""
+import json
+import os
+
+
+def carregar_json(caminho, padrao=None):
+    """Lê um JSON de estado; devolve `padrao` se não existir ou estiver corrompido."""
+    if not os.path.exists(caminho):
+        return padrao
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return padrao
+
+
+def salvar_json_atomico(caminho, dados, indent=None):
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    caminho_tmp = caminho + ".tmp"
+    with open(caminho_tmp, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=indent, ensure_ascii=False)
+    os.replace(caminho_tmp, caminho)
+
+
+def salvar_texto_atomico(caminho, texto):
+    """Mesma troca atômica, para arquivos de texto gerados por inteiro."""
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    caminho_tmp = caminho + ".tmp"
+    with open(caminho_tmp, 'w', encoding='utf-8') as f:
+        f.write(texto)
+    os.replace(caminho_tmp, caminho)
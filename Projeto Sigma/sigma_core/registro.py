@@ -0,0 +1,136 @@
+"""
+Registro de eventos e logs em segundo plano, comum a todos os scripts Sigma.
+
+Quem registra só enfileira e segue: nenhuma thread de download/mineração
+abre arquivo, espera lock de log ou faz fsync. Uma única thread registradora
+pega tudo o que estiver na fila de uma vez (group commit), escreve cada
+arquivo de destino num write só e descarrega. Numa tempestade de erros o lote
+simplesmente fica maior; o caminho quente não sente.
+
+Dois tipos de saída:
+  evento(etapa, **campos)  -> uma linha JSON no arquivo de eventos do script
+                              ({"ts": ..., "etapa": "download", "fonte": ..., ...})
+  texto(caminho, texto)    -> texto livre acrescentado a um arquivo qualquer
+                              (erros_download.txt, LOG_<grupo>.txt...)
+
+Durabilidade configurável: fsync=False (padrão) só dá flush no fim de cada
+lote; fsync=True faz um fsync por arquivo por lote, nunca por linha.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+# --- CONFIGURAÇÕES PADRÃO ---
+LOTE_MAXIMO = 1000           # Itens por lote (o que estiver na fila até isso sai junto)
+MAX_ARQUIVOS_ABERTOS = 32    # Handles mantidos abertos (LRU); LOG_<grupo>.txt podem ser centenas
+
+_FIM = object()
+
+
+class RegistroEventos:
+    """
+    Uso:
+        REGISTRO = RegistroEventos("TXTs/eventos_download.jsonl", fsync=True)
+        REGISTRO.evento("download", fonte="X", status="erro", classe="timeout")
+        REGISTRO.texto("TXTs/erros_download.txt", "[12:00:00] X | TIMEOUT\\n")
+        ...
+        REGISTRO.fechar()   # também roda sozinho no atexit
+    """
+
+    def __init__(self, caminho_eventos=None, fsync=False, lote=LOTE_MAXIMO,
+                 max_abertos=MAX_ARQUIVOS_ABERTOS):
+        self.caminho_eventos = caminho_eventos
+        self.fsync = fsync
+        self.lote = lote
+        self.max_abertos = max_abertos
+        self.registrados = 0   # Itens escritos
+        self.lotes = 0         # Escritas em grupo (registrados / lotes = tamanho médio do lote)
+        self._fila = queue.Queue()
+        self._abertos = OrderedDict()
+        self._fechado = False
+        self._lock_fechar = threading.Lock()
+        self._thread = threading.Thread(target=self._laco, name="RegistroEventos", daemon=True)
+        self._thread.start()
+        atexit.register(self.fechar)
+
+    def evento(self, etapa, **campos):
+        """Enfileira um evento estruturado. Não bloqueia."""
+        if self.caminho_eventos:
+            registro = {"ts": round(time.time(), 3), "etapa": etapa, **campos}
+            self._fila.put((self.caminho_eventos, json.dumps(registro, ensure_ascii=False) + "\n"))
+
+    def texto(self, caminho, texto):
+        """Enfileira texto livre para o fim de `caminho`. Não bloqueia."""
+        if texto:
+            self._fila.put((caminho, texto))
+
+    def fechar(self):
+        """Escreve o que falta, fecha os arquivos e encerra a thread (idempotente)."""
+        with self._lock_fechar:
+            if self._fechado:
+                return
+            self._fechado = True
+        self._fila.put(_FIM)
+        self._thread.join()
+
+    def _laco(self):
+        fim = False
+        while not fim:
+            itens = [self._fila.get()]
+            # Group commit: tudo o que acumulou enquanto o lote anterior era gravado
+            while len(itens) < self.lote:
+                try: itens.append(self._fila.get_nowait())
+                except queue.Empty: break
+            if _FIM in itens:
+                fim = True
+                itens = [item for item in itens if item is not _FIM]
+            try: self._gravar_lote(itens)
+            except Exception: pass
+
+        for arquivo in self._abertos.values():
+            try: arquivo.close()
+            except Exception: pass
+        self._abertos.clear()
+
+    def _gravar_lote(self, itens):
+        if not itens:
+            return
+        por_arquivo = OrderedDict()
+        for caminho, texto in itens:
+            por_arquivo.setdefault(caminho, []).append(texto)
+        for caminho, textos in por_arquivo.items():
+            try:
+                arquivo = self._arquivo(caminho)
+                arquivo.write("".join(textos))
+                arquivo.flush()
+                if self.fsync:
+                    os.fsync(arquivo.fileno())
+            except Exception:
+                self._fechar_arquivo(caminho)
+        self.registrados += len(itens)
+        self.lotes += 1
+
+    def _arquivo(self, caminho):
+        arquivo = self._abertos.get(caminho)
+        if arquivo is not None:
+            self._abertos.move_to_end(caminho)
+            return arquivo
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        arquivo = self._abertos[caminho] = open(caminho, 'a', encoding='utf-8')
+        while len(self._abertos) > self.max_abertos:
+            _, antigo = self._abertos.popitem(last=False)
+            try: antigo.close()
+            except Exception: pass
+        return arquivo
+
+    def _fechar_arquivo(self, caminho):
+        arquivo = self._abertos.pop(caminho, None)
+        if arquivo is not None:
+            try: arquivo.close()
+            except Exception: pass
@@ -0,0 +1,159 @@
+"""
+Download segmentado: várias conexões HTTP Range no mesmo arquivo, como o IDM.
+
+A primeira resposta (GET normal, já validada pelo downloader) vira o segmento
+0 e é lida só até o fim da faixa dela; as outras faixas saem em paralelo,
+cada uma na sua thread, com `Range: bytes=ini-fim` + `If-Range`. Todas gravam
+direto na posição certa de um .part pré-alocado com o tamanho final, então
+não existe etapa de juntar pedaços.
+
+Só vale quando o servidor anuncia `Accept-Ranges: bytes`, manda
+Content-Length e não comprime a resposta; fora disso o downloader segue com
+uma conexão só. Faixa que falhar é tentada de novo, em sequência, pela thread
+principal. Se ainda assim faltar algo, o .part é cortado no maior trecho
+contínuo desde o byte 0: é exatamente o que a retomada por Range
+(sigma_core.parciais) sabe continuar.
+"""
+import threading
+
+from sigma_core.parciais import ler_content_range, validador_if_range
+
+# --- CONFIGURAÇÕES PADRÃO ---
+TAMANHO_MINIMO = 8 * 1024 * 1024            # Abaixo disso o handshake extra não compensa
+TAMANHO_MINIMO_SEGMENTO = 2 * 1024 * 1024
+MAX_SEGMENTOS = 4
+BLOCO_LEITURA = 64 * 1024
+
+
+def validador_resposta(headers):
+    """ETag forte/Last-Modified da resposta, para o If-Range das outras faixas."""
+    return validador_if_range({"etag": headers.get('etag'), "last_modified": headers.get('last-modified')})
+
+
+def aceita_segmentos(status, headers):
+    """
+    Resposta 200 inteira, de tamanho conhecido, sem compressão, com Range anunciado
+    e validador (sem ele uma faixa poderia vir de outra versão da lista).
+    """
+    return (status == 200
+            and int(headers.get('content-length') or 0) > 0
+            and (headers.get('accept-ranges') or "").lower() == "bytes"
+            and (headers.get('content-encoding') or "identity").lower() == "identity"
+            and bool(validador_resposta(headers)))
+
+
+def quantos_segmentos(total, maximo=MAX_SEGMENTOS):
+    """1 = não vale segmentar."""
+    if total < TAMANHO_MINIMO:
+        return 1
+    return max(1, min(maximo, total // TAMANHO_MINIMO_SEGMENTO))
+
+
+def planejar_faixas(total, segmentos):
+    """[(inicio, fim)] com fim inclusivo (como no cabeçalho Range), cobrindo 0..total-1."""
+    passo = -(-total // segmentos)
+    return [(inicio, min(total, inicio + passo) - 1) for inicio in range(0, total, passo)]
+
+
+class _Faixa:
+    def __init__(self, inicio, fim):
+        self.inicio = inicio
+        self.fim = fim
+        self.feito = 0       # Bytes já gravados a partir de `inicio`
+        self.erro = None
+
+    @property
+    def completa(self):
+        return self.inicio + self.feito > self.fim
+
+
+class DownloadSegmentado:
+    """
+    Uso:
+        seg = DownloadSegmentado(parcial.caminho, total, faixas, abrir_faixa,
+                                 ao_receber=bar.update, parar=lambda: PARAR_EXECUCAO)
+        prontos = seg.executar(primeiro_chunk, response.iter_content(chunk_size=64*1024))
+        # prontos == total -> arquivo completo; senão o .part ficou com os `prontos` primeiros bytes
+
+    `abrir_faixa(inicio, fim)` é um context manager que devolve a resposta do
+    GET com Range daquela faixa (quem chama cuida de sessão/limitador).
+    """
+
+    def __init__(self, caminho, total, faixas, abrir_faixa, ao_receber=None, parar=None):
+        self.caminho = caminho
+        self.total = total
+        self.faixas = [_Faixa(inicio, fim) for inicio, fim in faixas]
+        self.abrir_faixa = abrir_faixa
+        self.ao_receber = ao_receber
+        self.parar = parar or (lambda: False)
+        self._lock = threading.Lock()
+
+    def executar(self, primeiro_chunk, blocos):
+        """Baixa tudo e devolve quantos bytes contínuos desde o início ficaram gravados."""
+        with open(self.caminho, 'wb') as f:
+            f.truncate(self.total)  # Pré-aloca: cada faixa escreve na sua posição
+
+        threads = [threading.Thread(target=self._baixar_faixa, args=(faixa,), daemon=True)
+                   for faixa in self.faixas[1:]]
+        for t in threads:
+            t.start()
+        try:
+            self._gravar(self.faixas[0], self._encadear(primeiro_chunk, blocos))
+        except Exception as e:
+            self.faixas[0].erro = f"Faixa 0-{self.faixas[0].fim}: {str(e)[:60]}"
+        for t in threads:
+            t.join()
+
+        # Faixa que caiu (servidor recusou a conexão extra, timeout...): mais uma vez, sem paralelo
+        for faixa in self.faixas:
+            if not faixa.completa and not self.parar():
+                faixa.erro = None
+                self._baixar_faixa(faixa)
+
+        prontos = self._prefixo_contiguo()
+        if prontos < self.total:
+            with open(self.caminho, 'r+b') as f:
+                f.truncate(prontos)
+        return prontos
+
+    @staticmethod
+    def _encadear(primeiro, blocos):
+        yield primeiro
+        yield from blocos
+
+    def _baixar_faixa(self, faixa):
+        inicio = faixa.inicio + faixa.feito
+        try:
+            with self.abrir_faixa(inicio, faixa.fim) as resposta:
+                comeco, _ = ler_content_range(resposta.headers.get('content-range'))
+                if resposta.status_code != 206 or comeco != inicio:
+                    # 200 aqui = o arquivo mudou (If-Range) ou o Range foi ignorado
+                    faixa.erro = f"Faixa {inicio}-{faixa.fim}: HTTP {resposta.status_code}"
+                    return
+                self._gravar(faixa, resposta.iter_content(chunk_size=BLOCO_LEITURA))
+        except Exception as e:
+            faixa.erro = f"Faixa {inicio}-{faixa.fim}: {str(e)[:60]}"
+
+    def _gravar(self, faixa, blocos):
+        """Grava os blocos na posição da faixa, sem passar do fim dela."""
+        with open(self.caminho, 'r+b') as f:
+            f.seek(faixa.inicio + faixa.feito)
+            for bloco in blocos:
+                if self.parar() or faixa.completa:
+                    break
+                if not bloco:
+                    continue
+                bloco = bloco[:faixa.fim + 1 - faixa.inicio - faixa.feito]
+                f.write(bloco)
+                faixa.feito += len(bloco)
+                if self.ao_receber:
+                    with self._lock:
+                        self.ao_receber(len(bloco))
+
+    def _prefixo_contiguo(self):
+        prontos = 0
+        for faixa in self.faixas:
+            prontos = faixa.inicio + faixa.feito
+            if not faixa.completa:
+                break
+        return min(prontos, self.total)
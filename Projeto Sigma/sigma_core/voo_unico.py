@@ -0,0 +1,81 @@
+"""
+"Voo único" (single-flight) por chave, para threads.
+
+Quando vários workers pedem a mesma chave (ex.: a mesma URL de lista), só o
+primeiro executa; os outros esperam o resultado dele. O resultado fica
+guardado até o fim da rodada, então quem chegar depois também não repete a
+transferência.
+"""
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+PORTAS_PADRAO = {"http": 80, "https": 443}
+
+
+def normalizar_url(url):
+    """
+    Chave canônica de uma URL: esquema/host em minúsculas, sem porta padrão,
+    sem fragmento e com os parâmetros da query em ordem.
+    """
+    try:
+        partes = urlsplit(url.strip())
+        esquema = partes.scheme.lower()
+        host = (partes.hostname or "").lower()
+        if partes.port and partes.port != PORTAS_PADRAO.get(esquema):
+            host = f"{host}:{partes.port}"
+        if partes.username:
+            host = f"{partes.username}:{partes.password or ''}@{host}"
+        query = urlencode(sorted(parse_qsl(partes.query, keep_blank_values=True)))
+        return urlunsplit((esquema, host, partes.path or "/", query, ""))
+    except ValueError:
+        return url
+
+
+class _Voo:
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class VooUnico:
+    """
+    Uso:
+        resultado, fui_eu = VOO.executar(normalizar_url(url), lambda: baixar(url))
+        if not fui_eu: ...  # outro worker baixou; só reaproveitar o resultado
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._voos = {}
+        self.compartilhados = 0   # Vezes em que alguém pegou carona num voo
+
+    def executar(self, chave, funcao):
+        with self._lock:
+            voo = self._voos.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._voos[chave] = _Voo()
+            else:
+                self.compartilhados += 1
+
+        if lider:
+            try:
+                voo.resultado = funcao()
+            except BaseException as e:
+                voo.erro = e
+                raise
+            finally:
+                voo.pronto.set()
+        else:
+            voo.pronto.wait()
+            if voo.erro is not None:
+                raise voo.erro
+        return voo.resultado, lider
+
+    def esquecer(self, chave):
+        """Descarta um resultado já pronto (ex.: falha que vai ser tentada de novo na rodada)."""
+        with self._lock:
+            voo = self._voos.get(chave)
+            if voo is not None and voo.pronto.is_set():
+                del self._voos[chave]
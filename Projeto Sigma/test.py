@@ -1,17 +1,22 @@
 import json
-import requests
 import os
-import re
 import time
+import hashlib
 from datetime import datetime
 
+from sigma_core.caminhos import ARQUIVO_FONTES, PASTA_JSON_RAW, PASTA_PARCERIAS
+from sigma_core.conexoes import PoolSessoes
+from sigma_core.indice import IndiceFontes
+from sigma_core.controle_fluxo import LimitadorHost, DisjuntorHost, eh_bloqueio
+from sigma_core.extracao import REGEX_URL, nome_arquivo_fonte
+from sigma_core.parcerias import ClassificadorParcerias
+from sigma_core.gravador import GravadorDeduplicado
+
 # --- CONFIGURAÇÕES ---
-ARQUIVO_FONTES = "fontes.json"
 ARQUIVO_LOG_ERROS = "erros_mineracao.txt"
 ARQUIVO_MASTER_JSON = "master_db_sigma.json"
+ARQUIVO_INDICE_MINERACAO = "indice_mineracao.json"  # hash + resultado da última mineração por fonte
 
-PASTA_JSON_RAW = "Dados-Brutos"
-PASTA_PARCERIAS = "Parcerias"
 PASTA_DOWNLOADS = "Downloads"
 
 # Regra de validade do cache: 4 Horas (4 * 60 * 60 = 14400 segundos)
@@ -22,19 +27,23 @@ HEADERS_FAKE = {
     "Upgrade-Insecure-Requests": "1"
 }
 
+# Sessões keep-alive por painel (reaproveita TCP+TLS entre fontes do mesmo host)
+POOL_SESSOES = PoolSessoes(headers=HEADERS_FAKE, verify=False)
+
+# Anti-bloqueio adaptativo por painel (substitui o sleep fixo de 2s por fonte)
+LIMITADOR = LimitadorHost(taxa_inicial=0.5)
+DISJUNTOR = DisjuntorHost(limite_falhas=3, tempo_aberto=300)
+
+# Parcerias/ e Links_APKs em segundo plano, sem repetir linha entre rodadas
+GRAVADOR = GravadorDeduplicado()
+
 APPS_PARCERIA = {
     "Assist": "Assist_Plus_Play_Sim", "Play Sim": "Assist_Plus_Play_Sim",
     "Lazer": "Lazer_Play", "Vizzion": "Vizzion", "Unitv": "UniTV",
     "Xcloud": "XCloud_TV", "P2P": "Codigos_P2P_Geral", "Smarters": "IPTV_Smarters_DNS",
     "XCIPTV": "XCIPTV_Dados"
 }
-
-def limpar_nome_arquivo(nome):
-    try:
-        nome_ascii = nome.encode('ascii', 'ignore').decode('ascii')
-    except:
-        nome_ascii = "Nome_Desconhecido"
-    return re.sub(r'[<>:"/\\|?*]', '', nome_ascii).strip().replace(" ", "_")
+CLASSIFICADOR_PARCERIAS = ClassificadorParcerias(APPS_PARCERIA, ["CÓDIGO", "USUÁRIO", "SENHA", "PIN", "DNS", "URL"])
 
 def registrar_erro_log(nome, url, erro):
     """Salva o erro no arquivo de texto"""
@@ -54,58 +63,87 @@ def arquivo_eh_recente(caminho_arquivo):
     
     return idade_do_arquivo < TEMPO_VALIDADE_CACHE
 
+def registrar_resposta(url, resp):
+    """Alimenta o limitador/disjuntor com o resultado da requisição"""
+    if resp is None:
+        DISJUNTOR.falha(url)
+    elif eh_bloqueio(resp.status_code, resp.content[:512]):
+        LIMITADOR.bloqueio(url)
+        DISJUNTOR.falha(url)
+    elif resp.status_code >= 500:
+        DISJUNTOR.falha(url)
+    else:
+        DISJUNTOR.sucesso(url)
+        if resp.status_code == 200: LIMITADOR.sucesso(url)
+
 def requisicao_inteligente(url):
-    session = requests.Session()
-    session.headers.update(HEADERS_FAKE)
-    
-    # Tenta POST primeiro
-    try:
-        resp = session.post(url, timeout=15, verify=False)
-        if resp.status_code == 200: return resp
-    except: pass
-    
-    # Tenta GET (Fallback)
-    try:
-        resp = session.get(url, timeout=15, verify=False)
-        resp.raise_for_status()
-        return resp
-    except Exception as e:
-        raise Exception(f"Falha na conexão ({e})")
+    if not DISJUNTOR.permitir(url):
+        raise Exception("Painel isolado pelo disjuntor (falhas seguidas)")
 
-def extrair_parcerias_e_downloads(texto_resposta, nome_exibicao):
+    with POOL_SESSOES.sessao(url) as session:
+        # Tenta POST primeiro
+        LIMITADOR.aguardar(url)
+        try:
+            resp = session.post(url, timeout=15)
+            registrar_resposta(url, resp)
+            if resp.status_code == 200: return resp
+        except: registrar_resposta(url, None)
+        
+        # Tenta GET (Fallback)
+        LIMITADOR.aguardar(url)
+        try:
+            resp = session.get(url, timeout=15)
+        except Exception as e:
+            registrar_resposta(url, None)
+            raise Exception(f"Falha na conexão ({e})")
+        registrar_resposta(url, resp)
+        try:
+            resp.raise_for_status()
+            return resp
+        except Exception as e:
+            raise Exception(f"Falha na conexão ({e})")
+
+def minerar_texto(texto_resposta, nome_exibicao):
+    """Devolve (apks, {app: [linhas]}) sem escrever nada"""
     linhas = texto_resposta.split('\n')
     
     # Extrai Downloads (APKs)
-    urls = re.findall(r'(https?://[^\s<>"]+)', texto_resposta)
+    urls = REGEX_URL.findall(texto_resposta)
     apks = []
     for url in urls:
         if '.apk' in url.lower() or 'aftv.news' in url.lower() or 'dl.ntdev' in url.lower():
              if url not in apks: apks.append(url)
-    
-    if apks:
-        with open(os.path.join(PASTA_DOWNLOADS, "Links_APKs.txt"), 'a', encoding='utf-8') as f:
-            f.write(f"\n--- {nome_exibicao} ---\n")
-            for l in apks: f.write(f"{l}\n")
 
     # Extrai Parcerias (Senhas)
+    parcerias = {}
     app_atual = None
     for linha in linhas:
         l = linha.strip()
         # Ignora linhas gigantes (provavelmente JSON raw)
         if not l or len(l) > 300: continue
         
-        for k, v in APPS_PARCERIA.items():
-            if k.upper() in l.upper():
-                app_atual = v
-                break
+        app_linha, tem_credencial = CLASSIFICADOR_PARCERIAS.classificar(l)
+        if app_linha: app_atual = app_linha
         
-        if app_atual and any(x in l.upper() for x in ["CÓDIGO", "USUÁRIO", "SENHA", "PIN", "DNS", "URL"]):
-            with open(os.path.join(PASTA_PARCERIAS, f"{app_atual}.txt"), 'a', encoding='utf-8') as f:
-                f.write(f"[{nome_exibicao}] {l}\n")
+        if app_atual and tem_credencial:
+            parcerias.setdefault(app_atual, []).append(f"[{nome_exibicao}] {l}\n")
+
+    return apks, parcerias
+
+def gravar_mineracao(nome_exibicao, apks, parcerias):
+    for l in apks:
+        GRAVADOR.gravar(os.path.join(PASTA_DOWNLOADS, "Links_APKs.txt"), f"[{nome_exibicao}] {l}")
+
+    for app, linhas in parcerias.items():
+        for l in linhas:
+            GRAVADOR.gravar(os.path.join(PASTA_PARCERIAS, f"{app}.txt"), l)
+
+def extrair_parcerias_e_downloads(texto_resposta, nome_exibicao):
+    apks, parcerias = minerar_texto(texto_resposta, nome_exibicao)
+    gravar_mineracao(nome_exibicao, apks, parcerias)
+    return {"apks": apks, "parcerias": parcerias}
 
 def main():
-    requests.packages.urllib3.disable_warnings()
-    
     # Cria pastas necessárias
     for p in [PASTA_JSON_RAW, PASTA_PARCERIAS, PASTA_DOWNLOADS]:
         os.makedirs(p, exist_ok=True)
@@ -128,6 +166,8 @@ def main():
         fontes = json.load(f)
 
     print(f"🚀 MINERADOR V8 (Regra 4h): Auditando {len(fontes)} fontes...\n")
+
+    indice = IndiceFontes(ARQUIVO_INDICE_MINERACAO)
     
     atualizados = 0
     cacheados = 0
@@ -139,7 +179,7 @@ def main():
         
         if not url: continue
 
-        nome_arq = f"{limpar_nome_arquivo(nome)}.json"
+        nome_arq = nome_arquivo_fonte(nome)
         caminho_json = os.path.join(PASTA_JSON_RAW, nome_arq)
 
         print(f"📡 {nome}")
@@ -158,13 +198,29 @@ def main():
 
         try:
             if usar_cache:
-                with open(caminho_json, 'r', encoding='utf-8') as f:
-                    dados = json.load(f)
-                texto_completo = json.dumps(dados, ensure_ascii=False)
+                registro = indice.get(nome_arq)
+
+                # Tamanho/mtime iguais aos da última mineração: reaproveita sem nem abrir o arquivo
+                if registro and "apks" in registro and indice.hash_confirmado(nome_arq, caminho_json):
+                    gravar_mineracao(nome, registro["apks"], registro["parcerias"])
+                    print("-" * 40)
+                    continue
+
+                with open(caminho_json, 'rb') as f:
+                    conteudo = f.read()
+                digest = hashlib.sha1(conteudo).hexdigest()
+
+                # Arquivo tocado, mas com o mesmo conteúdo: reaproveita sem decodificar o JSON
+                if registro and registro.get("hash") == digest:
+                    gravar_mineracao(nome, registro["apks"], registro["parcerias"])
+                    st = os.stat(caminho_json)
+                    indice.atualizar(nome_arq, tamanho=st.st_size, mtime=st.st_mtime)
+                    print("-" * 40)
+                    continue
+
+                texto_completo = json.dumps(json.loads(conteudo), ensure_ascii=False)
             else:
-                # PAUSA ANTI-BLOQUEIO (Importante!)
-                time.sleep(2) 
-                
+                # Anti-bloqueio agora é por painel, dentro da requisicao_inteligente
                 resp = requisicao_inteligente(url)
                 try:
                     dados = resp.json()
@@ -174,14 +230,18 @@ def main():
                     dados = {"raw_text": resp.text}
                     texto_completo = resp.text
                 
-                with open(caminho_json, 'w', encoding='utf-8') as f:
-                    json.dump(dados, f, indent=4, ensure_ascii=False)
+                conteudo = json.dumps(dados, indent=4, ensure_ascii=False).encode('utf-8')
+                with open(caminho_json, 'wb') as f:
+                    f.write(conteudo)
+                digest = hashlib.sha1(conteudo).hexdigest()
                 
                 atualizados += 1
                 print("   💾 Dados atualizados em 'Dados-Brutos'.")
 
             # Sempre processa as parcerias, mesmo vindo do cache
-            extrair_parcerias_e_downloads(texto_completo, nome)
+            resultado = extrair_parcerias_e_downloads(texto_completo, nome)
+            st = os.stat(caminho_json)
+            indice.atualizar(nome_arq, hash=digest, tamanho=st.st_size, mtime=st.st_mtime, **resultado)
 
         except Exception as e:
             msg_erro = str(e)
@@ -199,5 +259,9 @@ def main():
     if erros > 0:
         print(f"📄 Detalhes salvos em: '{ARQUIVO_LOG_ERROS}'")
 
+    indice.salvar()
+    POOL_SESSOES.fechar()
+    GRAVADOR.fechar()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file